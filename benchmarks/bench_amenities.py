@@ -0,0 +1,74 @@
+#!/usr/bin/python3
+"""Benchmark the amenity filters of FileStorage against a full scan.
+
+Places get random amenities out of a fixed set, and every filter runs
+once through the amenity bitmaps of FileStorage and once over every
+place with the scanning function of models.engine.indexes.
+
+Usage: ./benchmarks/bench_amenities.py [-n PLACES] [-a AMENITIES]
+"""
+import os
+import sys
+import random
+import argparse
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def generate(count, amenities):
+    """Store count Place objects with up to 8 of amenities each."""
+    from models import storage
+    from models.place import Place
+
+    rand = random.Random(0)
+    dt = "2024-01-01T00:00:00.000000"
+    for i in range(count):
+        storage.new(Place(id="{:036d}".format(i), created_at=dt,
+                          updated_at=dt, amenity_ids=rand.sample(
+                              amenities, rand.randint(0, 8))))
+
+
+def timed(query, repeat):
+    """Return the mean milliseconds query takes over repeat runs."""
+    start = perf_counter()
+    for _ in range(repeat):
+        query()
+    return (perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("-n", type=int, default=200000, dest="count")
+    parser.add_argument("-a", type=int, default=40, dest="amenities")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        from models import storage
+        from models.engine import indexes
+
+        amenities = ["amenity-{}".format(i) for i in range(args.amenities)]
+        generate(args.count, amenities)
+    a, b, c, d = amenities[:4]
+    filters = [
+        ("a AND b", dict(all_of=[a, b])),
+        ("a OR b", dict(any_of=[a, b])),
+        ("a AND NOT b", dict(all_of=[a], none_of=[b])),
+        ("(a|b) & c & !d", dict(any_of=[a, b], all_of=[c], none_of=[d])),
+    ]
+    places = storage.all("Place")
+    storage.having([a])
+    print("places: {}, amenities: {}".format(args.count, args.amenities))
+    print("{:<16} {:>10} {:>12} {:>12}".format(
+        "filter", "found", "index (ms)", "scan (ms)"))
+    for name, kwargs in filters:
+        found = len(storage.having(**kwargs))
+        print("{:<16} {:>10} {:>12.2f} {:>12.1f}".format(
+            name, found, timed(lambda: storage.having(**kwargs), 20),
+            timed(lambda: indexes.having(places, **kwargs), 2)))
+
+
+if __name__ == "__main__":
+    main()
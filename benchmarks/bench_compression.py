@@ -0,0 +1,94 @@
+#!/usr/bin/python3
+"""Benchmark FileStorage save() and reload() with each compression codec.
+
+Every codec and level saves and reloads the same generated objects, and
+the file size and compression ratio are reported next to the save and
+reload throughput.
+
+Usage: ./benchmarks/bench_compression.py [-n OBJECTS] [-r REPEAT]
+"""
+import os
+import sys
+import argparse
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SETTINGS = [(None, None), ("gzip", 1), ("gzip", 6), ("gzip", 9),
+            ("zlib", 1), ("zlib", 6), ("zlib", 9), ("lzma", 0), ("lzma", 6)]
+
+
+def generate(count):
+    """Return count Review objects, keyed like FileStorage.__objects.
+
+    Reviews refer to 1000 places and 5000 users, as in real data where
+    foreign keys repeat.
+    """
+    from models.review import Review
+
+    objs = {}
+    for i in range(count):
+        dt = "2024-01-01T00:00:00.{:06d}".format(i % 10 ** 6)
+        obj = Review(id="{:036d}".format(i), created_at=dt, updated_at=dt,
+                     place_id="{:036d}".format(i % 1000),
+                     user_id="{:036d}".format(i % 5000), text="Great stay")
+        objs["Review." + obj.id] = obj
+    return objs
+
+
+def run(codec, level, count, repeat):
+    """Return the best save and reload rates and the size of a snapshot.
+
+    Args:
+        codec (str): The name of the codec, or None.
+        level (int): The compression level.
+        count (int): The number of stored objects.
+        repeat (int): The number of times to save and reload.
+    """
+    from models import storage
+    from models.engine.file_storage import FileStorage
+
+    storage.compression(codec, level)
+    save = load = 0
+    for _ in range(repeat):
+        storage.all()
+        FileStorage._FileStorage__cache = {}
+        FileStorage._FileStorage__unsaved = True
+        start = perf_counter()
+        storage.flush()
+        save = max(save, count / (perf_counter() - start))
+        objects = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        start = perf_counter()
+        storage.reload()
+        load = max(load, count / (perf_counter() - start))
+        FileStorage._FileStorage__objects = objects
+    return save, load, os.path.getsize("file.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("-n", type=int, default=200000, dest="count")
+    parser.add_argument("-r", type=int, default=3, dest="repeat")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        from models.engine.file_storage import FileStorage
+
+        FileStorage._FileStorage__objects = generate(args.count)
+        results = [(codec, level, run(codec, level, args.count, args.repeat))
+                   for codec, level in SETTINGS]
+    plain = results[0][2][2]
+    print("objects: {}".format(args.count))
+    print("{:<6} {:>5} {:>12} {:>6} {:>14} {:>14}".format(
+        "codec", "level", "size", "ratio", "save (obj/s)", "load (obj/s)"))
+    for codec, level, (save, load, size) in results:
+        print("{:<6} {:>5} {:>12,} {:>6.2f} {:>14,.0f} {:>14,.0f}".format(
+            codec or "none", "-" if level is None else level, size,
+            plain / size, save, load))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+"""Benchmark FileStorage save() and reload() in each snapshot format.
+
+Every format saves and reloads the same generated objects, and the
+resulting file size is reported next to the timings.
+
+Usage: ./benchmarks/bench_formats.py [-n OBJECTS] [-r REPEAT]
+"""
+import os
+import sys
+import argparse
+import tempfile
+from time import perf_counter
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def generate(count):
+    """Return count Review records keyed like file.json."""
+    start = datetime(2024, 1, 1, 0, 0, 0, 1)
+    objs = {}
+    for i in range(count):
+        dt = (start + timedelta(seconds=i)).isoformat()
+        rec = {"id": "{:036d}".format(i), "created_at": dt,
+               "updated_at": dt, "place_id": "p", "user_id": "u",
+               "text": "Great stay", "__class__": "Review"}
+        objs["Review." + rec["id"]] = rec
+    return objs
+
+
+def run(name, records, repeat):
+    """Return the best save and reload times and the size of format name.
+
+    Args:
+        name (str): The name of the format.
+        records (dict): The records to load before saving.
+        repeat (int): The number of times to save and reload.
+    """
+    from models import storage
+    from models.review import Review
+    from models.engine.file_storage import FileStorage
+
+    storage.file_format(name)
+    save = load = float("inf")
+    for _ in range(repeat):
+        FileStorage._FileStorage__objects = {
+            k: Review(**v) for k, v in records.items()}
+        storage.save()
+        FileStorage._FileStorage__objects = {
+            k: Review(**v) for k, v in records.items()}
+        FileStorage._FileStorage__dirty.update(records)
+        start = perf_counter()
+        storage.save()
+        save = min(save, perf_counter() - start)
+        FileStorage._FileStorage__objects = {}
+        start = perf_counter()
+        storage.reload()
+        load = min(load, perf_counter() - start)
+    return save, load, os.path.getsize("file.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("-n", type=int, default=200000, dest="count")
+    parser.add_argument("-r", type=int, default=3, dest="repeat")
+    args = parser.parse_args()
+
+    records = generate(args.count)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        from models.engine.formats import formats
+
+        results = {name: run(name, records, args.repeat) for name in formats}
+    print("objects: {}".format(args.count))
+    print("{:<8} {:>12} {:>10} {:>10}".format(
+        "format", "size", "save (s)", "load (s)"))
+    for name, (save, load, size) in results.items():
+        print("{:<8} {:>12,} {:>10.3f} {:>10.3f}".format(
+            name, size, save, load))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+"""Benchmark parallel FileStorage.reload() of a sharded store.
+
+Reloads the same sharded store with 1 to N worker processes and reports
+the throughput and the speedup over a reload in a single process.
+
+Usage: ./benchmarks/bench_parallel.py [-n OBJECTS] [-s SHARDS]
+                                      [-w WORKERS] [-r REPEAT]
+"""
+import os
+import sys
+import argparse
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run(storage, count, repeat):
+    """Return the best objects per second of repeat reloads."""
+    from models.engine.file_storage import FileStorage
+
+    best = 0
+    for _ in range(repeat):
+        FileStorage._FileStorage__objects = {}
+        start = perf_counter()
+        storage.reload()
+        best = max(best, count / (perf_counter() - start))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("-n", type=int, default=500000, dest="count")
+    parser.add_argument("-s", type=int, default=16, dest="shards")
+    parser.add_argument("-w", type=int, default=os.cpu_count(),
+                        dest="workers")
+    parser.add_argument("-r", type=int, default=3, dest="repeat")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        from models import storage
+        from models.review import Review
+        from models.engine.file_storage import FileStorage
+
+        storage.shards(args.shards)
+        FileStorage._FileStorage__objects = {
+            "Review." + obj.id: obj for obj in
+            (Review(id="{:036d}".format(i),
+                    created_at="2024-01-01T00:00:00",
+                    updated_at="2024-01-01T00:00:00", place_id="p",
+                    user_id="u", text="Great stay")
+             for i in range(args.count))}
+        storage.save()
+        workers = 1
+        results = []
+        while True:
+            storage.workers(workers)
+            results.append((workers, run(storage, args.count, args.repeat)))
+            if workers >= args.workers:
+                break
+            workers = min(workers * 2, args.workers)
+    print("objects: {}  shards per class: {}  cpus: {}".format(
+        args.count, args.shards, os.cpu_count()))
+    for workers, rate in results:
+        print("{:>3} workers: {:>12,.0f} objects/s  {:.2f}x".format(
+            workers, rate, rate / results[0][1]))
+
+
+if __name__ == "__main__":
+    main()
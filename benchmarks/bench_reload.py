@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+"""Benchmark FileStorage.reload() throughput on a generated file.json.
+
+Compares reload with the ISO-8601 datetime parser used by BaseModel
+against the legacy datetime.strptime() parsing of created_at/updated_at.
+
+Usage: ./benchmarks/bench_reload.py [-n OBJECTS] [-r REPEAT]
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+from time import perf_counter
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class LegacyDatetime(datetime):
+    """A datetime whose fromisoformat parses like the legacy code did."""
+
+    @classmethod
+    def fromisoformat(cls, date_string):
+        """Parse date_string with datetime.strptime()."""
+        return datetime.strptime(date_string, "%Y-%m-%dT%H:%M:%S.%f")
+
+
+def generate(path, count):
+    """Write count Review records to the JSON file path."""
+    start = datetime(2024, 1, 1, 0, 0, 0, 1)
+    with open(path, "w") as f:
+        f.write("{")
+        for i in range(count):
+            dt = (start + timedelta(seconds=i)).isoformat()
+            rec = {"id": "{:036d}".format(i), "created_at": dt,
+                   "updated_at": dt, "place_id": "p", "user_id": "u",
+                   "text": "Great stay", "__class__": "Review"}
+            if i:
+                f.write(", ")
+            f.write(json.dumps("Review." + rec["id"]) + ": " + json.dumps(rec))
+        f.write("}")
+
+
+def run(storage, count, repeat):
+    """Return the best objects per second of repeat reloads."""
+    from models.engine.file_storage import FileStorage
+
+    best = 0
+    for _ in range(repeat):
+        FileStorage._FileStorage__objects = {}
+        start = perf_counter()
+        storage.reload()
+        best = max(best, count / (perf_counter() - start))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("-n", type=int, default=1000000, dest="count")
+    parser.add_argument("-r", type=int, default=3, dest="repeat")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        generate("file.json", args.count)
+        from models import storage
+
+        with patch("models.base_model.datetime", LegacyDatetime):
+            legacy = run(storage, args.count, args.repeat)
+        iso = run(storage, args.count, args.repeat)
+    print("objects:     {}".format(args.count))
+    print("strptime:    {:,.0f} objects/s".format(legacy))
+    print("fromisoformat: {:,.0f} objects/s".format(iso))
+    print("speedup:     {:.2f}x".format(iso / legacy))
+
+
+if __name__ == "__main__":
+    main()
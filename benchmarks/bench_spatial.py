@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+"""Benchmark the spatial queries of FileStorage against a full scan.
+
+Places are spread over the land latitudes, and every query runs once
+through the grid index of FileStorage and once over every place with
+the scanning functions of models.engine.indexes.
+
+Usage: ./benchmarks/bench_spatial.py [-n PLACES] [-q QUERIES]
+"""
+import os
+import sys
+import random
+import argparse
+import tempfile
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def generate(count):
+    """Store count Place objects at random locations."""
+    from models import storage
+    from models.place import Place
+
+    rand = random.Random(0)
+    dt = "2024-01-01T00:00:00.000000"
+    for i in range(count):
+        storage.new(Place(id="{:036d}".format(i), created_at=dt,
+                          updated_at=dt, latitude=rand.uniform(-60, 70),
+                          longitude=rand.uniform(-180, 180)))
+
+
+def timed(query, points):
+    """Return the mean milliseconds query takes on each point."""
+    start = perf_counter()
+    for lat, lon in points:
+        query(lat, lon)
+    return (perf_counter() - start) * 1000 / len(points)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("-n", type=int, default=200000, dest="count")
+    parser.add_argument("-q", type=int, default=100, dest="queries")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        from models import storage
+        from models.engine import indexes
+
+        generate(args.count)
+    rand = random.Random(1)
+    points = [(rand.uniform(-60, 70), rand.uniform(-180, 180))
+              for _ in range(args.queries)]
+    scans = points[:max(1, args.queries // 20)]
+    places = storage.all("Place")
+    queries = [
+        ("box 1x1 deg", lambda lat, lon: storage.box(
+            lat, lon, lat + 1, min(lon + 1, 180)),
+         lambda lat, lon: indexes.box(
+            places, lat, lon, lat + 1, min(lon + 1, 180))),
+        ("within 25 km", lambda lat, lon: storage.within(lat, lon, 25),
+         lambda lat, lon: indexes.within(places, lat, lon, 25)),
+        ("nearest 10", lambda lat, lon: storage.nearest(lat, lon, 10),
+         lambda lat, lon: indexes.nearest(places, lat, lon, 10)),
+    ]
+    print("places: {}".format(args.count))
+    print("{:<14} {:>12} {:>12}".format("query", "index (ms)", "scan (ms)"))
+    for name, indexed, scan in queries:
+        print("{:<14} {:>12.3f} {:>12.1f}".format(
+            name, timed(indexed, points), timed(scan, scans)))
+
+
+if __name__ == "__main__":
+    main()
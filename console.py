@@ -1,16 +1,14 @@
 #!/usr/bin/python3
 """Defines the HBnB console."""
+import ast
 import cmd
+import io
 import re
 from shlex import split
 from models import storage
-from models.base_model import BaseModel
-from models.user import User
-from models.state import State
-from models.city import City
-from models.place import Place
-from models.amenity import Amenity
-from models.review import Review
+from models.base_model import classes
+from models.engine import formats
+from models.engine.interning import intern_value, strings
 
 
 def parse(arg):
@@ -39,15 +37,6 @@ class HBNBCommand(cmd.Cmd):
     """
 
     prompt = "(hbnb) "
-    __classes = {
-        "BaseModel",
-        "User",
-        "State",
-        "City",
-        "Place",
-        "Amenity",
-        "Review"
-    }
 
     def emptyline(self):
         """Do nothing upon receiving an empty line."""
@@ -60,7 +49,9 @@ class HBNBCommand(cmd.Cmd):
             "show": self.do_show,
             "destroy": self.do_destroy,
             "count": self.do_count,
-            "update": self.do_update
+            "update": self.do_update,
+            "where": self.do_where,
+            "search": self.do_search
         }
         match = re.search(r"\.", arg)
         if match is not None:
@@ -76,11 +67,13 @@ class HBNBCommand(cmd.Cmd):
 
     def do_quit(self, arg):
         """Quit command to exit the program."""
+        storage.flush()
         return True
 
     def do_EOF(self, arg):
         """EOF signal to exit the program."""
         print("")
+        storage.flush()
         return True
 
     def do_create(self, arg):
@@ -90,10 +83,15 @@ class HBNBCommand(cmd.Cmd):
         argl = parse(arg)
         if len(argl) == 0:
             print("** class name missing **")
-        elif argl[0] not in HBNBCommand.__classes:
+        elif argl[0] not in classes:
             print("** class doesn't exist **")
         else:
-            print(eval(argl[0])().id)
+            try:
+                obj = classes[argl[0]]()
+            except io.UnsupportedOperation:
+                print("** storage is read-only **")
+                return False
+            print(obj.id)
             storage.save()
 
     def do_show(self, arg):
@@ -101,33 +99,35 @@ class HBNBCommand(cmd.Cmd):
         Display the string representation of a class instance of a given id.
         """
         argl = parse(arg)
-        objdict = storage.all()
         if len(argl) == 0:
             print("** class name missing **")
-        elif argl[0] not in HBNBCommand.__classes:
+        elif argl[0] not in classes:
             print("** class doesn't exist **")
         elif len(argl) == 1:
             print("** instance id missing **")
-        elif "{}.{}".format(argl[0], argl[1]) not in objdict:
+        elif storage.get(argl[0], argl[1]) is None:
             print("** no instance found **")
         else:
-            print(objdict["{}.{}".format(argl[0], argl[1])])
+            print(storage.get(argl[0], argl[1]))
 
     def do_destroy(self, arg):
         """Usage: destroy <class> <id> or <class>.destroy(<id>)
         Delete a class instance of a given id."""
         argl = parse(arg)
-        objdict = storage.all()
         if len(argl) == 0:
             print("** class name missing **")
-        elif argl[0] not in HBNBCommand.__classes:
+        elif argl[0] not in classes:
             print("** class doesn't exist **")
         elif len(argl) == 1:
             print("** instance id missing **")
-        elif "{}.{}".format(argl[0], argl[1]) not in objdict.keys():
+        elif storage.get(argl[0], argl[1]) is None:
             print("** no instance found **")
         else:
-            del objdict["{}.{}".format(argl[0], argl[1])]
+            try:
+                storage.delete(storage.get(argl[0], argl[1]))
+            except io.UnsupportedOperation:
+                print("** storage is read-only **")
+                return False
             storage.save()
 
     def do_all(self, arg):
@@ -135,26 +135,137 @@ class HBNBCommand(cmd.Cmd):
         Display string representations of all instances of a given class.
         If no class is specified, displays all instantiated objects."""
         argl = parse(arg)
-        if len(argl) > 0 and argl[0] not in HBNBCommand.__classes:
+        if len(argl) > 0 and argl[0] not in classes:
             print("** class doesn't exist **")
         else:
             objl = []
-            for obj in storage.all().values():
-                if len(argl) > 0 and argl[0] == obj.__class__.__name__:
-                    objl.append(obj.__str__())
-                elif len(argl) == 0:
-                    objl.append(obj.__str__())
+            objdict = storage.all(argl[0]) if len(argl) > 0 else storage.all()
+            for obj in objdict.values():
+                objl.append(obj.__str__())
             print(objl)
 
+    def do_where(self, arg):
+        """Usage: where <class> <attribute><op><value> ... or
+       <class>.where(<attribute><op><value>, ...)
+        Display string representations of the instances of a given class
+        meeting every condition, where <op> is =, <, <=, > or >=."""
+        argl = parse(arg)
+        if len(argl) == 0:
+            print("** class name missing **")
+            return False
+        if argl[0] not in classes:
+            print("** class doesn't exist **")
+            return False
+        conditions = []
+        for cond in argl[1:]:
+            match = re.fullmatch(r"(\w+)(<=|>=|<|>|=)(.+)", cond)
+            if match is None:
+                print("** invalid condition **")
+                return False
+            name, op, value = match.groups()
+            try:
+                value = ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                pass
+            conditions.append((name, op, value))
+        objdict = storage.where(argl[0], *conditions)
+        print([obj.__str__() for obj in objdict.values()])
+
+    def do_search(self, arg):
+        """Usage: search <class> <terms> or <class>.search(<terms>)
+        Display string representations of the instances of a given class
+        matching words of the terms, best match first."""
+        argl = parse(arg)
+        if len(argl) == 0:
+            print("** class name missing **")
+        elif argl[0] not in classes:
+            print("** class doesn't exist **")
+        elif len(argl) == 1:
+            print("** terms missing **")
+        else:
+            objdict = storage.search(argl[0], " ".join(argl[1:]))
+            print([obj.__str__() for obj in objdict.values()])
+
+    def do_box(self, arg):
+        """Usage: box <south> <west> <north> <east>
+        Display string representations of the places located in a
+        bounding box of latitudes and longitudes."""
+        argl = parse(arg)
+        if len(argl) < 4:
+            print("** coordinates missing **")
+            return False
+        try:
+            objdict = storage.box(*map(float, argl[:4]))
+        except ValueError:
+            print("** invalid coordinates **")
+            return False
+        print([obj.__str__() for obj in objdict.values()])
+
+    def do_within(self, arg):
+        """Usage: within <latitude> <longitude> <km>
+        Display string representations of the places within a distance
+        of a point, nearest first."""
+        argl = parse(arg)
+        if len(argl) < 2:
+            print("** coordinates missing **")
+            return False
+        if len(argl) == 2:
+            print("** distance missing **")
+            return False
+        try:
+            objdict = storage.within(*map(float, argl[:3]))
+        except ValueError:
+            print("** invalid coordinates **")
+            return False
+        print([obj.__str__() for obj in objdict.values()])
+
+    def do_nearest(self, arg):
+        """Usage: nearest <latitude> <longitude> [<count>]
+        Display string representations of the places nearest to a point,
+        nearest first. Shows one place unless a count is given."""
+        argl = parse(arg)
+        if len(argl) < 2:
+            print("** coordinates missing **")
+            return False
+        try:
+            k = int(argl[2]) if len(argl) > 2 else 1
+        except ValueError:
+            k = 0
+        if k < 1:
+            print("** invalid count **")
+            return False
+        try:
+            objdict = storage.nearest(float(argl[0]), float(argl[1]), k)
+        except ValueError:
+            print("** invalid coordinates **")
+            return False
+        print([obj.__str__() for obj in objdict.values()])
+
+    def do_having(self, arg):
+        """Usage: having <amenity_id> [|<amenity_id>] [-<amenity_id>] ...
+        Display string representations of the places having every plain
+        amenity id, one of the ids prefixed with | and none of the ids
+        prefixed with -."""
+        argl = parse(arg)
+        if len(argl) == 0:
+            print("** amenity ids missing **")
+            return False
+        all_of, any_of, none_of = [], [], []
+        for id in argl:
+            if id.startswith("|"):
+                any_of.append(id[1:])
+            elif id.startswith("-"):
+                none_of.append(id[1:])
+            else:
+                all_of.append(id)
+        objdict = storage.having(all_of, any_of, none_of)
+        print([obj.__str__() for obj in objdict.values()])
+
     def do_count(self, arg):
         """Usage: count <class> or <class>.count()
         Retrieve the number of instances of a given class."""
         argl = parse(arg)
-        count = 0
-        for obj in storage.all().values():
-            if argl[0] == obj.__class__.__name__:
-                count += 1
-        print(count)
+        print(storage.count(argl[0]) if len(argl) > 0 else storage.count())
 
     def do_update(self, arg):
         """Usage: update <class> <id> <attribute_name> <attribute_value> or
@@ -163,18 +274,18 @@ class HBNBCommand(cmd.Cmd):
         Update a class instance of a given id by adding or updating
         a given attribute key/value pair or dictionary."""
         argl = parse(arg)
-        objdict = storage.all()
 
         if len(argl) == 0:
             print("** class name missing **")
             return False
-        if argl[0] not in HBNBCommand.__classes:
+        if argl[0] not in classes:
             print("** class doesn't exist **")
             return False
         if len(argl) == 1:
             print("** instance id missing **")
             return False
-        if "{}.{}".format(argl[0], argl[1]) not in objdict.keys():
+        obj = storage.get(argl[0], argl[1])
+        if obj is None:
             print("** no instance found **")
             return False
         if len(argl) == 2:
@@ -182,29 +293,114 @@ class HBNBCommand(cmd.Cmd):
             return False
         if len(argl) == 3:
             try:
-                type(eval(argl[2])) != dict
-            except NameError:
+                ast.literal_eval(argl[2])
+            except (ValueError, SyntaxError):
                 print("** value missing **")
                 return False
 
+        try:
+            self.__update(obj, argl)
+        except io.UnsupportedOperation:
+            print("** storage is read-only **")
+            return False
+        except AttributeError:
+            print("** attribute can't be set **")
+            return False
+        storage.save()
+
+    def __update(self, obj, argl):
+        """Set the attribute, or the dictionary of attributes, of argl."""
         if len(argl) == 4:
-            obj = objdict["{}.{}".format(argl[0], argl[1])]
             if argl[2] in obj.__class__.__dict__.keys():
                 valtype = type(obj.__class__.__dict__[argl[2]])
-                obj.__dict__[argl[2]] = valtype(argl[3])
+                if valtype is frozenset:
+                    try:
+                        value = ast.literal_eval(argl[3])
+                    except (ValueError, SyntaxError):
+                        value = argl[3]
+                else:
+                    value = valtype(argl[3])
             else:
-                obj.__dict__[argl[2]] = argl[3]
-        elif type(eval(argl[2])) == dict:
-            obj = objdict["{}.{}".format(argl[0], argl[1])]
-            for k, v in eval(argl[2]).items():
+                value = argl[3]
+            setattr(obj, argl[2], intern_value(argl[2], value))
+        elif type(ast.literal_eval(argl[2])) == dict:
+            for k, v in ast.literal_eval(argl[2]).items():
                 if (k in obj.__class__.__dict__.keys() and
                         type(obj.__class__.__dict__[k]) in {str, int, float}):
                     valtype = type(obj.__class__.__dict__[k])
-                    obj.__dict__[k] = valtype(v)
-                else:
-                    obj.__dict__[k] = v
+                    v = valtype(v)
+                setattr(obj, k, intern_value(k, v))
+
+    def do_export(self, arg):
+        """Usage: export <path> or export <class> <path>
+        Write all instances, or those of a given class, to a file with
+        one JSON record per line."""
+        argl = parse(arg)
+        if len(argl) == 0 or (len(argl) == 1 and argl[0] in classes):
+            print("** file path missing **")
+        elif len(argl) > 1 and argl[0] not in classes:
+            print("** class doesn't exist **")
+        else:
+            objdict = storage.all(argl[0]) if len(argl) > 1 else storage.all()
+            records = ((k, obj.to_dict()) for k, obj in objdict.items())
+            try:
+                with open(argl[-1], "wb") as f:
+                    formats.NDJSONFormat.dump(records, f)
+            except OSError:
+                print("** file can't be written **")
+
+    def do_import(self, arg):
+        """Usage: import <path>
+        Create the instances recorded in a file, one record at a time.
+        The file may be in any storage format."""
+        argl = parse(arg)
+        if len(argl) == 0:
+            print("** file path missing **")
+            return False
+        try:
+            f = formats.reader(argl[0])
+        except FileNotFoundError:
+            print("** file doesn't exist **")
+            return False
+        except OSError:
+            print("** file can't be read **")
+            return False
+        with f:
+            try:
+                for key, rec in formats.detect(f).load(f):
+                    cls_name = rec.pop("__class__", None)
+                    if cls_name in classes:
+                        storage.new(classes[cls_name](**rec))
+            except io.UnsupportedOperation:
+                print("** storage is read-only **")
+                return False
+            except ValueError:
+                print("** invalid record **")
         storage.save()
 
+    def do_stats(self, arg):
+        """Usage: stats
+        Display how many foreign key and class name strings are shared,
+        and the memory this saved."""
+        print("interned strings: {}".format(len(strings)))
+        print("shared references: {}".format(strings.hits))
+        print("memory saved: {} bytes".format(strings.saved))
+
+    def do_begin(self, arg):
+        """Usage: begin
+        Start a transaction: changes are saved together on commit."""
+        storage.begin()
+
+    def do_commit(self, arg):
+        """Usage: commit
+        Save the changes made since begin."""
+        storage.commit()
+
+    def do_rollback(self, arg):
+        """Usage: rollback
+        Discard the changes made since begin."""
+        storage.rollback()
+
 
 if __name__ == "__main__":
     HBNBCommand().cmdloop()
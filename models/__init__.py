@@ -1,7 +1,44 @@
 #!/usr/bin/python3
 """__init__ magic method for models directory"""
+from os import getenv
+from models.base_model import BaseModel
+from models.user import User
+from models.state import State
+from models.city import City
+from models.place import Place
+from models.amenity import Amenity
+from models.review import Review
 from models.engine.file_storage import FileStorage
 
 
-storage = FileStorage()
+if getenv("HBNB_TYPE_STORAGE") == "db":
+    from models.engine.db_storage import DBStorage
+    storage = DBStorage(getenv("HBNB_DB_PATH", "file.db"))
+elif getenv("HBNB_TYPE_STORAGE") == "mapped":
+    from models.engine.mapped_storage import MappedStorage
+    storage = MappedStorage()
+else:
+    storage = FileStorage()
+    if getenv("HBNB_JOURNAL"):
+        storage.journal(int(getenv("HBNB_JOURNAL")))
+    if getenv("HBNB_LAZY"):
+        storage.lazy()
+    if getenv("HBNB_COMPACT"):
+        storage.compact()
+    if getenv("HBNB_FORMAT"):
+        storage.file_format(getenv("HBNB_FORMAT"))
+    if getenv("HBNB_COMPRESSION"):
+        level = getenv("HBNB_COMPRESSION_LEVEL")
+        storage.compression(getenv("HBNB_COMPRESSION"),
+                            int(level) if level else None)
+    if getenv("HBNB_SHARDS"):
+        storage.shards(int(getenv("HBNB_SHARDS")))
+    if getenv("HBNB_INDEX"):
+        storage.key_index()
+    if getenv("HBNB_TEXT_INDEX"):
+        storage.text_index()
+    if getenv("HBNB_WORKERS"):
+        storage.workers(int(getenv("HBNB_WORKERS")))
+    if getenv("HBNB_WRITE_BEHIND"):
+        storage.write_behind(float(getenv("HBNB_WRITE_BEHIND")))
 storage.reload()
@@ -4,9 +4,22 @@ import models
 from uuid import uuid4
 from datetime import datetime
 
+# Maps the name of each model class to the class.
+classes = {}
+
 
 class BaseModel:
-    """Represents the BaseModel of the HBnB project."""
+    """Represents the BaseModel of the HBnB project.
+
+    Every subclass is added to the classes registry by its name when it
+    is defined, which is how storage engines and the console resolve
+    class names.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        """Register the new model class cls in classes."""
+        super().__init_subclass__(**kwargs)
+        classes[cls.__name__] = cls
 
     def __init__(self, *args, **kwargs):
         """Initialize a new BaseModel.
@@ -16,18 +29,27 @@ class BaseModel:
             **kwargs (dict): Key/value pairs of attributes.
         """
         tform = "%Y-%m-%dT%H:%M:%S.%f"
-        self.id = str(uuid4())
-        self.created_at = datetime.today()
-        self.updated_at = datetime.today()
+        self.__dict__["id"] = str(uuid4())
+        self.__dict__["created_at"] = datetime.today()
+        self.__dict__["updated_at"] = datetime.today()
         if len(kwargs) != 0:
             for k, v in kwargs.items():
-                if k == "created_at" or k == "updated_at":
-                    self.__dict__[k] = datetime.strptime(v, tform)
-                else:
-                    self.__dict__[k] = v
+                if ((k == "created_at" or k == "updated_at") and
+                        not isinstance(v, datetime)):
+                    try:
+                        v = datetime.fromisoformat(v)
+                    except ValueError:
+                        v = datetime.strptime(v, tform)
+                self.__dict__[k] = v
         else:
             models.storage.new(self)
 
+    def __setattr__(self, name, value):
+        """Set an attribute and flag the instance as changed in storage."""
+        old = (self.__dict__[name],) if name in self.__dict__ else ()
+        super().__setattr__(name, value)
+        models.storage.mark(self, name, *old)
+
     def save(self):
         """Update updated_at with the current datetime."""
         self.updated_at = datetime.today()
@@ -37,9 +59,12 @@ class BaseModel:
         """Return the dictionary of the BaseModel instance.
 
         Includes the key/value pair __class__ representing
-        the class name of the object.
+        the class name of the object. Sets are returned as sorted lists.
         """
         rdict = self.__dict__.copy()
+        for k, v in rdict.items():
+            if isinstance(v, (set, frozenset)):
+                rdict[k] = sorted(v)
         rdict["created_at"] = self.created_at.isoformat()
         rdict["updated_at"] = self.updated_at.isoformat()
         rdict["__class__"] = self.__class__.__name__
@@ -49,3 +74,6 @@ class BaseModel:
         """Return the print/str representation of the BaseModel instance."""
         clname = self.__class__.__name__
         return "[{}] ({}) {}".format(clname, self.id, self.__dict__)
+
+
+classes[BaseModel.__name__] = BaseModel
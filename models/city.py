@@ -1,5 +1,6 @@
 #!/usr/bin/python3
 """Defines the City class."""
+import models
 from models.base_model import BaseModel
 
 
@@ -13,3 +14,9 @@ class City(BaseModel):
 
     state_id = ""
     name = ""
+
+    @property
+    def places(self):
+        """The list of the Place instances of the city."""
+        return list(models.storage.related(
+            "Place", "city_id", self.id).values())
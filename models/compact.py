@@ -0,0 +1,143 @@
+#!/usr/bin/python3
+"""Defines compact, slot-backed variants of the HBnB model classes."""
+import models
+from uuid import uuid4
+from datetime import datetime
+from models.base_model import BaseModel
+from models.place import id_set
+
+# Maps each attribute name tuple in use to its shared instance and
+# its {name: position} lookup.
+_shapes = {}
+# Maps each model class to its compact variant.
+_variants = {}
+
+
+def _shape(keys):
+    """Return the shared instance of the attribute name tuple keys."""
+    try:
+        return _shapes[keys][0]
+    except KeyError:
+        _shapes[keys] = (keys, {k: i for i, k in enumerate(keys)})
+        return keys
+
+
+class CompactModel:
+    """Represent a model instance without a per-instance __dict__.
+
+    Instances keep their attribute names in a tuple shared by every
+    instance with the same attributes, and their values in a tuple.
+    __class__ reports the model class the variant stands in for, so
+    to_dict(), __str__() and isinstance() behave like the model class.
+    Attributes whose class default is a frozenset are stored as
+    frozensets, like the model class stores them.
+
+    Attributes:
+        _model (type): The model class this variant stands in for.
+        _sets (frozenset): The names of the attributes of _model whose
+            class default is a frozenset.
+    """
+
+    __slots__ = ("_keys", "_values")
+    _model = BaseModel
+    _sets = frozenset()
+
+    def __init__(self, *args, **kwargs):
+        """Initialize a new compact model instance.
+
+        Args:
+            *args (any): Unused.
+            **kwargs (dict): Key/value pairs of attributes.
+        """
+        tform = "%Y-%m-%dT%H:%M:%S.%f"
+        values = {"id": None, "created_at": None, "updated_at": None}
+        sets = type(self)._sets
+        for k, v in kwargs.items():
+            if ((k == "created_at" or k == "updated_at") and
+                    not isinstance(v, datetime)):
+                try:
+                    v = datetime.fromisoformat(v)
+                except ValueError:
+                    v = datetime.strptime(v, tform)
+            elif k in sets:
+                v = id_set(v)
+            values[k] = v
+        if "id" not in kwargs:
+            values["id"] = str(uuid4())
+        for k in ("created_at", "updated_at"):
+            if k not in kwargs:
+                values[k] = datetime.today()
+        object.__setattr__(self, "_keys", _shape(tuple(values)))
+        object.__setattr__(self, "_values", tuple(values.values()))
+        if len(kwargs) == 0:
+            models.storage.new(self)
+
+    @property
+    def __class__(self):
+        """The model class this instance stands in for."""
+        return type(self)._model
+
+    @property
+    def __dict__(self):
+        """A new dictionary of the attributes of the instance."""
+        return dict(zip(self._keys, self._values))
+
+    def __getattr__(self, name):
+        """Return an instance attribute, or the model class attribute."""
+        if name in ("_keys", "_values"):
+            raise AttributeError(name)
+        i = _shapes[self._keys][1].get(name)
+        if i is not None:
+            return self._values[i]
+        model = type(self)._model
+        for klass in model.__mro__:
+            if name in klass.__dict__:
+                attr = klass.__dict__[name]
+                if hasattr(type(attr), "__get__"):
+                    return attr.__get__(self, model)
+                return attr
+        raise AttributeError("'{}' object has no attribute '{}'".format(
+            model.__name__, name))
+
+    def __setattr__(self, name, value):
+        """Set an attribute and flag the instance as changed in storage."""
+        if name in type(self)._sets:
+            value = id_set(value)
+        i = _shapes[self._keys][1].get(name)
+        if i is None:
+            object.__setattr__(self, "_values", self._values + (value,))
+            object.__setattr__(self, "_keys", _shape(self._keys + (name,)))
+            models.storage.mark(self, name)
+        else:
+            values = self._values
+            object.__setattr__(self, "_values",
+                               values[:i] + (value,) + values[i + 1:])
+            models.storage.mark(self, name, values[i])
+
+    def __getstate__(self):
+        """Return the attributes of the instance as a dictionary."""
+        return self.__dict__
+
+    def __setstate__(self, state):
+        """Replace the attributes of the instance with those of state."""
+        object.__setattr__(self, "_keys", _shape(tuple(state)))
+        object.__setattr__(self, "_values", tuple(state.values()))
+
+    save = BaseModel.save
+    to_dict = BaseModel.to_dict
+    __str__ = BaseModel.__str__
+
+
+def compact(cls):
+    """Return the compact variant of the model class cls."""
+    try:
+        return _variants[cls]
+    except KeyError:
+        doc = "Represent a {} without a __dict__.".format(cls.__name__)
+        sets = frozenset(name for name in dir(cls)
+                         if isinstance(getattr(cls, name), frozenset))
+        variant = type(cls.__name__, (CompactModel,), {
+            "__slots__": (), "__doc__": doc, "_model": cls, "_sets": sets,
+            "__module__": __name__, "__qualname__": cls.__name__})
+        _variants[cls] = variant
+        return variant
@@ -0,0 +1,407 @@
+#!/usr/bin/python3
+"""Defines the DBStorage class."""
+import json
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from models.base_model import classes
+from models.engine import indexes
+from models.engine.indexes import is_number, matches, operators
+
+
+def columns(cls):
+    """Return the {name: default} public class attributes of cls.
+
+    Methods and properties are left out.
+    """
+    attrs = {}
+    for klass in reversed(cls.__mro__):
+        for name, value in vars(klass).items():
+            if (not name.startswith("_") and not callable(value) and
+                    not isinstance(value, property)):
+                attrs[name] = value
+    return attrs
+
+
+class DBStorage:
+    """Represent a storage engine on top of a SQLite database.
+
+    Every model class has a table named after it, with an id primary
+    key, created_at and updated_at columns, a column per class attribute
+    and an _attrs column holding the JSON of any other attribute. List
+    and set attributes are stored as JSON text, and foreign key columns,
+    whose names end in _id, are indexed.
+
+    Objects are read from the database when they are looked up and kept
+    by key, so looking one up twice returns the same object. Changes are
+    written to the database before every lookup and committed by save().
+
+    Attributes:
+        __engine (sqlite3.Connection): The connection to the database.
+        __objects (dict): The objects looked up or created, by key.
+        __dirty (set): Objects changed since they were last written.
+        __deleted (set): Keys deleted since they were last written.
+        __transaction (bool): Whether a transaction is open.
+    """
+    __engine = None
+
+    def __init__(self, path="file.db"):
+        """Initialize a new DBStorage.
+
+        Args:
+            path (str): The name of the SQLite database file.
+        """
+        self.__engine = sqlite3.connect(path)
+        self.__objects = {}
+        self.__dirty = set()
+        self.__deleted = set()
+        self.__transaction = False
+
+    def all(self, cls=None):
+        """Return a dictionary of every stored object, or of those of cls.
+
+        Args:
+            cls (type or str): The class, or class name, to filter on.
+        """
+        self.__write()
+        if cls is None:
+            names = classes
+        else:
+            names = [cls if isinstance(cls, str) else cls.__name__]
+        objs = {}
+        for cls_name in names:
+            if cls_name not in classes:
+                continue
+            cur = self.__engine.execute(
+                'SELECT * FROM "{}"'.format(cls_name))
+            for row in cur:
+                obj = self.__row(cls_name, cur.description, row)
+                objs["{}.{}".format(cls_name, obj.id)] = obj
+        return objs
+
+    def count(self, cls=None):
+        """Return the number of stored objects, or of objects of cls.
+
+        Args:
+            cls (type or str): The class, or class name, to count.
+        """
+        self.__write()
+        if cls is None:
+            names = classes
+        else:
+            names = [cls if isinstance(cls, str) else cls.__name__]
+        return sum(self.__engine.execute(
+            'SELECT COUNT(*) FROM "{}"'.format(n)).fetchone()[0]
+            for n in names if n in classes)
+
+    def get(self, cls, id):
+        """Return the stored object of class cls with the given id.
+
+        Args:
+            cls (type or str): The class, or class name, of the object.
+            id (str): The id of the object.
+        Returns:
+            The object, or None if there is no such object.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        obj = self.__objects.get("{}.{}".format(cls, id))
+        if obj is not None or cls not in classes:
+            return obj
+        self.__write()
+        cur = self.__engine.execute(
+            'SELECT * FROM "{}" WHERE id = ?'.format(cls), (id,))
+        row = cur.fetchone()
+        return None if row is None else self.__row(cls, cur.description, row)
+
+    def related(self, cls, name, id):
+        """Return the objects of cls whose foreign key name is id.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            name (str): The name of the foreign key, such as "state_id".
+            id (str): The id the foreign key refers to.
+        Returns:
+            A dictionary of the objects, by key.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        if cls not in classes:
+            return {}
+        if name not in columns(classes[cls]):
+            return {key: obj for key, obj in self.all(cls).items()
+                    if getattr(obj, name, None) == id}
+        self.__write()
+        cur = self.__engine.execute(
+            'SELECT * FROM "{}" WHERE "{}" = ?'.format(cls, name), (id,))
+        objs = {}
+        for row in cur:
+            obj = self.__row(cls, cur.description, row)
+            objs["{}.{}".format(cls, obj.id)] = obj
+        return objs
+
+    def where(self, cls, *conditions):
+        """Return the objects of cls meeting every condition.
+
+        Conditions on columns, with a value of the type of the column,
+        are evaluated by the database. Unset columns compare as their
+        class default.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            *conditions (tuple): (name, op, value) conditions, where op
+                is "=", "<", "<=", ">" or ">=".
+        Returns:
+            A dictionary of the objects, by key.
+        Raises:
+            KeyError: If an operator is unknown.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        for name, op, value in conditions:
+            if op not in operators:
+                raise KeyError(op)
+        if cls not in classes:
+            return {}
+        self.__write()
+        defaults = columns(classes[cls])
+        terms = []
+        params = []
+        rest = []
+        for name, op, value in conditions:
+            default = defaults.get(name)
+            if (is_number(value) and is_number(default) or
+                    isinstance(value, str) and isinstance(default, str)):
+                terms.append('COALESCE("{}", ?) {} ?'.format(name, op))
+                params += [default, value]
+            else:
+                rest.append((name, op, value))
+        query = 'SELECT * FROM "{}"'.format(cls)
+        if terms:
+            query += " WHERE " + " AND ".join(terms)
+        cur = self.__engine.execute(query, params)
+        objs = {}
+        for row in cur:
+            obj = self.__row(cls, cur.description, row)
+            if matches(obj, rest):
+                objs["{}.{}".format(cls, obj.id)] = obj
+        return objs
+
+    def box(self, south, west, north, east):
+        """Return the places located in a bounding box, by key.
+
+        There is no spatial index, so every place is read; see
+        FileStorage.box() for the arguments.
+        """
+        return indexes.box(self.all("Place"), south, west, north, east)
+
+    def within(self, lat, lon, km):
+        """Return the places within km of a point, nearest first.
+
+        There is no spatial index, so every place is read.
+        """
+        return indexes.within(self.all("Place"), lat, lon, km)
+
+    def nearest(self, lat, lon, k=1):
+        """Return the k places nearest to a point, nearest first.
+
+        There is no spatial index, so every place is read.
+        """
+        return indexes.nearest(self.all("Place"), lat, lon, k)
+
+    def search(self, cls, terms, limit=None):
+        """Return the objects of cls matching the words of terms.
+
+        There is no text index, so the objects of cls are read and
+        indexed for every search; see FileStorage.search() for the
+        arguments.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        return indexes.search(self.all(cls), cls, terms, limit)
+
+    def having(self, all_of=(), any_of=(), none_of=()):
+        """Return the places with the given amenities, by key.
+
+        There is no amenity index, so every place is read; see
+        FileStorage.having() for the arguments.
+        """
+        return indexes.having(self.all("Place"), all_of, any_of, none_of)
+
+    def new(self, obj):
+        """Add obj to the objects to write, with key <class name>.id"""
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        self.__objects[key] = obj
+        self.__deleted.discard(key)
+        self.__dirty.add(obj)
+
+    def mark(self, obj, name=None, *old):
+        """Flag obj as changed so the next save writes it again.
+
+        Args:
+            obj (BaseModel): The object that was changed.
+            name (str): The name of the attribute that was set.
+            *old (any): The previous value of name, if it had one.
+        """
+        self.__dirty.add(obj)
+
+    def delete(self, obj):
+        """Delete obj from the database, if it is stored."""
+        key = "{}.{}".format(obj.__class__.__name__, obj.id)
+        self.__objects.pop(key, None)
+        self.__dirty.discard(obj)
+        self.__deleted.add(key)
+
+    def begin(self):
+        """Open a transaction: save() does not commit until commit()."""
+        self.__transaction = True
+
+    def commit(self):
+        """Close the open transaction and save its changes."""
+        self.__transaction = False
+        self.save()
+
+    def rollback(self):
+        """Close the open transaction and discard its changes.
+
+        Objects are read from the database again when next looked up.
+        """
+        self.__transaction = False
+        self.__engine.rollback()
+        self.__objects = {}
+        self.__dirty = set()
+        self.__deleted = set()
+
+    @contextmanager
+    def transaction(self):
+        """Run a block in a transaction, rolled back if the block fails."""
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def save(self):
+        """Write the changed objects and commit them to the database.
+
+        Inside a transaction nothing is committed until commit().
+        """
+        self.__write()
+        if not self.__transaction:
+            self.__engine.commit()
+
+    def flush(self):
+        """Write pending changes; save() already commits them, if any."""
+
+    def reload(self, *, progress=None):
+        """Create missing tables, columns and indexes; forget the objects.
+
+        Args:
+            progress (callable): Called once with the number of stored
+                objects.
+        """
+        for cls_name, cls in classes.items():
+            self.__engine.execute(
+                'CREATE TABLE IF NOT EXISTS "{}" (id TEXT PRIMARY KEY, '
+                'created_at TEXT, updated_at TEXT, _attrs TEXT)'.format(
+                    cls_name))
+            have = {r[1] for r in self.__engine.execute(
+                'PRAGMA table_info("{}")'.format(cls_name))}
+            for name, value in columns(cls).items():
+                if name not in have:
+                    self.__engine.execute(
+                        'ALTER TABLE "{}" ADD COLUMN "{}" {}'.format(
+                            cls_name, name, self.__type(value)))
+                if name.endswith("_id"):
+                    self.__engine.execute(
+                        'CREATE INDEX IF NOT EXISTS "{0}.{1}" ON "{0}" '
+                        '("{1}")'.format(cls_name, name))
+        self.__engine.commit()
+        self.__objects = {}
+        self.__dirty = set()
+        self.__deleted = set()
+        if progress is not None:
+            progress(self.count())
+
+    @staticmethod
+    def __type(value):
+        """Return the SQLite column type of the class attribute value."""
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return "TEXT"
+        return "INTEGER" if isinstance(value, int) else "REAL"
+
+    def __row(self, cls_name, description, row):
+        """Return the object of the row of table cls_name.
+
+        Args:
+            cls_name (str): The name of the table the row is from.
+            description (tuple): The column descriptions of the query.
+            row (tuple): The values of the row.
+        """
+        key = "{}.{}".format(cls_name, row[0])
+        obj = self.__objects.get(key)
+        if obj is not None:
+            return obj
+        cls = classes[cls_name]
+        defaults = columns(cls)
+        attrs = {}
+        for (name, *_), value in zip(description, row):
+            if value is None:
+                continue
+            if name == "_attrs":
+                attrs.update(json.loads(value))
+            elif isinstance(defaults.get(name), (list, frozenset)):
+                attrs[name] = json.loads(value)
+            else:
+                attrs[name] = value
+        obj = cls(**attrs)
+        self.__dirty.discard(obj)
+        self.__objects[key] = obj
+        return obj
+
+    def __write(self):
+        """Upsert the changed objects and delete the deleted rows."""
+        for key in self.__deleted:
+            cls_name, _, id = key.partition(".")
+            if cls_name in classes:
+                self.__engine.execute(
+                    'DELETE FROM "{}" WHERE id = ?'.format(cls_name), (id,))
+        self.__deleted = set()
+        dirty, self.__dirty = self.__dirty, set()
+        for obj in dirty:
+            cls_name = obj.__class__.__name__
+            key = "{}.{}".format(cls_name, obj.id)
+            if self.__objects.get(key) is not obj:
+                continue
+            self.__upsert(cls_name, obj.__dict__)
+
+    def __upsert(self, cls_name, odict):
+        """Insert or update the row of the attributes odict."""
+        defaults = columns(classes[cls_name])
+        row = {}
+        extra = {}
+        for name, value in odict.items():
+            if isinstance(value, datetime):
+                value = value.isoformat()
+            elif isinstance(value, (set, frozenset)):
+                value = sorted(value)
+            if name in ("id", "created_at", "updated_at"):
+                row[name] = value
+            elif isinstance(defaults.get(name), (list, frozenset)):
+                row[name] = json.dumps(value)
+            elif (name in defaults and not isinstance(value, bool) and
+                    isinstance(value, (str, int, float))):
+                row[name] = value
+            else:
+                extra[name] = value
+        for name in defaults:
+            row.setdefault(name, None)
+        row["_attrs"] = json.dumps(extra) if extra else None
+        names = ", ".join('"{}"'.format(n) for n in row)
+        sets = ", ".join('"{0}" = excluded."{0}"'.format(n) for n in row)
+        self.__engine.execute(
+            'INSERT INTO "{}" ({}) VALUES ({}) ON CONFLICT(id) DO UPDATE '
+            'SET {}'.format(cls_name, names, ", ".join("?" * len(row)), sets),
+            list(row.values()))
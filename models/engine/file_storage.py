@@ -1,13 +1,165 @@
 #!/usr/bin/python3
 """Defines the FileStorage class."""
+import os
 import json
-from models.base_model import BaseModel
-from models.user import User
-from models.state import State
-from models.city import City
-from models.place import Place
-from models.amenity import Amenity
-from models.review import Review
+import zlib
+import struct
+import atexit
+import tempfile
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from datetime import datetime
+from models.base_model import classes
+from models.compact import compact
+from models.engine import formats
+from models.engine.formats import iterload, isoformat, KeyIndex
+from models.engine.indexes import AmenityIndex, ForeignKeyIndex, GridIndex
+from models.engine.indexes import RangeIndex
+from models.engine.indexes import TextIndex, matches, operators, text_fields
+from models.engine.interning import intern_record
+
+
+def _umask():
+    """Return the umask of the process, without changing it."""
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
+
+
+# Read once at import, as reading it briefly changes it for every thread.
+UMASK = _umask()
+
+
+def sync_dir(path):
+    """Sync the directory holding path, so a rename in it is durable."""
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_open(path, mode="w"):
+    """Open a temporary file that atomically replaces path once closed.
+
+    The data is synced to disk before the rename, and the file it
+    replaces is kept as <path>.bak, so path always holds either the old
+    or the new content in full. Nothing is replaced if writing fails.
+    The new file keeps the permissions of the one it replaces, or gets
+    those of a file created with open() if path does not exist yet.
+
+    Args:
+        path (str): The name of the file to replace.
+        mode (str): "w" for text or "wb" for binary.
+    """
+    dirname = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".",
+                               suffix=".tmp", dir=dirname)
+    try:
+        try:
+            perms = os.stat(path).st_mode & 0o7777
+        except FileNotFoundError:
+            perms = 0o666 & ~UMASK
+        os.fchmod(fd, perms)
+        with os.fdopen(fd, mode) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            os.remove(path + ".bak")
+        except FileNotFoundError:
+            pass
+        try:
+            os.link(path, path + ".bak")
+        except OSError:
+            pass
+        os.replace(tmp, path)
+        sync_dir(path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def decode(path):
+    """Return the records of the file path, or of <path>.bak if corrupt.
+
+    Parallel reloads run this in worker processes. Datetimes are parsed
+    and records are returned in a compact form that is cheap to send to
+    the parent process: a list of attribute name tuples, and a list of
+    (key, index of the names in that list, values) tuples.
+    """
+    def read(path):
+        with formats.reader(path) as f:
+            return list(formats.detect(f).load(f))
+
+    try:
+        records = read(path)
+    except ValueError as error:
+        try:
+            records = read(path + ".bak")
+        except FileNotFoundError:
+            raise error
+    shapes = {}
+    rows = []
+    for key, rec in records:
+        for k in ("created_at", "updated_at"):
+            if isinstance(rec.get(k), str):
+                try:
+                    rec[k] = datetime.fromisoformat(rec[k])
+                except ValueError:
+                    pass
+        shape = tuple(rec)
+        rows.append((key, shapes.setdefault(shape, len(shapes)),
+                     tuple(rec.values())))
+    return list(shapes), rows
+
+
+def decode_all(paths, workers):
+    """Yield the decode() result of every file of paths, in order.
+
+    The files are shared out among workers forked processes, which send
+    their results back through pipes. Unlike a process pool, nothing is
+    pickled by reference, which would wait for the import of the models
+    package to finish and so deadlock the reload it runs at import.
+
+    Raises:
+        ValueError: If a file is corrupt and its .bak is missing or
+            corrupt too.
+    """
+    ctx = multiprocessing.get_context("fork")
+    conns, procs = [], []
+    try:
+        for i in range(workers):
+            conn, child = ctx.Pipe(duplex=False)
+            conns.append(conn)
+            procs.append(ctx.Process(target=_decode_to, daemon=True,
+                                     args=(paths[i::workers], child)))
+            procs[-1].start()
+            child.close()
+        for i in range(len(paths)):
+            result = conns[i % workers].recv()
+            if isinstance(result, Exception):
+                raise result
+            yield result
+    finally:
+        for conn in conns:
+            conn.close()
+        for proc in procs:
+            proc.terminate()
+            proc.join()
+
+
+def _decode_to(paths, conn):
+    """Send the decode() result, or error, of every file of paths to conn."""
+    for path in paths:
+        try:
+            result = decode(path)
+        except Exception as e:
+            result = e
+        conn.send(result)
+    conn.close()
 
 
 class FileStorage:
@@ -16,34 +168,1223 @@ class FileStorage:
     Attributes:
         __file_path (str): The name of the file to save objects to.
         __objects (dict): A dictionary of instantiated objects.
+        __journal (int): The number of journal records allowed before the
+            journal is compacted into __file_path, or 0 when disabled.
+        __logged (int): The number of records currently in the journal.
+        __dirty (set): Objects changed since they were last serialized.
+        __deleted (set): Keys deleted since the last save.
+        __cache (dict): The last serialized "<key>": <json> fragment of
+            each saved key, paired with the object it was built from.
+        __classes (dict): The objects of __objects grouped by class name.
+        __refs (ForeignKeyIndex): The objects of __objects by foreign key.
+        __ranges (RangeIndex): The Place objects of __objects sorted by
+            price_by_night, max_guest, number_rooms and number_bathrooms.
+        __grid (GridIndex): The Place objects of __objects by location.
+        __amenities (AmenityIndex): The Place objects of __objects by
+            their amenity_ids.
+        __text (TextIndex): The objects of __objects by the words of their
+            text attributes, for the classes of text_fields.
+        __indexes (tuple): Every index kept over __objects.
+        __indexed (tuple): The __objects dictionary and its size when
+            __classes and __indexes were last brought up to date.
+        __lazy (bool): Whether reload defers building objects.
+        __raw (dict): The records of objects not built yet, as
+            {class name: {key: record}}.
+        __compact (bool): Whether reload builds compact model variants.
+        __undo (list): The changes made in the open transaction, in
+            order, or None outside of transactions.
+        __interval (float): The seconds a requested save may be delayed
+            by in write-behind mode, or 0 when disabled.
+        __unsaved (bool): Whether a requested save was not written yet.
+        __timer (threading.Timer): The pending write-behind flush.
+        __lock (threading.RLock): Serializes writes to __file_path.
+        __format (type): The format of __file_path snapshots, from
+            models.engine.formats.
+        __shards (int): The number of files each class is split into in
+            the <__file_path>.d directory, or 0 to use __file_path.
+        __loaded (set): The names of the classes reloaded from shards,
+            or None when every class was.
+        __resharded (bool): Whether the shard files do not match the
+            current layout, so that the next save rewrites all of them.
+        __workers (int): The number of processes shard files are
+            decoded in on reload.
+        __indexing (bool): Whether JSON snapshots are saved with a key
+            index in <__file_path>.idx.
+        __deferred (KeyIndex): The key index of the objects of
+            __file_path not loaded yet, or None once all are.
+        __dropped (set): The keys of __deferred deleted by the journal.
+        __stamp (struct.Struct): The layout of the size and modification
+            time of __file_path recorded in its key index.
+        __codec (str): The name of the codec snapshots are compressed
+            with, from models.engine.formats, or None.
+        __level (int): The compression level, or None for the default.
+        __texting (bool): Whether snapshots are saved with their text
+            index in <__file_path>.fts.
+        __text_version (int): The version of the layout of the text
+            index file. An index saved with another version is rebuilt.
     """
     __file_path = "file.json"
     __objects = {}
+    __journal = 0
+    __logged = 0
+    __dirty = set()
+    __deleted = set()
+    __cache = {}
+    __classes = {}
+    __refs = ForeignKeyIndex()
+    __ranges = RangeIndex("Place", ("price_by_night", "max_guest",
+                                    "number_rooms", "number_bathrooms"))
+    __grid = GridIndex("Place")
+    __text = TextIndex(text_fields)
+    __amenities = AmenityIndex("Place")
+    __indexes = (__refs, __ranges, __grid, __text, __amenities)
+    __indexed = (None, 0)
+    __lazy = False
+    __raw = {}
+    __compact = False
+    __undo = None
+    __interval = 0
+    __unsaved = False
+    __timer = None
+    __lock = threading.RLock()
+    __format = formats.JSONFormat
+    __shards = 0
+    __loaded = None
+    __resharded = True
+    __workers = 1
+    __indexing = False
+    __deferred = None
+    __dropped = set()
+    __stamp = struct.Struct("<QQ")
+    __codec = None
+    __level = None
+    __texting = False
+    __text_version = 1
+
+    def all(self, cls=None):
+        """Return the dictionary __objects, or only the objects of cls.
+
+        Args:
+            cls (type or str): The class, or class name, to filter on.
+        """
+        self.__undefer()
+        if cls is None:
+            for cls_name in list(FileStorage.__raw):
+                self.__materialize(cls_name)
+            return FileStorage.__objects
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        self.__materialize(cls)
+        return self.__index().get(cls, {})
+
+    def related(self, cls, name, id):
+        """Return the objects of cls whose foreign key name is id.
+
+        Objects are looked up in a reverse index of every attribute whose
+        name ends in _id, kept up to date as objects are stored, changed
+        and deleted.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            name (str): The name of the foreign key, such as "state_id".
+            id (str): The id the foreign key refers to.
+        Returns:
+            A dictionary of the objects, by key.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        self.__undefer()
+        self.__materialize(cls)
+        self.__index()
+        return FileStorage.__refs.get(cls, name, id)
+
+    def where(self, cls, *conditions):
+        """Return the objects of cls meeting every condition.
+
+        Number conditions on indexed attributes are answered from sorted
+        indexes: the objects in the narrowest indexed range are checked
+        against the other conditions, and the rest are not looked at.
+        Without such a condition, every object of cls is checked.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            *conditions (tuple): (name, op, value) conditions, where op
+                is "=", "<", "<=", ">" or ">=".
+        Returns:
+            A dictionary of the objects, by key.
+        Raises:
+            KeyError: If an operator is unknown.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        for name, op, value in conditions:
+            if op not in operators:
+                raise KeyError(op)
+        self.__undefer()
+        self.__materialize(cls)
+        objs = self.__index().get(cls, {})
+        best = None
+        for cond in conditions:
+            spans = FileStorage.__ranges.select(cls, *cond)
+            if spans is None:
+                continue
+            size = sum(len(keys) for keys in spans)
+            if best is None or size < best[0]:
+                best = (size, spans, cond)
+        if best is not None:
+            size, spans, cond = best
+            objs = {}
+            for keys in spans:
+                objs.update(keys)
+            conditions = [c for c in conditions if c is not cond]
+        return {key: obj for key, obj in objs.items()
+                if matches(obj, conditions)}
+
+    def count(self, cls=None):
+        """Return the number of stored objects, or of objects of cls.
+
+        Args:
+            cls (type or str): The class, or class name, to count.
+        """
+        self.__undefer()
+        if cls is None:
+            return len(FileStorage.__objects) + sum(
+                len(records) for records in FileStorage.__raw.values())
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        return (len(self.__index().get(cls, {})) +
+                len(FileStorage.__raw.get(cls, {})))
+
+    def get(self, cls, id):
+        """Return the stored object of class cls with the given id.
+
+        Args:
+            cls (type or str): The class, or class name, of the object.
+            id (str): The id of the object.
+        Returns:
+            The object, or None if there is no such object.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        key = "{}.{}".format(cls, id)
+        if (FileStorage.__deferred is not None and
+                key not in FileStorage.__objects and
+                key not in FileStorage.__deleted and
+                key not in FileStorage.__dropped):
+            self.__fetch(key)
+        if key in FileStorage.__raw.get(cls, {}):
+            self.__materialize(cls, key)
+        return FileStorage.__objects.get(key)
+
+    def box(self, south, west, north, east):
+        """Return the places located in a bounding box, by key.
 
-    def all(self):
-        """Return the dictionary __objects."""
-        return FileStorage.__objects
+        Places are looked up in a grid index of their latitude and
+        longitude; those that do not set both are left out.
+
+        Args:
+            south (float): The latitude of the south edge.
+            west (float): The longitude of the west edge. A box whose
+                west edge is east of its east edge crosses the
+                antimeridian.
+            north (float): The latitude of the north edge.
+            east (float): The longitude of the east edge.
+        Raises:
+            ValueError: If an edge is out of range.
+        """
+        return self.__located().box(south, west, north, east)
+
+    def within(self, lat, lon, km):
+        """Return the places within km of a point, nearest first.
+
+        Args:
+            lat (float): The latitude of the point.
+            lon (float): The longitude of the point.
+            km (float): The distance, in kilometers.
+        Raises:
+            ValueError: If the point is out of range or km is negative.
+        """
+        return self.__located().within(lat, lon, km)
+
+    def nearest(self, lat, lon, k=1):
+        """Return the k places nearest to a point, nearest first.
+
+        Args:
+            lat (float): The latitude of the point.
+            lon (float): The longitude of the point.
+            k (int): The number of places.
+        Raises:
+            ValueError: If the point is out of range or k is not positive.
+        """
+        return self.__located().nearest(lat, lon, k)
+
+    def search(self, cls, terms, limit=None):
+        """Return the objects of cls matching the words of terms.
+
+        The words of Place name and description and of Review text are
+        kept in an inverted index, and objects are ranked by BM25.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            terms (str): The words to look for.
+            limit (int): The number of objects to return, or None for all.
+        Returns:
+            A dictionary of the objects, by key, best match first.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        self.__undefer()
+        self.__materialize(cls)
+        self.__index()
+        objs = FileStorage.__objects
+        return {key: objs[key] for key, score in
+                FileStorage.__text.search(cls, terms, limit)}
+
+    def having(self, all_of=(), any_of=(), none_of=()):
+        """Return the places with the given amenities, by key.
+
+        Every place has a bit in a bitmap per amenity, so the filters
+        are bitwise operations over every place.
+
+        Args:
+            all_of (iterable): Amenity ids a place must all have.
+            any_of (iterable): Amenity ids a place must have one of,
+                unless empty.
+            none_of (iterable): Amenity ids a place must not have.
+        """
+        self.__undefer()
+        self.__materialize("Place")
+        self.__index()
+        objs = FileStorage.__objects
+        return {key: objs[key] for key in
+                FileStorage.__amenities.select(all_of, any_of, none_of)}
+
+    def __located(self):
+        """Return __grid, with every place loaded into it."""
+        self.__undefer()
+        self.__materialize("Place")
+        self.__index()
+        return FileStorage.__grid
 
     def new(self, obj):
         """Set in __objects obj with key <obj_class_name>.id"""
         ocname = obj.__class__.__name__
-        FileStorage.__objects["{}.{}".format(ocname, obj.id)] = obj
+        key = "{}.{}".format(ocname, obj.id)
+        with FileStorage.__lock:
+            if FileStorage.__undo is not None:
+                prev = FileStorage.__objects.get(key)
+                FileStorage.__undo.append(("new", (key, obj), prev))
+            self.__index().setdefault(ocname, {})[key] = obj
+            prev = FileStorage.__objects.get(key)
+            for index in FileStorage.__indexes:
+                if prev is not None:
+                    index.remove(key, prev)
+                index.add(key, obj)
+            FileStorage.__objects[key] = obj
+            FileStorage.__raw.get(ocname, {}).pop(key, None)
+            FileStorage.__indexed = (FileStorage.__objects,
+                                     len(FileStorage.__objects))
+            FileStorage.__deleted.discard(key)
+            FileStorage.__dirty.add(obj)
+
+    def mark(self, obj, name=None, *old):
+        """Flag obj as changed so the next save serializes it again.
+
+        Attribute writes mark objects automatically; changes made to a
+        mutable attribute value in place must be followed by mark(obj),
+        and are not undone by rollback().
+
+        Args:
+            obj (BaseModel): The object that was changed.
+            name (str): The name of the attribute that was set.
+            *old (any): The previous value of name, if it had one.
+        """
+        with FileStorage.__lock:
+            FileStorage.__dirty.add(obj)
+            if name is None:
+                return
+            indexes = [i for i in FileStorage.__indexes if i.covers(name)]
+            if indexes:
+                key = "{}.{}".format(obj.__class__.__name__, obj.id)
+                if FileStorage.__objects.get(key) is obj:
+                    self.__index()
+                    for index in indexes:
+                        index.change(key, obj, name, *old)
+            if FileStorage.__undo is not None:
+                FileStorage.__undo.append(("set", obj, (name,) + old))
+
+    def delete(self, obj):
+        """Delete obj from __objects, if it is stored."""
+        ocname = obj.__class__.__name__
+        key = "{}.{}".format(ocname, obj.id)
+        with FileStorage.__lock:
+            self.__index().get(ocname, {}).pop(key, None)
+            prev = FileStorage.__objects.pop(key, None)
+            if prev is not None:
+                for index in FileStorage.__indexes:
+                    index.remove(key, prev)
+                FileStorage.__deleted.add(key)
+                if FileStorage.__undo is not None:
+                    FileStorage.__undo.append(("del", key, obj))
+            FileStorage.__indexed = (FileStorage.__objects,
+                                     len(FileStorage.__objects))
+
+    def lazy(self, enabled=True):
+        """Defer building objects until they are first looked up.
+
+        A lazy reload only keeps the record of every object; all(), get()
+        and saving objects that were never looked up do not build them.
+
+        Args:
+            enabled (bool): Whether reload is lazy.
+        """
+        FileStorage.__lazy = enabled
+
+    def compact(self, enabled=True):
+        """Build reloaded objects as compact variants of their class.
+
+        Compact objects have no per-instance __dict__; see models.compact.
+
+        Args:
+            enabled (bool): Whether reload builds compact objects.
+        """
+        FileStorage.__compact = enabled
+
+    def file_format(self, name):
+        """Select the format snapshots are saved in.
+
+        Reload detects the format of the file it reads by itself.
+
+        Args:
+            name (str): The name of a format of models.engine.formats.
+        Raises:
+            KeyError: If there is no format called name.
+        """
+        FileStorage.__format = formats.formats[name]
+
+    def shards(self, count=1):
+        """Save each class to its own files instead of __file_path.
+
+        Objects are spread over count files per class by a hash of their
+        id, in the <__file_path>.d directory, and a save only rewrites the
+        files holding changed or deleted objects. The journal is not
+        used. Existing data is moved to the new layout on the next save.
+
+        Args:
+            count (int): The number of files per class. 0 disables it.
+        """
+        if count != FileStorage.__shards:
+            FileStorage.__resharded = True
+        FileStorage.__shards = count
+
+    def workers(self, count=None):
+        """Decode shard files in forked worker processes on reload.
+
+        Workers parse the shard files, and objects are built from their
+        records in this process as the files are decoded. Only sharded
+        stores are reloaded in parallel, and only where processes can be
+        forked.
+
+        Args:
+            count (int): The number of processes, or None for one per
+                CPU. 1 reloads in this process only.
+        """
+        FileStorage.__workers = count or os.cpu_count() or 1
+
+    def compression(self, name=None, level=None):
+        """Compress snapshots, and shards, with a codec.
+
+        Reload detects compressed files by themselves. Key indexes are
+        not saved for compressed snapshots, and the journal is not
+        compressed.
+
+        Args:
+            name (str): The name of a codec of models.engine.formats,
+                "gzip", "zlib" or "lzma", or None to disable compression.
+            level (int): The compression level, or None for the default.
+        Raises:
+            KeyError: If there is no codec called name.
+            ValueError: If the codec does not accept level.
+        """
+        if name is not None and name not in formats.codecs:
+            raise KeyError(name)
+        if (name is not None and level is not None and
+                level not in formats.codecs[name].levels):
+            raise ValueError("invalid {} compression level: {}".format(
+                name, level))
+        FileStorage.__codec = name
+        FileStorage.__level = level
+
+    def key_index(self, enabled=True):
+        """Save a key index next to JSON snapshots and use it on reload.
+
+        The index, <__file_path>.idx, maps each key to the position of
+        its object in __file_path. While it matches __file_path, reload
+        only reads the index, and get() reads single objects from the
+        file; the rest of the file is loaded by the first call that needs
+        every object, such as all(), count() or a snapshot. Changes made
+        in journal mode are appended without loading the rest.
+
+        Args:
+            enabled (bool): Whether snapshots are indexed.
+        """
+        FileStorage.__indexing = enabled
+
+    def text_index(self, enabled=True):
+        """Save the text index next to snapshots and use it on reload.
+
+        The index, <__file_path>.fts, holds the words of every object of
+        the snapshot as JSON, after the stamp of the snapshot. While it
+        matches __file_path, reload restores it instead of indexing the
+        words of every object it loads. Lazy reloads and shards do not
+        use it.
+
+        Args:
+            enabled (bool): Whether the text index is saved.
+        """
+        FileStorage.__texting = enabled
+
+    def journal(self, limit=1000):
+        """Record changes in an append-only journal instead of rewriting.
+
+        Args:
+            limit (int): The number of journal records allowed before the
+                journal is folded back into __file_path. 0 disables it.
+        """
+        FileStorage.__journal = limit
+
+    def begin(self):
+        """Open a transaction, if none is open.
+
+        Until the transaction is committed or rolled back, save() does
+        not write anything.
+        """
+        if FileStorage.__undo is None:
+            FileStorage.__undo = []
+
+    def commit(self):
+        """Close the open transaction and save its changes."""
+        FileStorage.__undo = None
+        self.save()
+
+    def rollback(self):
+        """Close the open transaction and undo its changes in memory.
+
+        Objects created in the transaction are removed, and keep the
+        attributes they were given.
+        """
+        undo = FileStorage.__undo or []
+        FileStorage.__undo = None
+        existing, created = set(), set()
+        for change, key, obj in undo:
+            if change == "new":
+                existing.add(id(obj))
+                if id(key[1]) not in existing:
+                    created.add(id(key[1]))
+            elif change == "del":
+                existing.add(id(obj))
+        for change, key, obj in reversed(undo):
+            if change == "new":
+                key = key[0]
+                current = FileStorage.__objects.get(key)
+                if current is not None:
+                    self.delete(current)
+                    FileStorage.__dirty.discard(current)
+                if obj is not None:
+                    self.new(obj)
+            elif change == "del":
+                self.new(obj)
+            else:
+                obj, (name, *old) = key, obj
+                if id(obj) in created:
+                    continue
+                key = "{}.{}".format(obj.__class__.__name__, obj.id)
+                stored = FileStorage.__objects.get(key) is obj
+                if stored:
+                    self.__index()
+                    for index in FileStorage.__indexes:
+                        index.remove(key, obj)
+                state = dict(obj.__dict__)
+                if old:
+                    state[name] = old[0]
+                else:
+                    state.pop(name, None)
+                if hasattr(obj, "__setstate__"):
+                    obj.__setstate__(state)
+                else:
+                    obj.__dict__.clear()
+                    obj.__dict__.update(state)
+                if stored:
+                    for index in FileStorage.__indexes:
+                        index.add(key, obj)
+                    FileStorage.__dirty.add(obj)
+
+    @contextmanager
+    def transaction(self):
+        """Run a block in a transaction, rolled back if the block fails."""
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def write_behind(self, interval=1.0):
+        """Delay and coalesce the writes requested by save().
+
+        A background thread writes at most once per interval, and
+        pending changes are written at exit.
+
+        Args:
+            interval (float): The seconds a save may be delayed by.
+                0 makes save() write immediately again.
+        """
+        if interval and not FileStorage.__interval:
+            atexit.register(self.flush)
+        elif not interval and FileStorage.__interval:
+            atexit.unregister(self.flush)
+            self.flush()
+        FileStorage.__interval = interval
 
     def save(self):
-        """Serialize __objects to the JSON file __file_path."""
+        """Serialize __objects to the JSON file __file_path.
+
+        Inside a transaction nothing is written until it is committed,
+        and in write-behind mode the write is left to a background flush.
+        """
+        if FileStorage.__undo is not None:
+            return
+        FileStorage.__unsaved = True
+        if not FileStorage.__interval:
+            self.flush()
+        elif FileStorage.__timer is None:
+            timer = threading.Timer(FileStorage.__interval, self.flush)
+            timer.daemon = True
+            FileStorage.__timer = timer
+            timer.start()
+
+    def flush(self):
+        """Write the changes of the last save(), if they are not written.
+
+        In journal mode only the changes are appended to the journal,
+        until it grows past its limit and is compacted. If writing fails,
+        the changes stay unsaved and the next flush writes them.
+        """
+        with FileStorage.__lock:
+            timer, FileStorage.__timer = FileStorage.__timer, None
+            if timer is not None and timer is not threading.current_thread():
+                timer.cancel()
+            if not FileStorage.__unsaved:
+                return
+            FileStorage.__unsaved = False
+            try:
+                if FileStorage.__shards:
+                    self.__undefer()
+                    self.__write_shards()
+                elif (FileStorage.__journal and
+                        os.path.exists(FileStorage.__file_path) and
+                        FileStorage.__logged + len(FileStorage.__dirty) +
+                        len(FileStorage.__deleted) <= FileStorage.__journal):
+                    self.__append()
+                else:
+                    self.__undefer()
+                    self.__snapshot()
+            except BaseException:
+                FileStorage.__unsaved = True
+                raise
+
+    def reload(self, *, progress=None, classes=None):
+        """Deserialize the JSON file __file_path to __objects, if it exists.
+
+        Objects are built as the file is parsed instead of after parsing
+        all of it. If the file is corrupt, the previous snapshot kept in
+        <__file_path>.bak is loaded instead. Changes recorded in the
+        journal are replayed on top. A missing file is an empty store,
+        but a corrupt one without a usable backup is an error, so that
+        the next save does not replace it.
+
+        With shards enabled, the shard files are loaded instead, once
+        they exist. Shards of classes left out of classes are only
+        loaded when an object of their class is saved.
+
+        Args:
+            progress (callable): Called with the number of objects loaded
+                so far after every 10000 objects and once at the end.
+            classes (list): The names of the classes to load from shards,
+                or None to load every class.
+        Raises:
+            ValueError: If a file is corrupt and its .bak is missing or
+                corrupt too.
+        """
+        shards = FileStorage.__file_path + ".d"
+        FileStorage.__deferred = None
+        if FileStorage.__shards and os.path.isdir(shards):
+            FileStorage.__resharded = any(
+                not self.__is_shard(name) for name in os.listdir(shards)
+                if name.endswith(".json"))
+            keys = self.__read_shards(classes, progress)
+            FileStorage.__loaded = None if classes is None else set(classes)
+        else:
+            FileStorage.__resharded = True
+            FileStorage.__loaded = None
+            FileStorage.__deferred = self.__read_index()
+            FileStorage.__dropped = set()
+            keys = []
+            if FileStorage.__deferred is None:
+                try:
+                    keys = self.__read_snapshot(progress)
+                except FileNotFoundError:
+                    pass
+            self.__replay()
+        if progress is not None:
+            progress(len(keys))
+        FileStorage.__dirty = set()
+        FileStorage.__deleted = set()
+
+    def __read_index(self):
+        """Return the key index of __file_path, if it can be used.
+
+        Returns:
+            The KeyIndex, or None if indexing is disabled or the index
+            is missing or out of date.
+        """
+        path = FileStorage.__file_path
+        if not FileStorage.__indexing or FileStorage.__shards:
+            return None
+        try:
+            with open(path + ".idx", "rb") as f:
+                data = f.read()
+            stamp = FileStorage.__stamp.unpack_from(data)
+            if stamp != self.__stamp_of(os.stat(path)):
+                return None
+            return KeyIndex(data, FileStorage.__stamp.size)
+        except (OSError, ValueError, struct.error):
+            return None
+
+    @staticmethod
+    def __stamp_of(st):
+        """Return the (size, modification time) of the os.stat_result st."""
+        return st.st_size, st.st_mtime_ns
+
+    def __fetch(self, key):
+        """Load the object of key from __file_path, using the key index.
+
+        Every object is loaded instead if the file changed since it was
+        indexed.
+        """
+        index = FileStorage.__deferred
+        i = index.find(key.encode())
+        if i is None:
+            return
+        offset, length = index[i]
+        with open(FileStorage.__file_path, "rb") as f:
+            stamp = FileStorage.__stamp.unpack_from(index.buf)
+            if stamp != self.__stamp_of(os.fstat(f.fileno())):
+                self.__undefer()
+                return
+            f.seek(offset)
+            o = json.loads(f.read(length))
+        undo, FileStorage.__undo = FileStorage.__undo, None
+        self.__load(key, o)
+        FileStorage.__undo = undo
+        FileStorage.__dirty.discard(FileStorage.__objects.get(key))
+
+    def __undefer(self):
+        """Load the objects of __file_path that were not loaded yet.
+
+        Objects already loaded, replaced or deleted are left as they are.
+        """
+        if FileStorage.__deferred is None:
+            return
+        FileStorage.__deferred = None
+        odict = FileStorage.__objects
+        skip = FileStorage.__deleted | FileStorage.__dropped
+        raw = FileStorage.__raw
+        undo, FileStorage.__undo = FileStorage.__undo, None
+        keys = []
+        with formats.reader(FileStorage.__file_path) as f:
+            for key, o in formats.detect(f).load(f):
+                if (key not in odict and key not in skip and
+                        key not in raw.get(key.partition(".")[0], {})):
+                    self.__load(key, o)
+                    keys.append(key)
+        FileStorage.__undo = undo
+        FileStorage.__dropped = set()
+        FileStorage.__dirty.difference_update(
+            odict[key] for key in keys if key in odict)
+
+    def __read_snapshot(self, progress=None):
+        """Load __file_path, or its .bak if corrupt, and its text index.
+
+        A saved text index matching __file_path is restored instead of
+        indexing the words of every object loaded from it.
+
+        Returns:
+            The keys of the objects loaded.
+        """
+        saved = self.__read_text()
+        if saved is None:
+            return self.__read_safe(FileStorage.__file_path, progress)
+        text = FileStorage.__text
+        indexes = FileStorage.__indexes
+        FileStorage.__indexes = tuple(i for i in indexes if i is not text)
+        try:
+            try:
+                keys = self.__read(FileStorage.__file_path, progress)
+            except ValueError as error:
+                saved = None
+                keys = self.__read_backup(FileStorage.__file_path, error,
+                                          progress)
+        finally:
+            FileStorage.__indexes = indexes
+            if saved is None:
+                text.clear()
+            else:
+                text.restore(saved)
+            for key, obj in FileStorage.__objects.items():
+                text.add(key, obj)
+        return keys
+
+    def __read_text(self):
+        """Return the saved text index of __file_path, if it can be used.
+
+        Returns:
+            The state of the TextIndex, or None if saving it is disabled,
+            the reload is lazy, or it is missing, out of date or saved
+            with another version.
+        """
+        path = FileStorage.__file_path
+        if not FileStorage.__texting or FileStorage.__lazy:
+            return None
+        try:
+            with open(path + ".fts", "rb") as f:
+                data = f.read()
+            stamp = FileStorage.__stamp.unpack_from(data)
+            if stamp != self.__stamp_of(os.stat(path)):
+                return None
+            saved = json.loads(data[FileStorage.__stamp.size:])
+        except (OSError, ValueError, struct.error):
+            return None
+        if (not isinstance(saved, dict) or
+                saved.get("version") != FileStorage.__text_version):
+            return None
+        state = saved.get("postings"), saved.get("lengths")
+        if not all(isinstance(part, dict) for part in state):
+            return None
+        return state
+
+    def __read_safe(self, path, progress=None):
+        """Load the file path, or <path>.bak if path is corrupt.
+
+        Returns:
+            The keys of the objects loaded.
+        Raises:
+            ValueError: If path is corrupt and <path>.bak is missing or
+                corrupt too.
+        """
+        try:
+            return self.__read(path, progress)
+        except ValueError as error:
+            return self.__read_backup(path, error, progress)
+
+    def __read_backup(self, path, error, progress=None):
+        """Load <path>.bak, as path could not be read because of error.
+
+        Returns:
+            The keys of the objects loaded.
+        Raises:
+            ValueError: error, if <path>.bak is missing.
+        """
+        try:
+            return self.__read(path + ".bak", progress)
+        except FileNotFoundError:
+            raise error
+
+    def __read_shards(self, classes=None, progress=None):
+        """Load the shard files of classes, or of every class if None.
+
+        Returns:
+            The keys of the objects loaded.
+        """
+        shards = FileStorage.__file_path + ".d"
+        paths = [os.path.join(shards, name)
+                 for name in sorted(os.listdir(shards))
+                 if name.endswith(".json") and
+                 (classes is None or name.split(".")[0] in classes)]
+        keys = []
+        if (FileStorage.__workers > 1 and len(paths) > 1 and
+                "fork" in multiprocessing.get_all_start_methods()):
+            workers = min(FileStorage.__workers, len(paths))
+            for shapes, rows in decode_all(paths, workers):
+                for key, i, values in rows:
+                    self.__load(key, dict(zip(shapes[i], values)))
+                    keys.append(key)
+                if progress is not None:
+                    progress(len(keys))
+            return keys
+
+        def report(count):
+            progress(len(keys) + count)
+
+        for path in paths:
+            keys += self.__read_safe(path, progress and report)
+        return keys
+
+    def __read(self, path, progress=None):
+        """Load every object of the JSON file path.
+
+        Objects loaded before a decoding error are removed again.
+
+        Returns:
+            The keys of the objects loaded.
+        """
+        keys = []
+        try:
+            with formats.reader(path) as f:
+                for key, o in formats.detect(f).load(f):
+                    self.__load(key, o)
+                    keys.append(key)
+                    if progress is not None and len(keys) % 10000 == 0:
+                        progress(len(keys))
+        except ValueError:
+            for key in keys:
+                obj = FileStorage.__objects.get(key)
+                if obj is not None:
+                    self.delete(obj)
+                FileStorage.__raw.get(key.partition(".")[0], {}).pop(key, 0)
+            raise
+        return keys
+
+    def __load(self, key, o):
+        """Store the record o of key, or the object built from it.
+
+        Foreign key and class name strings are interned first.
+        """
+        intern_record(o)
+        if FileStorage.__lazy:
+            old = FileStorage.__objects.get(key)
+            if old is not None:
+                self.delete(old)
+            cls_name = key.partition(".")[0]
+            FileStorage.__raw.setdefault(cls_name, {})[key] = o
+        else:
+            cls_name = o["__class__"]
+            del o["__class__"]
+            self.new(self.__build(cls_name, o))
+
+    def __materialize(self, cls_name, key=None):
+        """Build the objects of cls_name, or only key, from their records.
+
+        Building an object does not mark it as changed, and the cached
+        fragment of its record is kept for the next save.
+        """
+        records = FileStorage.__raw.get(cls_name)
+        if not records:
+            return
+        keys = list(records) if key is None else [key]
+        cache = FileStorage.__cache
+        dirty = FileStorage.__dirty
+        undo, FileStorage.__undo = FileStorage.__undo, None
+        for key in keys:
+            o = records[key]
+            entry = cache.get(key)
+            attrs = dict(o)
+            del attrs["__class__"]
+            obj = self.__build(cls_name, attrs)
+            self.new(obj)
+            dirty.discard(obj)
+            if entry is not None and entry[0] is o:
+                cache[key] = (obj, entry[1])
+        FileStorage.__undo = undo
+        if not records:
+            del FileStorage.__raw[cls_name]
+
+    def __build(self, cls_name, o):
+        """Return the object of class cls_name with the attributes o."""
+        cls = classes[cls_name]
+        if FileStorage.__compact:
+            cls = compact(cls)
+        return cls(**o)
+
+    def __index(self):
+        """Return __classes, rebuilt with __indexes if __objects changed."""
         odict = FileStorage.__objects
-        objdict = {obj: odict[obj].to_dict() for obj in odict.keys()}
-        with open(FileStorage.__file_path, "w") as f:
-            json.dump(objdict, f)
-
-    def reload(self):
-        """Deserialize the JSON file __file_path to __objects, if it exists."""
-        try:
-            with open(FileStorage.__file_path) as f:
-                objdict = json.load(f)
-                for o in objdict.values():
-                    cls_name = o["__class__"]
-                    del o["__class__"]
-                    self.new(eval(cls_name)(**o))
+        indexed, size = FileStorage.__indexed
+        if indexed is not odict or size != len(odict):
+            groups = {}
+            for index in FileStorage.__indexes:
+                index.clear()
+            for key, obj in odict.items():
+                groups.setdefault(key.partition(".")[0], {})[key] = obj
+                for index in FileStorage.__indexes:
+                    index.add(key, obj)
+            FileStorage.__classes = groups
+            FileStorage.__indexed = (odict, len(odict))
+        return FileStorage.__classes
+
+    @contextmanager
+    def __changes(self):
+        """Hand over the dirty objects and deleted keys to a write.
+
+        __dirty and __deleted are replaced by empty sets, so objects
+        changed while the write runs are flagged again for the next one.
+        If the write fails, the changes it took are flagged again.
+
+        Yields:
+            The (dirty, deleted) sets to write.
+        """
+        with FileStorage.__lock:
+            dirty, FileStorage.__dirty = FileStorage.__dirty, set()
+            deleted, FileStorage.__deleted = FileStorage.__deleted, set()
+        try:
+            yield dirty, deleted
+        except BaseException:
+            with FileStorage.__lock:
+                odict = FileStorage.__objects
+                FileStorage.__dirty |= dirty
+                FileStorage.__deleted |= {k for k in deleted
+                                          if k not in odict}
+            raise
+
+    def __snapshot(self):
+        """Write a full snapshot of __objects and discard the journal.
+
+        Objects changed while the snapshot is written stay flagged.
+        """
+        with self.__changes() as (dirty, deleted):
+            self.__write_snapshot(dirty)
+
+    def __write_snapshot(self, dirty):
+        """Write a full snapshot of __objects, where dirty changed."""
+        raw = [list(r.items()) for r in list(FileStorage.__raw.values())]
+        objs = list(FileStorage.__objects.items())
+        if FileStorage.__format is formats.JSONFormat:
+            self.__write_json(raw, objs, dirty)
+        else:
+            records = [r for records in raw for r in records]
+            for key, obj in objs:
+                rec = dict(obj.__dict__)
+                rec["__class__"] = obj.__class__.__name__
+                records.append((key, rec))
+            with atomic_open(FileStorage.__file_path, "wb") as f:
+                with self.__compressing(f) as f:
+                    FileStorage.__format.dump(records, f)
+            FileStorage.__cache = {}
+        if FileStorage.__texting and not FileStorage.__raw:
+            self.__write_text()
+        try:
+            os.remove(FileStorage.__file_path + ".log")
+        except FileNotFoundError:
+            pass
+        FileStorage.__logged = 0
+
+    @staticmethod
+    def __shard_name(cls_name, id):
+        """Return the name of the shard file of the object cls_name.id."""
+        return "{}.{}.json".format(
+            cls_name, zlib.crc32(id.encode()) % FileStorage.__shards)
+
+    @staticmethod
+    def __is_shard(name):
+        """Return whether name is a shard file name of the layout."""
+        parts = name.split(".")
+        return (len(parts) == 3 and parts[1].isdigit() and
+                int(parts[1]) < FileStorage.__shards)
+
+    def __write_shards(self):
+        """Rewrite the shard files holding changed or deleted objects.
+
+        Every shard is rewritten, and files left from another layout are
+        removed, when the files on disk do not match the current layout.
+        Shards of classes that were not reloaded are loaded first: those
+        of the changed objects, or those of every class when resharding.
+        """
+        with self.__changes() as (dirty, deleted):
+            self.__write_changed_shards(dirty, deleted)
+
+    def __write_changed_shards(self, dirty, deleted):
+        """Rewrite the shard files of the objects dirty and keys deleted."""
+        odict = FileStorage.__objects
+        resharded = FileStorage.__resharded
+        names = set()
+        for obj in dirty:
+            cls_name = obj.__class__.__name__
+            if odict.get("{}.{}".format(cls_name, obj.id)) is obj:
+                names.add(self.__shard_name(cls_name, obj.id))
+        for key in deleted:
+            names.add(self.__shard_name(*key.split(".", 1)))
+        shards = FileStorage.__file_path + ".d"
+        os.makedirs(shards, exist_ok=True)
+        loaded = FileStorage.__loaded
+        if loaded is not None:
+            if resharded:
+                missing = {n.split(".")[0] for n in os.listdir(shards)
+                           if n.endswith(".json")} - loaded
+            else:
+                missing = {n.split(".")[0] for n in names} - loaded
+            if missing:
+                keys = self.__read_shards(missing)
+                FileStorage.__dirty.difference_update(
+                    odict[k] for k in keys if k in odict)
+                loaded.update(missing)
+            if resharded:
+                FileStorage.__loaded = None
+        files = {}
+        for records in list(FileStorage.__raw.values()):
+            for key, o in list(records.items()):
+                name = self.__shard_name(*key.split(".", 1))
+                if resharded or name in names:
+                    files.setdefault(name, []).append((key, o))
+        for key, obj in list(odict.items()):
+            name = self.__shard_name(*key.split(".", 1))
+            if resharded or name in names:
+                rec = dict(obj.__dict__)
+                rec["__class__"] = obj.__class__.__name__
+                files.setdefault(name, []).append((key, rec))
+        if resharded:
+            names = set(files) | {n for n in os.listdir(shards)
+                                  if n.endswith(".json")}
+        for name in names:
+            path = os.path.join(shards, name)
+            if name in files:
+                with atomic_open(path, "wb") as f:
+                    with self.__compressing(f) as f:
+                        FileStorage.__format.dump(files[name], f)
+            else:
+                for suffix in ("", ".bak"):
+                    try:
+                        os.remove(path + suffix)
+                    except FileNotFoundError:
+                        pass
+        FileStorage.__resharded = False
+
+    def __write_json(self, raw, objs, dirty):
+        """Write the records raw and objects objs as a JSON snapshot.
+
+        Only objects in dirty or not serialized before go through
+        to_dict() and json; the fragments of the others are reused.
+        """
+        cache = FileStorage.__cache
+        fresh = {}
+        for records in raw:
+            for key, o in records:
+                entry = cache.get(key)
+                if entry is None or entry[0] is not o:
+                    entry = (o, self.__fragment(key, o))
+                fresh[key] = entry
+        for key, obj in objs:
+            entry = cache.get(key)
+            if entry is None or entry[0] is not obj or obj in dirty:
+                entry = (obj, self.__fragment(key, obj.to_dict()))
+            fresh[key] = entry
+        text = "{" + ", ".join(e[1] for e in fresh.values()) + "}"
+        with atomic_open(FileStorage.__file_path, "wb") as f:
+            with self.__compressing(f) as f:
+                f.write(text.encode())
+        FileStorage.__cache = fresh
+        if FileStorage.__indexing and FileStorage.__codec is None:
+            self.__write_index(fresh)
+
+    def __compressing(self, f):
+        """Return a context compressing what is written to f, if enabled."""
+        return formats.compressing(f, FileStorage.__codec, FileStorage.__level)
+
+    def __write_index(self, fresh):
+        """Write the key index of the JSON snapshot of the fragments fresh.
+
+        Fragments are ASCII, so their positions in the text are also
+        their byte offsets in __file_path.
+        """
+        entries = []
+        pos = 1
+        for key, (o, fragment) in fresh.items():
+            skip = len(json.dumps(key)) + 2
+            entries.append((key.encode(), pos + skip, len(fragment) - skip))
+            pos += len(fragment) + 2
+        entries.sort()
+        stamp = self.__stamp_of(os.stat(FileStorage.__file_path))
+        with atomic_open(FileStorage.__file_path + ".idx", "wb") as f:
+            f.write(FileStorage.__stamp.pack(*stamp))
+            KeyIndex.dump(entries, f)
+
+    def __write_text(self):
+        """Write the text index of the snapshot __file_path to <path>.fts."""
+        self.__index()
+        stamp = self.__stamp_of(os.stat(FileStorage.__file_path))
+        with atomic_open(FileStorage.__file_path + ".fts", "wb") as f:
+            f.write(FileStorage.__stamp.pack(*stamp))
+            postings, lengths = FileStorage.__text.state()
+            saved = {"version": FileStorage.__text_version,
+                     "postings": postings, "lengths": lengths}
+            f.write(json.dumps(saved, separators=(",", ":")).encode())
+
+    def __append(self):
+        """Append one journal record per changed or deleted object."""
+        with self.__changes() as (dirty, deleted):
+            self.__append_changes(dirty, deleted)
+
+    def __append_changes(self, dirty, deleted):
+        """Append the records of the objects dirty and keys deleted."""
+        odict = FileStorage.__objects
+        cache = FileStorage.__cache
+        with open(FileStorage.__file_path + ".log", "a") as f:
+            for key in deleted:
+                cache.pop(key, None)
+                f.write(json.dumps({"op": "del", "key": key}) + "\n")
+                FileStorage.__logged += 1
+            for obj in dirty:
+                key = "{}.{}".format(obj.__class__.__name__, obj.id)
+                if odict.get(key) is not obj:
+                    continue
+                odata = obj.to_dict()
+                cache[key] = (obj, self.__fragment(key, odata))
+                rec = {"op": "set", "key": key, "obj": odata}
+                f.write(json.dumps(rec) + "\n")
+                FileStorage.__logged += 1
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def __fragment(key, odata):
+        """Return the '"<key>": <json>' member text of one saved object."""
+        return json.dumps(key) + ": " + json.dumps(odata, default=isoformat)
+
+    def __replay(self):
+        """Apply the journal records to __objects, if there are any.
+
+        A record cut short by a crash while it was appended is ignored,
+        and cut off the journal so that the next record is not appended
+        to it.
+        """
+        FileStorage.__logged = 0
+        path = FileStorage.__file_path + ".log"
+        good = 0
+        try:
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("incomplete record")
+                        rec = json.loads(line)
+                    except ValueError:
+                        break
+                    key = rec["key"]
+                    FileStorage.__dropped.discard(key)
+                    if rec["op"] == "del":
+                        if FileStorage.__deferred is not None:
+                            FileStorage.__dropped.add(key)
+                        obj = FileStorage.__objects.get(key)
+                        if obj is not None:
+                            self.delete(obj)
+                        cls_name = key.partition(".")[0]
+                        FileStorage.__raw.get(cls_name, {}).pop(key, None)
+                    else:
+                        self.__load(key, rec["obj"])
+                    FileStorage.__logged += 1
+                    good += len(line)
+                else:
+                    return
         except FileNotFoundError:
             return
+        os.truncate(path, good)
@@ -0,0 +1,637 @@
+#!/usr/bin/python3
+"""Defines the file formats FileStorage can save objects in.
+
+A format writes and reads (key, record) pairs, where a record is shaped
+like the output of BaseModel.to_dict(), except that created_at and
+updated_at may be datetime objects instead of ISO 8601 strings.
+"""
+import io
+import re
+import json
+import lzma
+import zlib
+import struct
+import marshal
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+LENGTH = struct.Struct("<I")
+
+
+def isoformat(o):
+    """Return the JSON representation of the datetime or set o."""
+    if isinstance(o, datetime):
+        return o.isoformat()
+    if isinstance(o, (set, frozenset)):
+        return sorted(o)
+    raise TypeError("{} is not JSON serializable".format(type(o).__name__))
+
+
+def iterload(f, size=65536):
+    """Yield the members of the JSON object in the file f one at a time.
+
+    The file is read and decoded in chunks of size characters, so only
+    the member being decoded has to be held in memory.
+
+    Args:
+        f (file): A text file containing a single JSON object.
+        size (int): The number of characters to read at a time.
+    """
+    decode = json.JSONDecoder().raw_decode
+    state = {"buf": "", "pos": 0, "eof": False}
+
+    def fill():
+        chunk = f.read(size)
+        state["eof"] = chunk == ""
+        state["buf"] = state["buf"][state["pos"]:] + chunk
+        state["pos"] = 0
+
+    def char():
+        while True:
+            buf, pos = state["buf"], state["pos"]
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            state["pos"] = pos
+            if pos < len(buf):
+                return buf[pos]
+            if state["eof"]:
+                raise ValueError("unexpected end of JSON file")
+            fill()
+
+    def value():
+        char()
+        while True:
+            try:
+                val, end = decode(state["buf"], state["pos"])
+                if end < len(state["buf"]) or state["eof"]:
+                    state["pos"] = end
+                    return val
+            except json.JSONDecodeError:
+                if state["eof"]:
+                    raise
+            fill()
+
+    if char() != "{":
+        raise ValueError("expected a JSON object")
+    state["pos"] += 1
+    if char() == "}":
+        return
+    while True:
+        key = value()
+        if char() != ":":
+            raise ValueError("expected ':' after key {}".format(key))
+        state["pos"] += 1
+        yield key, value()
+        sep = char()
+        state["pos"] += 1
+        if sep == "}":
+            return
+        if sep != ",":
+            raise ValueError("expected ',' or '}' after " + key)
+
+
+class JSONFormat:
+    """Represent the JSON object format of file.json.
+
+    Attributes:
+        name (str): The name of the format.
+        magic (bytes): The bytes a file in the format starts with.
+    """
+
+    name = "json"
+    magic = b""
+
+    @staticmethod
+    def dump(records, f):
+        """Write the (key, record) pairs records to the binary file f."""
+        f = io.TextIOWrapper(f, encoding="utf-8", write_through=True)
+        f.write("{")
+        for i, (key, rec) in enumerate(records):
+            if i:
+                f.write(", ")
+            f.write(json.dumps(key) + ": ")
+            f.write(json.dumps(rec, default=isoformat))
+        f.write("}")
+        f.detach()
+
+    @staticmethod
+    def load(f):
+        """Yield the (key, record) pairs of the binary file f."""
+        text = io.TextIOWrapper(f, encoding="utf-8")
+        try:
+            yield from iterload(text)
+        finally:
+            text.detach()
+
+
+class NDJSONFormat:
+    """Represent the line-delimited JSON format.
+
+    Each line holds the record of one object, as returned by to_dict(),
+    so files can be appended to, split and read by line-based tools.
+    Keys are rebuilt as <__class__>.<id>.
+
+    Attributes:
+        name (str): The name of the format.
+        magic (bytes): The bytes a file in the format starts with.
+    """
+
+    name = "ndjson"
+    magic = b""
+
+    @staticmethod
+    def dump(records, f):
+        """Write the (key, record) pairs records to the binary file f.
+
+        No records are written as {}, the empty JSON store, as an empty
+        file is taken for a corrupt one.
+        """
+        f = io.TextIOWrapper(f, encoding="utf-8", write_through=True)
+        empty = True
+        for key, rec in records:
+            f.write(json.dumps(rec, default=isoformat) + "\n")
+            empty = False
+        if empty:
+            f.write("{}\n")
+        f.detach()
+
+    @staticmethod
+    def load(f):
+        """Yield the (key, record) pairs of the binary file f."""
+        text = io.TextIOWrapper(f, encoding="utf-8")
+        try:
+            for line in text:
+                if not line.strip():
+                    continue
+                rec = json.loads(line)
+                try:
+                    yield "{}.{}".format(rec["__class__"], rec["id"]), rec
+                except (KeyError, TypeError) as e:
+                    raise ValueError("not an object record: " + line) from e
+        finally:
+            text.detach()
+
+
+class BinaryFormat:
+    """Represent a compact binary format.
+
+    The file holds length-prefixed, marshal-encoded batches of records,
+    so each batch is read with a single call. Each batch lists
+    the class names it introduces, which records then refer to by their
+    position. created_at and updated_at are stored as microseconds since
+    the epoch, and keys are rebuilt as <class name>.<id>. The byte after
+    the magic bytes is the marshal version of the batches, which is
+    pinned so that files can be read by other Python versions.
+
+    Attributes:
+        name (str): The name of the format.
+        magic (bytes): The bytes a file in the format starts with.
+        batch (int): The number of records per batch.
+        version (int): The marshal version of the batches.
+    """
+
+    name = "binary"
+    magic = b"HBNB\x01"
+    batch = 10000
+    version = 4
+
+    @staticmethod
+    def dump(records, f):
+        """Write the (key, record) pairs records to the binary file f."""
+        f.write(BinaryFormat.magic + bytes([BinaryFormat.version]))
+        tags = {}
+        names, batch = [], []
+        for key, rec in records:
+            rec = dict(rec)
+            cls_name = rec.pop("__class__")
+            tag = tags.get(cls_name)
+            if tag is None:
+                tag = tags[cls_name] = len(tags)
+                names.append(cls_name)
+            times = []
+            for k in ("created_at", "updated_at"):
+                dt = rec.pop(k)
+                if isinstance(dt, str):
+                    dt = datetime.fromisoformat(dt)
+                times.append((dt - EPOCH) // MICROSECOND)
+            batch.append((tag, rec.pop("id"), times[0], times[1], rec))
+            if len(batch) == BinaryFormat.batch:
+                BinaryFormat.write(names, batch, f)
+                names, batch = [], []
+        if batch or names:
+            BinaryFormat.write(names, batch, f)
+
+    @staticmethod
+    def write(names, batch, f):
+        """Write the class names names and records batch to the file f."""
+        data = marshal.dumps((names, batch), BinaryFormat.version)
+        f.write(LENGTH.pack(len(data)))
+        f.write(data)
+
+    @staticmethod
+    def load(f):
+        """Yield the (key, record) pairs of the binary file f."""
+        if f.read(len(BinaryFormat.magic)) != BinaryFormat.magic:
+            raise ValueError("not a binary HBnB file")
+        version = f.read(1)
+        if not version or version[0] > marshal.version:
+            raise ValueError("unsupported binary HBnB file version")
+        classes = []
+        while True:
+            head = f.read(LENGTH.size)
+            if not head:
+                return
+            data = f.read(LENGTH.unpack(head)[0]) if len(head) == 4 else b""
+            try:
+                names, batch = marshal.loads(data)
+            except (EOFError, TypeError, ValueError) as e:
+                raise ValueError("corrupt binary HBnB file") from e
+            classes.extend(names)
+            for tag, id, created, updated, attrs in batch:
+                cls_name = classes[tag]
+                rec = {"id": id,
+                       "created_at": EPOCH + timedelta(microseconds=created),
+                       "updated_at": EPOCH + timedelta(microseconds=updated)}
+                rec.update(attrs)
+                rec["__class__"] = cls_name
+                yield "{}.{}".format(cls_name, id), rec
+
+
+class KeyIndex:
+    """Represent a sorted table of fixed-width keys in a buffer.
+
+    The table starts with its number of entries and key width. Each
+    entry is a key, padded with NUL bytes to the width of the longest
+    key, followed by the offset and length of the data of the key.
+    Keys are found by binary search, without reading the whole table.
+
+    Attributes:
+        header (struct.Struct): The layout of the table header.
+        entry (struct.Struct): The layout of the offset and length.
+    """
+
+    header = struct.Struct("<IH")
+    entry = struct.Struct("<QI")
+
+    def __init__(self, buf, pos=0):
+        """Initialize a new KeyIndex over the table at pos in buf.
+
+        Args:
+            buf (bytes-like): The buffer holding the table.
+            pos (int): The position of the table header in buf.
+        Raises:
+            ValueError: If buf is too short to hold the table.
+        """
+        try:
+            self.count, self.width = KeyIndex.header.unpack_from(buf, pos)
+        except struct.error as e:
+            raise ValueError("truncated key index") from e
+        self.buf = buf
+        self.pos = pos + KeyIndex.header.size
+        self.size = self.width + KeyIndex.entry.size
+        self.end = self.pos + self.count * self.size
+        if len(buf) < self.end:
+            raise ValueError("truncated key index")
+
+    @staticmethod
+    def dump(entries, f):
+        """Write the sorted (key, offset, length) entries to the file f.
+
+        Keys are bytes without NUL bytes.
+        """
+        width = max((len(key) for key, offset, length in entries), default=0)
+        f.write(KeyIndex.header.pack(len(entries), width))
+        for key, offset, length in entries:
+            f.write(key.ljust(width, b"\0") +
+                    KeyIndex.entry.pack(offset, length))
+
+    def __len__(self):
+        """Return the number of entries."""
+        return self.count
+
+    def key(self, i):
+        """Return the key of entry i."""
+        pos = self.pos + i * self.size
+        return bytes(self.buf[pos:pos + self.width]).rstrip(b"\0")
+
+    def __getitem__(self, i):
+        """Return the (offset, length) of entry i."""
+        return KeyIndex.entry.unpack_from(
+            self.buf, self.pos + i * self.size + self.width)
+
+    def bisect(self, key):
+        """Return the number of entries whose key sorts before key."""
+        key = key.ljust(self.width, b"\0")
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            pos = self.pos + mid * self.size
+            if self.buf[pos:pos + self.width] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def find(self, key):
+        """Return the entry number of key, or None if it is missing."""
+        i = self.bisect(key)
+        if i < self.count and self.key(i) == key:
+            return i
+        return None
+
+    def span(self, prefix):
+        """Return the range of entry numbers of keys starting with prefix."""
+        end = prefix[:-1] + bytes([prefix[-1] + 1])
+        return range(self.bisect(prefix), self.bisect(end))
+
+
+class MappedFormat:
+    """Represent a fixed-layout format meant to be memory-mapped.
+
+    The file holds a KeyIndex of every key, followed by the records.
+    Each record lists its fields as the name and JSON value of each
+    attribute, with their lengths, so that a single field can be found
+    and decoded without decoding the rest of the record.
+
+    Attributes:
+        name (str): The name of the format.
+        magic (bytes): The bytes a file in the format starts with.
+        field (struct.Struct): The layout of the lengths of a field.
+    """
+
+    name = "mapped"
+    magic = b"HBNB\x02"
+    field = struct.Struct("<HI")
+
+    @staticmethod
+    def encode(rec):
+        """Return the bytes of the record rec."""
+        parts = [struct.pack("<H", len(rec))]
+        for name, value in rec.items():
+            name = name.encode()
+            value = json.dumps(value, default=isoformat).encode()
+            parts.append(MappedFormat.field.pack(len(name), len(value)))
+            parts.append(name)
+            parts.append(value)
+        return b"".join(parts)
+
+    @staticmethod
+    def fields(buf, pos):
+        """Yield the (name, start, end) of each field of a record.
+
+        Args:
+            buf (bytes-like): The buffer holding the record.
+            pos (int): The position of the record in buf.
+        Yields:
+            The name of the field as bytes, and the positions of its
+            JSON value in buf.
+        """
+        size = MappedFormat.field.size
+        count = struct.unpack_from("<H", buf, pos)[0]
+        pos += 2
+        for _ in range(count):
+            nlen, vlen = MappedFormat.field.unpack_from(buf, pos)
+            pos += size
+            name = bytes(buf[pos:pos + nlen])
+            pos += nlen
+            yield name, pos, pos + vlen
+            pos += vlen
+
+    @staticmethod
+    def decode(buf, pos):
+        """Return the record at pos in buf as a dictionary."""
+        return {name.decode(): json.loads(bytes(buf[start:end]))
+                for name, start, end in MappedFormat.fields(buf, pos)}
+
+    @staticmethod
+    def dump(records, f):
+        """Write the (key, record) pairs records to the binary file f."""
+        data = sorted((key.encode(), MappedFormat.encode(rec))
+                      for key, rec in records)
+        entries = []
+        offset = 0
+        for key, rec in data:
+            entries.append((key, offset, len(rec)))
+            offset += len(rec)
+        f.write(MappedFormat.magic)
+        KeyIndex.dump(entries, f)
+        for key, rec in data:
+            f.write(rec)
+
+    @staticmethod
+    def open(buf):
+        """Return the KeyIndex of the file in buf and where records start.
+
+        Raises:
+            ValueError: If buf does not hold a whole file of the format.
+        """
+        if bytes(buf[:len(MappedFormat.magic)]) != MappedFormat.magic:
+            raise ValueError("not a mapped HBnB file")
+        index = KeyIndex(buf, len(MappedFormat.magic))
+        if index.count:
+            offset, length = index[index.count - 1]
+            if len(buf) < index.end + offset + length:
+                raise ValueError("truncated mapped HBnB file")
+        return index, index.end
+
+    @staticmethod
+    def load(f):
+        """Yield the (key, record) pairs of the binary file f."""
+        buf = f.read()
+        index, start = MappedFormat.open(buf)
+        for i in range(len(index)):
+            offset, length = index[i]
+            try:
+                rec = MappedFormat.decode(buf, start + offset)
+            except struct.error as e:
+                raise ValueError("corrupt mapped HBnB file") from e
+            yield index.key(i).decode(), rec
+
+
+formats = {f.name: f for f in
+           (JSONFormat, NDJSONFormat, BinaryFormat, MappedFormat)}
+
+# Matches the start of a JSON object whose first member is an object,
+# as in the JSON format, unlike the records of the NDJSON format.
+_members = re.compile(rb'\s*\{\s*("(?:[^"\\]|\\.)*"\s*:\s*\{|\})')
+
+
+class Codec:
+    """Represent a compression codec of snapshot files.
+
+    Attributes:
+        name (str): The name of the codec.
+        magic (tuple): The byte strings a compressed file can start with.
+        level (int): The default compression level.
+        levels (range): The compression levels the codec accepts.
+    """
+
+    def __init__(self, name, magic, level, levels, compressor,
+                 decompressor):
+        """Initialize a new Codec.
+
+        Args:
+            name (str): The name of the codec.
+            magic (tuple): The byte strings a file can start with.
+            level (int): The default compression level.
+            levels (range): The compression levels the codec accepts.
+            compressor (callable): Returns a compression object, given
+                a level, with compress() and flush() methods.
+            decompressor (callable): Returns a decompression object,
+                with decompress() and an eof attribute.
+        """
+        self.name = name
+        self.magic = magic
+        self.level = level
+        self.levels = levels
+        self.compressor = compressor
+        self.decompressor = decompressor
+
+
+codecs = {c.name: c for c in (
+    Codec("gzip", (b"\x1f\x8b",), 6, range(-1, 10),
+          lambda level: zlib.compressobj(level, wbits=31),
+          lambda: zlib.decompressobj(wbits=31)),
+    Codec("zlib", (b"\x78\x01", b"\x78\x5e", b"\x78\x9c", b"\x78\xda"), 6,
+          range(-1, 10),
+          lambda level: zlib.compressobj(level),
+          lambda: zlib.decompressobj()),
+    Codec("lzma", (b"\xfd7zXZ\x00",), 6, range(10),
+          lambda level: lzma.LZMACompressor(preset=level),
+          lambda: lzma.LZMADecompressor()))}
+
+
+class Compressed(io.RawIOBase):
+    """Represent the compressed data of a file as a stream.
+
+    Reading decompresses the file, and writing compresses into it.
+    Corrupt or truncated data raises ValueError, like the formats do.
+    """
+
+    def __init__(self, f, obj, mode, closefd=False):
+        """Initialize a new Compressed stream.
+
+        Args:
+            f (file): The binary file holding the compressed data.
+            obj (object): A compression or decompression object.
+            mode (str): "r" to read or "w" to write.
+            closefd (bool): Whether closing the stream closes f.
+        """
+        super().__init__()
+        self.__f = f
+        self.__obj = obj
+        self.__mode = mode
+        self.__closefd = closefd
+        self.__buf = b""
+
+    def readable(self):
+        """Return whether the stream is read."""
+        return self.__mode == "r"
+
+    def writable(self):
+        """Return whether the stream is written."""
+        return self.__mode == "w"
+
+    def readinto(self, b):
+        """Read decompressed bytes into b and return their number."""
+        while not self.__buf and not self.__obj.eof:
+            chunk = self.__f.read(65536)
+            if not chunk:
+                raise ValueError("truncated compressed file")
+            try:
+                self.__buf = self.__obj.decompress(chunk)
+            except (zlib.error, lzma.LZMAError) as e:
+                raise ValueError("corrupt compressed file") from e
+        n = min(len(b), len(self.__buf))
+        b[:n] = self.__buf[:n]
+        self.__buf = self.__buf[n:]
+        return n
+
+    def write(self, b):
+        """Compress the bytes b into the file and return their number."""
+        self.__f.write(self.__obj.compress(bytes(b)))
+        return len(b)
+
+    def close(self):
+        """Write the end of the compressed data, if writing."""
+        if not self.closed:
+            if self.__mode == "w":
+                self.__f.write(self.__obj.flush())
+            if self.__closefd:
+                self.__f.close()
+        super().close()
+
+
+def reader(path):
+    """Open the file path for reading, decompressed if it is compressed.
+
+    Returns:
+        A buffered binary file, which supports peek().
+    """
+    f = open(path, "rb")
+    head = f.peek(8)
+    for codec in codecs.values():
+        if head.startswith(codec.magic):
+            return io.BufferedReader(
+                Compressed(f, codec.decompressor(), "r", closefd=True))
+    return f
+
+
+@contextmanager
+def compressing(f, name=None, level=None):
+    """Compress the data written to the binary file f in a block.
+
+    Args:
+        f (file): The binary file to write to.
+        name (str): The name of the codec, or None to write as is.
+        level (int): The compression level, or None for the default.
+    Yields:
+        The file to write the uncompressed data to.
+    """
+    if name is None:
+        yield f
+        return
+    codec = codecs[name]
+    obj = codec.compressor(codec.level if level is None else level)
+    with io.BufferedWriter(Compressed(f, obj, "w")) as stream:
+        yield stream
+
+
+def detect(f):
+    """Return the format of the binary file f, left at its beginning.
+
+    Formats without magic bytes are told apart by their first member:
+    an NDJSON file starts with a record, not with a key and its record.
+
+    Raises:
+        ValueError: If f is empty or blank, as every format writes at
+            least one byte for an empty store.
+    """
+    if not hasattr(f, "peek"):
+        return NDJSONFormat
+    head = f.peek(4096)
+    for fmt in formats.values():
+        if fmt.magic and head.startswith(fmt.magic):
+            return fmt
+    if head.strip() == b"":
+        raise ValueError("empty file")
+    if head.lstrip().startswith(b"{") and not _members.match(head):
+        return NDJSONFormat
+    return JSONFormat
+
+
+def convert(src, dst, name):
+    """Write the objects of the file src to the file dst in format name.
+
+    Records are streamed from one file to the other one at a time.
+
+    Args:
+        src (str): The name of the file to read, in any format and
+            compressed or not.
+        dst (str): The name of the file to write.
+        name (str): The name of the format to write.
+    """
+    with reader(src) as fin, open(dst, "wb") as fout:
+        formats[name].dump(detect(fin).load(fin), fout)
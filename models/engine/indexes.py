@@ -0,0 +1,811 @@
+#!/usr/bin/python3
+"""Defines the secondary indexes FileStorage keeps over its objects."""
+import re
+import bisect
+import heapq
+import math
+import operator
+from collections import Counter
+from models.place import id_set
+
+# The mean radius of the Earth, in kilometers.
+EARTH_RADIUS = 6371.0
+# Maps the name of each class with full-text search to the names of its
+# indexed text attributes.
+text_fields = {
+    "Place": ("name", "description"),
+    "Review": ("text",)
+}
+
+# Maps each comparison operator of a condition to its function.
+operators = {
+    "=": operator.eq,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge
+}
+
+
+def matches(obj, conditions):
+    """Return whether obj meets every (name, op, value) condition.
+
+    Attributes that are missing or cannot be compared to the value do
+    not meet the condition.
+    """
+    for name, op, value in conditions:
+        try:
+            if not operators[op](getattr(obj, name, None), value):
+                return False
+        except TypeError:
+            return False
+    return True
+
+
+def is_number(value):
+    """Return whether value is an int or float that is not NaN."""
+    return (isinstance(value, (int, float)) and
+            not isinstance(value, bool) and value == value)
+
+
+def tokenize(text):
+    """Return the lowercase words of text, in order."""
+    return re.findall(r"\w+", text.lower())
+
+
+def location(obj):
+    """Return the (latitude, longitude) of obj, or None if it has none.
+
+    Objects have a location when they set both attributes to numbers in
+    range themselves: the class defaults do not count.
+    """
+    attrs = obj.__dict__
+    lat = attrs.get("latitude")
+    lon = attrs.get("longitude")
+    if (is_number(lat) and is_number(lon) and -90 <= lat <= 90 and
+            -180 <= lon <= 180):
+        return lat, lon
+    return None
+
+
+def distance(lat1, lon1, lat2, lon2):
+    """Return the great-circle distance between two points, in km."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    h = (math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) *
+         math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(h)))
+
+
+def check(lat, lon):
+    """Raise ValueError unless lat and lon are a valid location."""
+    if not (is_number(lat) and is_number(lon) and -90 <= lat <= 90 and
+            -180 <= lon <= 180):
+        raise ValueError("invalid location ({}, {})".format(lat, lon))
+
+
+def box(objs, south, west, north, east):
+    """Return the objects of objs located in a bounding box, by key.
+
+    Args:
+        objs (dict): The objects to search, by key.
+        south (float): The latitude of the south edge.
+        west (float): The longitude of the west edge. A box whose west
+            edge is east of its east edge crosses the antimeridian.
+        north (float): The latitude of the north edge.
+        east (float): The longitude of the east edge.
+    Raises:
+        ValueError: If an edge is out of range.
+    """
+    check(south, west)
+    check(north, east)
+    found = {}
+    for key, obj in objs.items():
+        loc = location(obj)
+        if loc is None or not south <= loc[0] <= north:
+            continue
+        if (west <= loc[1] <= east if west <= east else
+                loc[1] >= west or loc[1] <= east):
+            found[key] = obj
+    return found
+
+
+def within(objs, lat, lon, km):
+    """Return the objects of objs within km of a point, nearest first.
+
+    Raises:
+        ValueError: If the point is out of range or km is negative.
+    """
+    check(lat, lon)
+    if not is_number(km) or km < 0:
+        raise ValueError("invalid distance {}".format(km))
+    found = []
+    for key, obj in objs.items():
+        loc = location(obj)
+        if loc is not None:
+            d = distance(lat, lon, *loc)
+            if d <= km:
+                found.append((d, key, obj))
+    found.sort(key=lambda f: (f[0], f[1]))
+    return {key: obj for d, key, obj in found}
+
+
+def nearest(objs, lat, lon, k=1):
+    """Return the k objects of objs nearest to a point, nearest first.
+
+    Raises:
+        ValueError: If the point is out of range or k is not positive.
+    """
+    check(lat, lon)
+    if not isinstance(k, int) or k < 1:
+        raise ValueError("invalid count {}".format(k))
+    found = []
+    for key, obj in objs.items():
+        loc = location(obj)
+        if loc is not None:
+            found.append((distance(lat, lon, *loc), key, obj))
+    return {key: obj for d, key, obj in
+            heapq.nsmallest(k, found, key=lambda f: (f[0], f[1]))}
+
+
+def search(objs, cls_name, terms, limit=None):
+    """Return the objects of objs matching the words of terms, best first.
+
+    The objects are indexed in a new TextIndex of text_fields, then
+    searched; see TextIndex.search() for the arguments.
+    """
+    index = TextIndex(text_fields)
+    for key, obj in objs.items():
+        index.add(key, obj)
+    return {key: objs[key]
+            for key, score in index.search(cls_name, terms, limit)}
+
+
+def having(objs, all_of=(), any_of=(), none_of=()):
+    """Return the places of objs with the given amenities, by key.
+
+    Args:
+        objs (dict): The places to filter, by key.
+        all_of (iterable): Amenity ids a place must all have.
+        any_of (iterable): Amenity ids a place must have one of, unless
+            empty.
+        none_of (iterable): Amenity ids a place must not have.
+    """
+    all_of, any_of = frozenset(all_of), frozenset(any_of)
+    none_of = frozenset(none_of)
+    found = {}
+    for key, obj in objs.items():
+        ids = id_set(getattr(obj, "amenity_ids", ()))
+        if (all_of <= ids and (not any_of or not any_of.isdisjoint(ids))
+                and none_of.isdisjoint(ids)):
+            found[key] = obj
+    return found
+
+
+class ForeignKeyIndex:
+    """Represent a reverse index of the foreign keys of stored objects.
+
+    Every string attribute whose name ends in _id is a foreign key, and
+    the objects are indexed by class name, attribute name and value, so
+    the objects referring to an id are found without a scan.
+    """
+
+    def __init__(self):
+        """Initialize a new, empty ForeignKeyIndex."""
+        self.__refs = {}
+
+    @staticmethod
+    def covers(name):
+        """Return whether the attribute name is indexed."""
+        return name.endswith("_id")
+
+    def clear(self):
+        """Remove every object from the index."""
+        self.__refs = {}
+
+    def add(self, key, obj):
+        """Index the foreign keys of obj, stored as key."""
+        cls_name = key.partition(".")[0]
+        for name, value in obj.__dict__.items():
+            if name.endswith("_id") and isinstance(value, str):
+                self.__link(cls_name, name, value, key, obj)
+
+    def remove(self, key, obj):
+        """Remove the foreign keys of obj, stored as key, from the index."""
+        cls_name = key.partition(".")[0]
+        for name, value in obj.__dict__.items():
+            if name.endswith("_id") and isinstance(value, str):
+                self.__unlink(cls_name, name, value, key)
+
+    def change(self, key, obj, name, *old):
+        """Move obj, stored as key, from the old value of name to the new.
+
+        Args:
+            key (str): The key obj is stored as.
+            obj (BaseModel): The object that was changed.
+            name (str): The name of the foreign key that was set.
+            *old (any): The previous value of name, if it had one.
+        """
+        cls_name = key.partition(".")[0]
+        if old and isinstance(old[0], str):
+            self.__unlink(cls_name, name, old[0], key)
+        value = getattr(obj, name, None)
+        if isinstance(value, str):
+            self.__link(cls_name, name, value, key, obj)
+
+    def get(self, cls_name, name, value):
+        """Return the objects of cls_name whose name is value, by key."""
+        return dict(self.__refs.get((cls_name, name), {}).get(value, {}))
+
+    def __link(self, cls_name, name, value, key, obj):
+        """Add key to the objects of cls_name whose name is value."""
+        refs = self.__refs.setdefault((cls_name, name), {})
+        refs.setdefault(value, {})[key] = obj
+
+    def __unlink(self, cls_name, name, value, key):
+        """Remove key from the objects of cls_name whose name is value."""
+        refs = self.__refs.get((cls_name, name), {})
+        keys = refs.get(value)
+        if keys is not None:
+            keys.pop(key, None)
+            if not keys:
+                del refs[value]
+
+
+class RangeIndex:
+    """Represent sorted indexes of numeric attributes of a class.
+
+    For every attribute, the distinct values the objects of the class
+    have are kept sorted, each with the objects having it, so range
+    conditions are answered by bisection. Attributes an object does not
+    set are indexed with the class default.
+    """
+
+    def __init__(self, cls_name, names):
+        """Initialize a new, empty RangeIndex.
+
+        Args:
+            cls_name (str): The name of the class of the objects.
+            names (iterable): The names of the attributes to index.
+        """
+        self.__cls_name = cls_name
+        self.__prefix = cls_name + "."
+        self.__names = frozenset(names)
+        self.clear()
+
+    def covers(self, name):
+        """Return whether the attribute name is indexed."""
+        return name in self.__names
+
+    def clear(self):
+        """Remove every object from the index."""
+        self.__sorted = {name: [] for name in self.__names}
+        self.__keys = {name: {} for name in self.__names}
+        self.__values = {name: {} for name in self.__names}
+
+    def add(self, key, obj):
+        """Index the attributes of obj, stored as key."""
+        if key.startswith(self.__prefix):
+            for name in self.__names:
+                self.__insert(name, key, obj)
+
+    def remove(self, key, obj):
+        """Remove obj, stored as key, from the index."""
+        if key.startswith(self.__prefix):
+            for name in self.__names:
+                self.__delete(name, key)
+
+    def change(self, key, obj, name, *old):
+        """Move obj, stored as key, to the new value of name.
+
+        Args:
+            key (str): The key obj is stored as.
+            obj (BaseModel): The object that was changed.
+            name (str): The name of the attribute that was set.
+            *old (any): The previous value of name, if it had one.
+        """
+        if key.startswith(self.__prefix):
+            self.__delete(name, key)
+            self.__insert(name, key, obj)
+
+    def select(self, cls_name, name, op, value):
+        """Return the objects of cls_name whose name meets op value.
+
+        Args:
+            cls_name (str): The name of the class of the objects.
+            name (str): The name of the attribute.
+            op (str): A comparison operator of operators.
+            value (int or float): The value to compare to.
+        Returns:
+            A list of {key: object} dictionaries, one per distinct value
+            in the range, or None if the condition is not indexed.
+        """
+        if (cls_name != self.__cls_name or name not in self.__names or
+                op not in operators or not is_number(value)):
+            return None
+        values = self.__sorted[name]
+        lo, hi = 0, len(values)
+        if op == "=" or op == ">=":
+            lo = bisect.bisect_left(values, value)
+        elif op == ">":
+            lo = bisect.bisect_right(values, value)
+        if op == "=" or op == "<=":
+            hi = bisect.bisect_right(values, value)
+        elif op == "<":
+            hi = bisect.bisect_left(values, value)
+        keys = self.__keys[name]
+        return [keys[v] for v in values[lo:hi]]
+
+    def __insert(self, name, key, obj):
+        """Add key to the objects with the value of name of obj."""
+        value = getattr(obj, name, None)
+        if not is_number(value):
+            return
+        keys = self.__keys[name].get(value)
+        if keys is None:
+            keys = self.__keys[name][value] = {}
+            bisect.insort(self.__sorted[name], value)
+        keys[key] = obj
+        self.__values[name][key] = value
+
+    def __delete(self, name, key):
+        """Remove key from the objects with its indexed value of name."""
+        value = self.__values[name].pop(key, None)
+        if value is None:
+            return
+        keys = self.__keys[name][value]
+        del keys[key]
+        if not keys:
+            del self.__keys[name][value]
+            values = self.__sorted[name]
+            del values[bisect.bisect_left(values, value)]
+
+
+class GridIndex:
+    """Represent a grid index of the locations of the objects of a class.
+
+    The globe is split into square cells of a number of degrees, and
+    every located object is kept in the cell of its location, so spatial
+    queries only look at the objects of the cells they overlap.
+    """
+
+    def __init__(self, cls_name, size=0.5):
+        """Initialize a new, empty GridIndex.
+
+        Args:
+            cls_name (str): The name of the class of the objects.
+            size (float): The size of the cells, in degrees.
+        """
+        self.__cls_name = cls_name
+        self.__prefix = cls_name + "."
+        self.__size = size
+        self.clear()
+
+    def __len__(self):
+        """Return the number of located objects."""
+        return len(self.__cell_of)
+
+    @staticmethod
+    def covers(name):
+        """Return whether the attribute name is indexed."""
+        return name == "latitude" or name == "longitude"
+
+    def clear(self):
+        """Remove every object from the index."""
+        self.__cells = {}
+        self.__cell_of = {}
+
+    def add(self, key, obj):
+        """Index the location of obj, stored as key, if it has one."""
+        if not key.startswith(self.__prefix):
+            return
+        loc = location(obj)
+        if loc is not None:
+            cell = self.__cell(*loc)
+            self.__cells.setdefault(cell, {})[key] = obj
+            self.__cell_of[key] = cell
+
+    def remove(self, key, obj):
+        """Remove obj, stored as key, from the index."""
+        cell = self.__cell_of.pop(key, None)
+        if cell is not None:
+            keys = self.__cells[cell]
+            del keys[key]
+            if not keys:
+                del self.__cells[cell]
+
+    def change(self, key, obj, name, *old):
+        """Move obj, stored as key, to the cell of its new location.
+
+        Args:
+            key (str): The key obj is stored as.
+            obj (BaseModel): The object that was changed.
+            name (str): The name of the attribute that was set.
+            *old (any): The previous value of name, if it had one.
+        """
+        self.remove(key, obj)
+        self.add(key, obj)
+
+    def box(self, south, west, north, east):
+        """Return the objects located in a bounding box, by key.
+
+        See box() of this module for the arguments.
+        """
+        check(south, west)
+        check(north, east)
+        return box(self.__overlapping(south, west, north, east),
+                   south, west, north, east)
+
+    def within(self, lat, lon, km):
+        """Return the objects within km of a point, nearest first.
+
+        Only the cells of the bounding box of the circle are looked at.
+        """
+        check(lat, lon)
+        if not is_number(km) or km < 0:
+            raise ValueError("invalid distance {}".format(km))
+        arc = km / EARTH_RADIUS
+        dlat = math.degrees(arc)
+        south, north = lat - dlat, lat + dlat
+        west, east = -180, 180
+        if south > -90 and north < 90:
+            ratio = math.sin(min(arc, math.pi / 2)) / math.cos(
+                math.radians(lat))
+            if ratio < 1:
+                dlon = math.degrees(math.asin(ratio))
+                west, east = lon - dlon, lon + dlon
+                if west < -180:
+                    west += 360
+                if east > 180:
+                    east -= 360
+        objs = self.__overlapping(max(south, -90), west, min(north, 90), east)
+        return within(objs, lat, lon, km)
+
+    def nearest(self, lat, lon, k=1):
+        """Return the k objects nearest to a point, nearest first.
+
+        The radius searched starts at the size of a cell and doubles
+        until it holds k objects.
+        """
+        check(lat, lon)
+        if not isinstance(k, int) or k < 1:
+            raise ValueError("invalid count {}".format(k))
+        km = self.__size * math.pi * EARTH_RADIUS / 180
+        while True:
+            if k >= len(self) or km >= math.pi * EARTH_RADIUS:
+                km = math.pi * EARTH_RADIUS
+            found = self.within(lat, lon, km)
+            if len(found) >= k or km >= math.pi * EARTH_RADIUS:
+                return dict(list(found.items())[:k])
+            km *= 2
+
+    def __cell(self, lat, lon):
+        """Return the (row, column) of the cell of a location."""
+        return (math.floor(lat / self.__size), math.floor(lon / self.__size))
+
+    def __overlapping(self, south, west, north, east):
+        """Return the objects of the cells overlapping a bounding box."""
+        rows = range(self.__cell(south, 0)[0], self.__cell(north, 0)[0] + 1)
+        if west <= east:
+            spans = [(west, east)]
+        else:
+            spans = [(west, 180), (-180, east)]
+        cols = [range(self.__cell(0, w)[1], self.__cell(0, e)[1] + 1)
+                for w, e in spans]
+        objs = {}
+        if len(rows) * sum(map(len, cols)) > len(self.__cells):
+            for (row, col), keys in self.__cells.items():
+                if row in rows and any(col in c for c in cols):
+                    objs.update(keys)
+            return objs
+        for row in rows:
+            for c in cols:
+                for col in c:
+                    keys = self.__cells.get((row, col))
+                    if keys is not None:
+                        objs.update(keys)
+        return objs
+
+
+class TextIndex:
+    """Represent an inverted index of the words of text attributes.
+
+    Every word of the indexed attributes of an object is mapped to the
+    objects using it and how often, by class, so searches only look at
+    the objects using a word of the query. Results are ranked by BM25.
+
+    Attributes:
+        k1 (float): The BM25 term frequency saturation.
+        b (float): The BM25 document length normalization.
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, fields):
+        """Initialize a new, empty TextIndex.
+
+        Args:
+            fields (dict): The names of the attributes to index, as
+                {class name: tuple of attribute names}.
+        """
+        self.__fields = fields
+        self.__names = frozenset(n for names in fields.values()
+                                 for n in names)
+        self.clear()
+
+    def __contains__(self, key):
+        """Return whether the object stored as key is indexed."""
+        return key in self.__lengths.get(key.partition(".")[0], {})
+
+    def covers(self, name):
+        """Return whether the attribute name is indexed."""
+        return name in self.__names
+
+    def clear(self):
+        """Remove every object from the index."""
+        self.__postings = {cls_name: {} for cls_name in self.__fields}
+        self.__lengths = {cls_name: {} for cls_name in self.__fields}
+        self.__totals = {cls_name: 0 for cls_name in self.__fields}
+
+    def add(self, key, obj):
+        """Index the words of obj, stored as key."""
+        cls_name = key.partition(".")[0]
+        if cls_name not in self.__fields or key in self:
+            return
+        counts = self.__count(cls_name, obj)
+        postings = self.__postings[cls_name]
+        for word, tf in counts.items():
+            postings.setdefault(word, {})[key] = tf
+        length = sum(counts.values())
+        self.__lengths[cls_name][key] = length
+        self.__totals[cls_name] += length
+
+    def remove(self, key, obj):
+        """Remove obj, stored as key, from the index."""
+        cls_name = key.partition(".")[0]
+        if key in self:
+            self.__unindex(cls_name, key, self.__count(cls_name, obj))
+
+    def change(self, key, obj, name, *old):
+        """Index the new words of obj, stored as key, instead of the old.
+
+        Args:
+            key (str): The key obj is stored as.
+            obj (BaseModel): The object that was changed.
+            name (str): The name of the attribute that was set.
+            *old (any): The previous value of name, if it had one.
+        """
+        cls_name = key.partition(".")[0]
+        if name not in self.__fields.get(cls_name, ()) or key not in self:
+            return
+        previous = old[0] if old else getattr(obj.__class__, name, "")
+        self.__unindex(cls_name, key,
+                       self.__count(cls_name, obj, name, previous))
+        self.add(key, obj)
+
+    def search(self, cls_name, terms, limit=None):
+        """Return the keys of the objects of cls_name matching terms.
+
+        Args:
+            cls_name (str): The name of the class of the objects.
+            terms (str): The words to look for.
+            limit (int): The number of keys to return, or None for all.
+        Returns:
+            A list of (key, score) pairs, best first.
+        """
+        postings = self.__postings.get(cls_name)
+        if not postings:
+            return []
+        lengths = self.__lengths[cls_name]
+        count = len(lengths)
+        average = self.__totals[cls_name] / count
+        scores = {}
+        for word in set(tokenize(terms)):
+            keys = postings.get(word)
+            if keys is None:
+                continue
+            idf = math.log(1 + (count - len(keys) + 0.5) / (len(keys) + 0.5))
+            for key, tf in keys.items():
+                norm = 1 - self.b + self.b * lengths[key] / average
+                scores[key] = (scores.get(key, 0) + idf * tf *
+                               (self.k1 + 1) / (tf + self.k1 * norm))
+        ranked = sorted(scores.items(), key=lambda s: (-s[1], s[0]))
+        return ranked if limit is None else ranked[:limit]
+
+    def state(self):
+        """Return the contents of the index, for restore()."""
+        return self.__postings, self.__lengths
+
+    def restore(self, state):
+        """Replace the contents of the index with state, from state()."""
+        postings, lengths = state
+        self.clear()
+        for cls_name in self.__fields:
+            self.__postings[cls_name] = postings.get(cls_name, {})
+            self.__lengths[cls_name] = lengths.get(cls_name, {})
+            self.__totals[cls_name] = sum(self.__lengths[cls_name].values())
+
+    def __count(self, cls_name, obj, name=None, value=None):
+        """Return the word counts of the indexed attributes of obj.
+
+        Args:
+            cls_name (str): The name of the class of obj.
+            obj (BaseModel): The object.
+            name (str): The name of an attribute to count as value.
+            value (any): The value of name to count.
+        """
+        counts = Counter()
+        for field in self.__fields[cls_name]:
+            text = value if field == name else getattr(obj, field, "")
+            if isinstance(text, str):
+                counts.update(tokenize(text))
+        return counts
+
+    def __unindex(self, cls_name, key, counts):
+        """Remove key, indexed with the word counts counts."""
+        postings = self.__postings[cls_name]
+        for word in counts:
+            keys = postings.get(word)
+            if keys is not None:
+                keys.pop(key, None)
+                if not keys:
+                    del postings[word]
+        self.__totals[cls_name] -= self.__lengths[cls_name].pop(key)
+
+
+class AmenityIndex:
+    """Represent bitmaps of the amenities of the objects of a class.
+
+    Every indexed object gets a dense ordinal, the position of its bit,
+    and every amenity id is mapped to the set of the ordinals of the
+    objects having it. Queries turn these sets into int bitmaps, kept
+    until the next rebuild and updated bit by bit in between, so AND,
+    OR and NOT filters are a few bitwise operations over every object.
+    The ordinals of removed objects are reused.
+    """
+
+    def __init__(self, cls_name):
+        """Initialize a new, empty AmenityIndex.
+
+        Args:
+            cls_name (str): The name of the class of the objects.
+        """
+        self.__prefix = cls_name + "."
+        self.clear()
+
+    def __len__(self):
+        """Return the number of indexed objects."""
+        return len(self.__ordinals)
+
+    @staticmethod
+    def covers(name):
+        """Return whether the attribute name is indexed."""
+        return name == "amenity_ids"
+
+    def clear(self):
+        """Remove every object from the index."""
+        self.__ordinals = {}
+        self.__keys = []
+        self.__free = []
+        self.__postings = {}
+        self.__bitmaps = {}
+        self.__everyone = None
+
+    def add(self, key, obj):
+        """Index the amenities of obj, stored as key."""
+        if not key.startswith(self.__prefix) or key in self.__ordinals:
+            return
+        if self.__free:
+            i = heapq.heappop(self.__free)
+            self.__keys[i] = key
+        else:
+            i = len(self.__keys)
+            self.__keys.append(key)
+        self.__ordinals[key] = i
+        if self.__everyone is not None:
+            self.__everyone |= 1 << i
+        self.__set(i, id_set(getattr(obj, "amenity_ids", ())))
+
+    def remove(self, key, obj):
+        """Remove obj, stored as key, from the index."""
+        i = self.__ordinals.pop(key, None)
+        if i is None:
+            return
+        self.__unset(i, id_set(getattr(obj, "amenity_ids", ())))
+        if self.__everyone is not None:
+            self.__everyone &= ~(1 << i)
+        self.__keys[i] = None
+        heapq.heappush(self.__free, i)
+
+    def change(self, key, obj, name, *old):
+        """Index the new amenities of obj, stored as key, instead of the old.
+
+        Args:
+            key (str): The key obj is stored as.
+            obj (BaseModel): The object that was changed.
+            name (str): The name of the attribute that was set.
+            *old (any): The previous value of name, if it had one.
+        """
+        i = self.__ordinals.get(key)
+        if name != "amenity_ids" or i is None:
+            return
+        previous = old[0] if old else getattr(obj.__class__, name, ())
+        self.__unset(i, id_set(previous))
+        self.__set(i, id_set(getattr(obj, name, ())))
+
+    def select(self, all_of=(), any_of=(), none_of=()):
+        """Return the keys of the objects with the given amenities.
+
+        Args:
+            all_of (iterable): Amenity ids an object must all have.
+            any_of (iterable): Amenity ids an object must have one of,
+                unless empty.
+            none_of (iterable): Amenity ids an object must not have.
+        Returns:
+            A list of the keys, by ordinal.
+        """
+        if self.__everyone is None:
+            self.__everyone = self.__bitmap(self.__ordinals.values())
+        found = self.__everyone
+        for amenity in all_of:
+            found &= self.__get(amenity)
+        if any_of:
+            some = 0
+            for amenity in any_of:
+                some |= self.__get(amenity)
+            found &= some
+        for amenity in none_of:
+            found &= ~self.__get(amenity)
+        # Finding the "1" digits of the binary string, lowest bit first,
+        # skips runs of unset bits in C rather than bit by bit.
+        bits = bin(found)[:1:-1]
+        keys = []
+        i = bits.find("1")
+        while i != -1:
+            keys.append(self.__keys[i])
+            i = bits.find("1", i + 1)
+        return keys
+
+    def __get(self, amenity):
+        """Return the bitmap of amenity, building it if it is not kept."""
+        bitmap = self.__bitmaps.get(amenity)
+        if bitmap is None:
+            ordinals = self.__postings.get(amenity)
+            if ordinals is None:
+                return 0
+            bitmap = self.__bitmaps[amenity] = self.__bitmap(ordinals)
+        return bitmap
+
+    @staticmethod
+    def __bitmap(ordinals):
+        """Return the int with the bit of each of ordinals set."""
+        ordinals = list(ordinals)
+        if not ordinals:
+            return 0
+        buf = bytearray(max(ordinals) // 8 + 1)
+        for i in ordinals:
+            buf[i >> 3] |= 1 << (i & 7)
+        return int.from_bytes(buf, "little")
+
+    def __set(self, i, amenities):
+        """Add the ordinal i to the objects having each of amenities."""
+        for amenity in amenities:
+            self.__postings.setdefault(amenity, set()).add(i)
+            bitmap = self.__bitmaps.get(amenity)
+            if bitmap is not None:
+                self.__bitmaps[amenity] = bitmap | 1 << i
+
+    def __unset(self, i, amenities):
+        """Remove the ordinal i from the objects having each of amenities."""
+        for amenity in amenities:
+            ordinals = self.__postings.get(amenity)
+            if ordinals is None or i not in ordinals:
+                continue
+            ordinals.discard(i)
+            if ordinals:
+                bitmap = self.__bitmaps.get(amenity)
+                if bitmap is not None:
+                    self.__bitmaps[amenity] = bitmap & ~(1 << i)
+            else:
+                del self.__postings[amenity]
+                self.__bitmaps.pop(amenity, None)
@@ -0,0 +1,87 @@
+#!/usr/bin/python3
+"""Defines the table of shared foreign key and class name strings."""
+import sys
+
+
+class InternTable:
+    """Represent a table of shared string values.
+
+    Interning a string returns the first equal string seen, so that
+    equal values held by many objects are a single string in memory,
+    and comparing them can stop at the identity check.
+
+    Attributes:
+        hits (int): The number of strings replaced by a shared one.
+        saved (int): The number of bytes taken by the replaced strings.
+    """
+
+    def __init__(self):
+        """Initialize a new, empty InternTable."""
+        self.__strings = {}
+        self.hits = 0
+        self.saved = 0
+
+    def __len__(self):
+        """Return the number of distinct strings in the table."""
+        return len(self.__strings)
+
+    def __call__(self, s):
+        """Return the shared string equal to s, adding s if it is new."""
+        shared = self.__strings.setdefault(s, s)
+        if shared is not s:
+            self.hits += 1
+            self.saved += sys.getsizeof(s)
+        return shared
+
+    def clear(self):
+        """Remove every string and reset the counters."""
+        self.__strings.clear()
+        self.hits = 0
+        self.saved = 0
+
+
+strings = InternTable()
+
+
+def interned(name):
+    """Return whether the values of the attribute name are interned.
+
+    Foreign keys, the <model>_id attributes and the lists or sets of ids
+    of the <model>_ids attributes, and __class__ names are interned.
+    """
+    return name.endswith("_id") or name.endswith("_ids") or name == "__class__"
+
+
+def intern_value(name, value):
+    """Return value, with its strings interned if name is interned.
+
+    Args:
+        name (str): The name of the attribute.
+        value (any): The value of the attribute.
+    """
+    if not interned(name):
+        return value
+    return _intern(value)
+
+
+def intern_record(rec):
+    """Intern the strings of the interned attributes of the record rec."""
+    for name, value in rec.items():
+        if interned(name):
+            if isinstance(value, str):
+                rec[name] = strings(value)
+            else:
+                rec[name] = _intern(value)
+    return rec
+
+
+def _intern(value):
+    """Return value, with the strings of it or of its items interned."""
+    if isinstance(value, str):
+        return strings(value)
+    if isinstance(value, list):
+        return [strings(v) if isinstance(v, str) else v for v in value]
+    if isinstance(value, frozenset):
+        return frozenset(strings(v) if isinstance(v, str) else v
+                         for v in value)
+    return value
@@ -0,0 +1,331 @@
+#!/usr/bin/python3
+"""Defines the MappedStorage class."""
+import io
+import json
+import mmap
+from collections.abc import Mapping
+from datetime import datetime
+from models.base_model import BaseModel, classes
+from models.engine.formats import MappedFormat
+from models.engine import indexes
+from models.engine.indexes import matches, operators
+
+
+class MappedModel:
+    """Represent a read-only view of a record of a mapped file.
+
+    Attributes are decoded from the file each time they are read, and
+    cannot be set. Lists whose class default is a frozenset are decoded
+    as frozensets. __class__ reports the model class of the record, so
+    to_dict(), __str__() and isinstance() behave like the model class.
+    """
+
+    __slots__ = ("_buf", "_pos", "_model")
+
+    def __init__(self, buf, pos, model):
+        """Initialize a new view.
+
+        Args:
+            buf (mmap.mmap): The mapped file.
+            pos (int): The position of the record in buf.
+            model (type): The model class of the record.
+        """
+        object.__setattr__(self, "_buf", buf)
+        object.__setattr__(self, "_pos", pos)
+        object.__setattr__(self, "_model", model)
+
+    @property
+    def __class__(self):
+        """The model class of the record."""
+        return self._model
+
+    @property
+    def __dict__(self):
+        """A new dictionary of the attributes of the record."""
+        rec = MappedFormat.decode(self._buf, self._pos)
+        del rec["__class__"]
+        for k in ("created_at", "updated_at"):
+            rec[k] = datetime.fromisoformat(rec[k])
+        for k, v in rec.items():
+            if isinstance(getattr(self._model, k, None), frozenset):
+                rec[k] = frozenset(v)
+        return rec
+
+    def __getattr__(self, name):
+        """Return a field of the record, or the model class attribute."""
+        if name in MappedModel.__slots__:
+            raise AttributeError(name)
+        target = name.encode()
+        for field, start, end in MappedFormat.fields(self._buf, self._pos):
+            if field == target:
+                value = json.loads(self._buf[start:end])
+                if name == "created_at" or name == "updated_at":
+                    value = datetime.fromisoformat(value)
+                elif isinstance(getattr(self._model, name, None), frozenset):
+                    value = frozenset(value)
+                return value
+        for klass in self._model.__mro__:
+            if name in klass.__dict__:
+                attr = klass.__dict__[name]
+                if hasattr(type(attr), "__get__"):
+                    return attr.__get__(self, self._model)
+                return attr
+        raise AttributeError("'{}' object has no attribute '{}'".format(
+            self._model.__name__, name))
+
+    def __setattr__(self, name, value):
+        """Refuse to set attributes: the view is read-only.
+
+        Raises:
+            io.UnsupportedOperation: Always.
+        """
+        raise io.UnsupportedOperation("'{}' object is read-only".format(
+            self._model.__name__))
+
+    to_dict = BaseModel.to_dict
+    __str__ = BaseModel.__str__
+
+
+class MappedObjects(Mapping):
+    """Represent the {key: view} objects of a range of a KeyIndex.
+
+    Views are created as they are looked up.
+    """
+
+    def __init__(self, buf, index, start, span):
+        """Initialize a new MappedObjects.
+
+        Args:
+            buf (mmap.mmap): The mapped file.
+            index (KeyIndex): The index of the mapped file.
+            start (int): The position of the first record in buf.
+            span (range): The entry numbers of the objects.
+        """
+        self.__buf = buf
+        self.__index = index
+        self.__start = start
+        self.__span = span
+
+    def __len__(self):
+        """Return the number of objects."""
+        return len(self.__span)
+
+    def __iter__(self):
+        """Yield the key of every object."""
+        for i in self.__span:
+            yield self.__index.key(i).decode()
+
+    def __getitem__(self, key):
+        """Return the view of the object of key."""
+        i = self.__index.find(key.encode())
+        if i is None or i not in self.__span:
+            raise KeyError(key)
+        return self.__view(i, key)
+
+    def items(self):
+        """Yield the (key, view) pairs of the objects."""
+        for i in self.__span:
+            key = self.__index.key(i).decode()
+            yield key, self.__view(i, key)
+
+    def values(self):
+        """Yield the view of every object."""
+        for key, view in self.items():
+            yield view
+
+    def __view(self, i, key):
+        """Return the view of entry i, of key."""
+        model = classes[key.partition(".")[0]]
+        return MappedModel(self.__buf, self.__start + self.__index[i][0],
+                           model)
+
+
+class MappedStorage:
+    """Represent a read-only storage engine over a memory-mapped file.
+
+    The file must be in the mapped format of models.engine.formats, as
+    saved by FileStorage.file_format("mapped") or formats.convert().
+    Objects are read-only views that decode their fields when they are
+    read, and processes mapping the same file share its pages.
+
+    Attributes:
+        __file_path (str): The name of the mapped file.
+        __map (mmap.mmap): The mapped file, or None if it is missing.
+        __index (KeyIndex): The index of the mapped file.
+        __start (int): The position of the first record in the file.
+    """
+
+    def __init__(self, path="file.json"):
+        """Initialize a new MappedStorage.
+
+        Args:
+            path (str): The name of the file to map.
+        """
+        self.__file_path = path
+        self.__map = None
+        self.__index = None
+        self.__start = 0
+
+    def all(self, cls=None):
+        """Return a mapping of every object, or of the objects of cls.
+
+        Args:
+            cls (type or str): The class, or class name, to filter on.
+        """
+        if self.__map is None:
+            return {}
+        if cls is None:
+            span = range(len(self.__index))
+        else:
+            if not isinstance(cls, str):
+                cls = cls.__name__
+            span = self.__index.span((cls + ".").encode())
+        return MappedObjects(self.__map, self.__index, self.__start, span)
+
+    def count(self, cls=None):
+        """Return the number of stored objects, or of objects of cls.
+
+        Args:
+            cls (type or str): The class, or class name, to count.
+        """
+        return len(self.all(cls))
+
+    def get(self, cls, id):
+        """Return the view of the object of class cls with the given id.
+
+        Args:
+            cls (type or str): The class, or class name, of the object.
+            id (str): The id of the object.
+        Returns:
+            The view, or None if there is no such object.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        return self.all(cls).get("{}.{}".format(cls, id))
+
+    def related(self, cls, name, id):
+        """Return the views of cls whose foreign key name is id, by key.
+
+        The mapped file has no reverse index, so the objects of cls are
+        scanned.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            name (str): The name of the foreign key, such as "state_id".
+            id (str): The id the foreign key refers to.
+        """
+        return {key: view for key, view in self.all(cls).items()
+                if getattr(view, name, None) == id}
+
+    def where(self, cls, *conditions):
+        """Return the views of cls meeting every condition, by key.
+
+        The mapped file has no sorted indexes, so the objects of cls are
+        scanned.
+
+        Args:
+            cls (type or str): The class, or class name, of the objects.
+            *conditions (tuple): (name, op, value) conditions, where op
+                is "=", "<", "<=", ">" or ">=".
+        Raises:
+            KeyError: If an operator is unknown.
+        """
+        for name, op, value in conditions:
+            if op not in operators:
+                raise KeyError(op)
+        return {key: view for key, view in self.all(cls).items()
+                if matches(view, conditions)}
+
+    def box(self, south, west, north, east):
+        """Return the views of the places located in a bounding box, by key.
+
+        There is no spatial index, so every place is scanned; see
+        FileStorage.box() for the arguments.
+        """
+        return indexes.box(self.all("Place"), south, west, north, east)
+
+    def within(self, lat, lon, km):
+        """Return the views of the places within km of a point, nearest first.
+
+        There is no spatial index, so every place is scanned.
+        """
+        return indexes.within(self.all("Place"), lat, lon, km)
+
+    def nearest(self, lat, lon, k=1):
+        """Return the k views of the places nearest to a point, nearest first.
+
+        There is no spatial index, so every place is scanned.
+        """
+        return indexes.nearest(self.all("Place"), lat, lon, k)
+
+    def search(self, cls, terms, limit=None):
+        """Return the views of cls matching the words of terms.
+
+        There is no text index, so the objects of cls are scanned; see
+        FileStorage.search() for the arguments.
+        """
+        if not isinstance(cls, str):
+            cls = cls.__name__
+        return indexes.search(self.all(cls), cls, terms, limit)
+
+    def having(self, all_of=(), any_of=(), none_of=()):
+        """Return the views of the places with the given amenities, by key.
+
+        There is no amenity index, so every place is scanned; see
+        FileStorage.having() for the arguments.
+        """
+        return indexes.having(self.all("Place"), all_of, any_of, none_of)
+
+    def new(self, obj):
+        """Refuse to store obj: the storage is read-only."""
+        raise io.UnsupportedOperation("storage is read-only")
+
+    def delete(self, obj):
+        """Refuse to delete obj: the storage is read-only."""
+        raise io.UnsupportedOperation("storage is read-only")
+
+    def mark(self, obj, name=None, *old):
+        """Do nothing: objects cannot be stored, so none can change."""
+
+    def save(self):
+        """Do nothing: there are no changes to save."""
+
+    def flush(self):
+        """Do nothing: there are no changes to write."""
+
+    def begin(self):
+        """Do nothing: there are no changes to group."""
+
+    def commit(self):
+        """Do nothing: there are no changes to save."""
+
+    def rollback(self):
+        """Do nothing: there are no changes to undo."""
+
+    def reload(self, *, progress=None):
+        """Map the file again, if it exists.
+
+        Args:
+            progress (callable): Called once with the number of objects.
+        Raises:
+            ValueError: If the file is not in the mapped format.
+        """
+        if self.__map is not None:
+            self.__map.close()
+            self.__map = None
+        try:
+            with open(self.__file_path, "rb") as f:
+                self.__map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            pass
+        except ValueError:
+            raise ValueError("{} is empty".format(self.__file_path))
+        if self.__map is not None:
+            try:
+                self.__index, self.__start = MappedFormat.open(self.__map)
+            except ValueError:
+                self.__map.close()
+                self.__map = None
+                raise
+        if progress is not None:
+            progress(self.count())
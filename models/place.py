@@ -1,8 +1,18 @@
 #!/usr/bin/python3
 """Defines the Place class."""
+import models
 from models.base_model import BaseModel
 
 
+def id_set(ids):
+    """Return the frozenset of the ids ids, or of the single id ids."""
+    if isinstance(ids, frozenset):
+        return ids
+    if isinstance(ids, str):
+        return frozenset((ids,))
+    return frozenset(ids)
+
+
 class Place(BaseModel):
     """Represent a place.
 
@@ -17,7 +27,9 @@ class Place(BaseModel):
         price_by_night (int): The price by night of the place.
         latitude (float): The latitude of the place.
         longitude (float): The longitude of the place.
-        amenity_ids (list): A list of Amenity ids.
+        amenity_ids (frozenset): The set of Amenity ids. Lists and sets
+            given to a place are stored as frozensets, so the set of a
+            place can only change by setting amenity_ids again.
     """
 
     city_id = ""
@@ -30,4 +42,27 @@ class Place(BaseModel):
     price_by_night = 0
     latitude = 0.0
     longitude = 0.0
-    amenity_ids = []
+    amenity_ids = frozenset()
+
+    def __init__(self, *args, **kwargs):
+        """Initialize a new Place.
+
+        Args:
+            *args (any): Unused.
+            **kwargs (dict): Key/value pairs of attributes.
+        """
+        super().__init__(*args, **kwargs)
+        if "amenity_ids" in self.__dict__:
+            self.__dict__["amenity_ids"] = id_set(self.amenity_ids)
+
+    def __setattr__(self, name, value):
+        """Set an attribute, storing amenity_ids as a frozenset."""
+        if name == "amenity_ids":
+            value = id_set(value)
+        super().__setattr__(name, value)
+
+    @property
+    def reviews(self):
+        """The list of the Review instances of the place."""
+        return list(models.storage.related(
+            "Review", "place_id", self.id).values())
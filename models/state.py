@@ -1,5 +1,6 @@
 #!/usr/bin/python3
 """Defines the State class."""
+import models
 from models.base_model import BaseModel
 
 
@@ -11,3 +12,9 @@ class State(BaseModel):
     """
 
     name = ""
+
+    @property
+    def cities(self):
+        """The list of the City instances of the state."""
+        return list(models.storage.related(
+            "City", "state_id", self.id).values())
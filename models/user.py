@@ -1,5 +1,6 @@
 #!/usr/bin/python3
 """Defines the User class."""
+import models
 from models.base_model import BaseModel
 
 
@@ -17,3 +18,15 @@ class User(BaseModel):
     password = ""
     first_name = ""
     last_name = ""
+
+    @property
+    def places(self):
+        """The list of the Place instances the user owns."""
+        return list(models.storage.related(
+            "Place", "user_id", self.id).values())
+
+    @property
+    def reviews(self):
+        """The list of the Review instances the user wrote."""
+        return list(models.storage.related(
+            "Review", "user_id", self.id).values())
@@ -10,12 +10,26 @@ Unittest classes:
     TestHBNBCommand_all
     TestHBNBCommand_destroy
     TestHBNBCommand_update
+    TestHBNBCommand_count
+    TestHBNBCommand_where
+    TestHBNBCommand_spatial
+    TestHBNBCommand_search
+    TestHBNBCommand_having
+    TestHBNBCommand_transaction
+    TestHBNBCommand_export_import
+    TestHBNBCommand_stats
+    TestHBNBCommand_read_only
 """
 import os
 import sys
+import json
+import shutil
 import unittest
 from models import storage
 from models.engine.file_storage import FileStorage
+from models.engine.interning import strings
+from models.engine.mapped_storage import MappedStorage
+from models.user import User
 from console import HBNBCommand
 from io import StringIO
 from unittest.mock import patch
@@ -96,13 +110,61 @@ class TestHBNBCommand_help(unittest.TestCase):
             self.assertFalse(HBNBCommand().onecmd("help update"))
             self.assertEqual(h, output.getvalue().strip())
 
+    def test_help_begin(self):
+        h = ("Usage: begin\n        "
+             "Start a transaction: changes are saved together on commit.")
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("help begin"))
+            self.assertEqual(h, output.getvalue().strip())
+
+    def test_help_commit(self):
+        h = "Usage: commit\n        Save the changes made since begin."
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("help commit"))
+            self.assertEqual(h, output.getvalue().strip())
+
+    def test_help_rollback(self):
+        h = "Usage: rollback\n        Discard the changes made since begin."
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("help rollback"))
+            self.assertEqual(h, output.getvalue().strip())
+
+    def test_help_export(self):
+        h = ("Usage: export <path> or export <class> <path>\n        "
+             "Write all instances, or those of a given class, to a file with\n"
+             "        one JSON record per line.")
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("help export"))
+            self.assertEqual(h, output.getvalue().strip())
+
+    def test_help_import(self):
+        h = ("Usage: import <path>\n        "
+             "Create the instances recorded in a file, one record at a time."
+             "\n        The file may be in any storage format.")
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("help import"))
+            self.assertEqual(h, output.getvalue().strip())
+
+    def test_help_stats(self):
+        h = ("Usage: stats\n        "
+             "Display how many foreign key and class name strings are shared,"
+             "\n        and the memory this saved.")
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("help stats"))
+            self.assertEqual(h, output.getvalue().strip())
+
     def test_help(self):
         h = ("Documented commands (type help <topic>):\n"
-             "========================================\n"
-             "EOF  all  count  create  destroy  help  quit  show  update")
+             "========================================\n")
+        commands = ["EOF", "all", "begin", "box", "commit", "count",
+                    "create", "destroy", "export", "having", "help",
+                    "import", "nearest", "quit", "rollback", "search",
+                    "show", "stats", "update", "where", "within"]
         with patch("sys.stdout", new=StringIO()) as output:
             self.assertFalse(HBNBCommand().onecmd("help"))
-            self.assertEqual(h, output.getvalue().strip())
+            text = output.getvalue().strip()
+            self.assertTrue(text.startswith(h))
+            self.assertEqual(commands, sorted(text[len(h):].split()))
 
 
 class TestHBNBCommand_exit(unittest.TestCase):
@@ -116,6 +178,11 @@ class TestHBNBCommand_exit(unittest.TestCase):
         with patch("sys.stdout", new=StringIO()) as output:
             self.assertTrue(HBNBCommand().onecmd("EOF"))
 
+    def test_quit_flushes_storage(self):
+        with patch.object(storage, "flush") as flush:
+            self.assertTrue(HBNBCommand().onecmd("quit"))
+        flush.assert_called_once_with()
+
 
 class TestHBNBCommand_create(unittest.TestCase):
     """Unittests for testing create from the HBNB command interpreter."""
@@ -1500,6 +1567,39 @@ class TestHBNBCommand_update(unittest.TestCase):
         test_dict = storage.all()["Place.{}".format(testId)].__dict__
         self.assertEqual(9.8, test_dict["latitude"])
 
+    def test_update_foreign_key_moves_related(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create City")
+            cityId = output.getvalue().strip()
+        city = storage.all()["City.{}".format(cityId)]
+        HBNBCommand().onecmd("update City {} state_id s1".format(cityId))
+        self.assertEqual([city], list(storage.related(
+            "City", "state_id", "s1").values()))
+        HBNBCommand().onecmd("update City {} state_id s2".format(cityId))
+        self.assertEqual({}, storage.related("City", "state_id", "s1"))
+        HBNBCommand().onecmd("destroy City {}".format(cityId))
+        self.assertEqual({}, storage.related("City", "state_id", "s2"))
+
+    def test_update_value_is_not_evaluated(self):
+        correct = "** value missing **"
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create BaseModel")
+            testId = output.getvalue().strip()
+        testCmd = "update BaseModel {} exit(1)".format(testId)
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(testCmd))
+            self.assertEqual(correct, output.getvalue().strip())
+
+    def test_update_property(self):
+        correct = "** attribute can't be set **"
+        with patch("sys.stdout", new=StringIO()) as output:
+            HBNBCommand().onecmd("create State")
+            testId = output.getvalue().strip()
+        testCmd = "update State {} cities foo".format(testId)
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(testCmd))
+            self.assertEqual(correct, output.getvalue().strip())
+
 
 class TestHBNBCommand_count(unittest.TestCase):
     """Unittests for testing count method of HBNB comand interpreter."""
@@ -1566,5 +1666,537 @@ class TestHBNBCommand_count(unittest.TestCase):
             self.assertEqual("1", output.getvalue().strip())
 
 
+class HBNBCommandTestCase(unittest.TestCase):
+    """Base class of the console tests that run on an empty storage.
+
+    setUp moves every file of the storage aside, to the same name with
+    file.json replaced by tmp, and tearDown puts them back.
+
+    Attributes:
+        ids (list): The ids of the objects made with create().
+    """
+
+    def setUp(self):
+        self.moved = [name for name in os.listdir(".")
+                      if name.startswith("file.json")]
+        for name in self.moved:
+            os.rename(name, "tmp" + name[len("file.json"):])
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__raw = {}
+        self.ids = []
+
+    def tearDown(self):
+        for name in os.listdir("."):
+            if name.startswith("file.json"):
+                if os.path.isdir(name):
+                    shutil.rmtree(name)
+                else:
+                    os.remove(name)
+        for name in self.moved:
+            os.rename("tmp" + name[len("file.json"):], name)
+        FileStorage._FileStorage__objects = {}
+
+    def run_cmd(self, command):
+        """Return the output of command."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(command))
+            return output.getvalue().strip()
+
+    def create(self, cls_name, **attrs):
+        """Create a cls_name object with the attributes attrs."""
+        objId = self.run_cmd("create " + cls_name)
+        for name, value in attrs.items():
+            HBNBCommand().onecmd("update {} {} {} {}".format(
+                cls_name, objId, name, value))
+        self.ids.append(objId)
+
+    def found(self, cls_name, *indexes):
+        """Return the printed list of the cls_name objects at indexes."""
+        objs = storage.all(cls_name)
+        return str([str(objs["{}.{}".format(cls_name, self.ids[i])])
+                    for i in indexes])
+
+
+class TestHBNBCommand_where(HBNBCommandTestCase):
+    """Unittests for testing where method of HBNB comand interpreter."""
+
+    def setUp(self):
+        super().setUp()
+        for price, guests in [(50, 2), (80, 4), (120, 4)]:
+            self.create("Place", price_by_night=price, max_guest=guests)
+
+    def found(self, *indexes):
+        return super().found("Place", *indexes)
+
+    def test_where_missing_class(self):
+        self.assertEqual("** class name missing **", self.run_cmd("where"))
+
+    def test_where_invalid_class(self):
+        correct = "** class doesn't exist **"
+        self.assertEqual(correct, self.run_cmd("where MyModel max_guest>1"))
+
+    def test_where_invalid_condition(self):
+        correct = "** invalid condition **"
+        self.assertEqual(correct, self.run_cmd("where Place max_guest"))
+        self.assertEqual(correct, self.run_cmd("where Place max_guest!=1"))
+
+    def test_where_space_notation(self):
+        self.assertEqual(self.found(1), self.run_cmd(
+            "where Place price_by_night<100 max_guest>=4"))
+        self.assertEqual(self.found(0, 1, 2), self.run_cmd("where Place"))
+        self.assertEqual("[]", self.run_cmd("where Place max_guest=5"))
+
+    def test_where_dot_notation(self):
+        self.assertEqual(self.found(1, 2), self.run_cmd(
+            "Place.where(max_guest=4, price_by_night>50)"))
+
+    def test_where_string_value(self):
+        HBNBCommand().onecmd('update Place {} name "My Loft"'.format(
+            self.ids[2]))
+        self.assertEqual(self.found(2), self.run_cmd(
+            'where Place "name=My Loft"'))
+
+    def test_where_after_destroy(self):
+        HBNBCommand().onecmd("destroy Place {}".format(self.ids[0]))
+        self.assertEqual(self.found(1), self.run_cmd(
+            "where Place price_by_night<100"))
+
+
+class TestHBNBCommand_spatial(HBNBCommandTestCase):
+    """Unittests for testing spatial methods of HBNB comand interpreter."""
+
+    def setUp(self):
+        super().setUp()
+        for lat, lon in [(48.8566, 2.3522), (51.5072, -0.1276)]:
+            self.create("Place", latitude=lat, longitude=lon)
+
+    def found(self, *indexes):
+        return super().found("Place", *indexes)
+
+    def test_box(self):
+        self.assertEqual(self.found(0, 1), self.run_cmd("box 45 -5 55 5"))
+        self.assertEqual("[]", self.run_cmd("box 0 0 10 10"))
+
+    def test_within(self):
+        self.assertEqual(self.found(1, 0), self.run_cmd("within 52 0 400"))
+        self.assertEqual(self.found(1), self.run_cmd("within 52 0 100"))
+
+    def test_nearest(self):
+        self.assertEqual(self.found(0), self.run_cmd("nearest 48 2"))
+        self.assertEqual(self.found(1, 0), self.run_cmd("nearest 52 0 5"))
+
+    def test_coordinates_missing(self):
+        correct = "** coordinates missing **"
+        self.assertEqual(correct, self.run_cmd("box 1 2 3"))
+        self.assertEqual(correct, self.run_cmd("within 1"))
+        self.assertEqual(correct, self.run_cmd("nearest"))
+
+    def test_distance_missing(self):
+        self.assertEqual("** distance missing **",
+                         self.run_cmd("within 1 2"))
+
+    def test_invalid_coordinates(self):
+        correct = "** invalid coordinates **"
+        self.assertEqual(correct, self.run_cmd("box 0 0 91 0"))
+        self.assertEqual(correct, self.run_cmd("within a 0 1"))
+        self.assertEqual(correct, self.run_cmd("within 0 0 -1"))
+        self.assertEqual(correct, self.run_cmd("nearest 0 181 1"))
+
+    def test_invalid_count(self):
+        correct = "** invalid count **"
+        self.assertEqual(correct, self.run_cmd("nearest 1 2 0"))
+        self.assertEqual(correct, self.run_cmd("nearest 1 2 -3"))
+        self.assertEqual(correct, self.run_cmd("nearest 1 2 many"))
+
+
+class TestHBNBCommand_search(HBNBCommandTestCase):
+    """Unittests for testing search method of HBNB comand interpreter."""
+
+    def setUp(self):
+        super().setUp()
+        for text in ["Clean and quiet", "Noisy but clean"]:
+            self.create("Review", text='"{}"'.format(text))
+
+    def found(self, *indexes):
+        return super().found("Review", *indexes)
+
+    def test_search_missing_class(self):
+        self.assertEqual("** class name missing **", self.run_cmd("search"))
+
+    def test_search_invalid_class(self):
+        correct = "** class doesn't exist **"
+        self.assertEqual(correct, self.run_cmd("search MyModel clean"))
+
+    def test_search_missing_terms(self):
+        correct = "** terms missing **"
+        self.assertEqual(correct, self.run_cmd("search Review"))
+        self.assertEqual(correct, self.run_cmd("Review.search()"))
+
+    def test_search_space_notation(self):
+        self.assertEqual(self.found(0), self.run_cmd("search Review quiet"))
+        self.assertEqual(self.found(1, 0),
+                         self.run_cmd("search Review noisy clean"))
+        self.assertEqual("[]", self.run_cmd("search Review pool"))
+
+    def test_search_dot_notation(self):
+        self.assertEqual(self.found(1), self.run_cmd("Review.search(noisy)"))
+        self.assertEqual(self.found(0, 1),
+                         self.run_cmd('Review.search("quiet clean")'))
+
+    def test_search_after_update(self):
+        HBNBCommand().onecmd('update Review {} text "Lovely"'.format(
+            self.ids[0]))
+        self.assertEqual(self.found(1), self.run_cmd("search Review clean"))
+        self.assertEqual(self.found(0), self.run_cmd("search Review lovely"))
+
+
+class TestHBNBCommand_having(HBNBCommandTestCase):
+    """Unittests for testing having method of HBNB comand interpreter."""
+
+    def setUp(self):
+        super().setUp()
+        for ids in ['["wifi", "pool"]', '["wifi"]', "pool"]:
+            self.create("Place", amenity_ids=ids)
+
+    def found(self, *indexes):
+        return super().found("Place", *indexes)
+
+    def test_having_missing_ids(self):
+        self.assertEqual("** amenity ids missing **", self.run_cmd("having"))
+
+    def test_update_stores_frozenset(self):
+        objs = storage.all("Place")
+        self.assertEqual(frozenset(["wifi", "pool"]),
+                         objs["Place." + self.ids[0]].amenity_ids)
+        self.assertEqual(frozenset(["pool"]),
+                         objs["Place." + self.ids[2]].amenity_ids)
+
+    def test_having_all(self):
+        self.assertEqual(self.found(0, 1), self.run_cmd("having wifi"))
+        self.assertEqual(self.found(0), self.run_cmd("having wifi pool"))
+        self.assertEqual("[]", self.run_cmd("having pets"))
+
+    def test_having_any_and_none(self):
+        self.assertEqual(self.found(0, 1, 2),
+                         self.run_cmd("having |wifi |pool"))
+        self.assertEqual(self.found(2), self.run_cmd("having pool -wifi"))
+        self.assertEqual(self.found(1), self.run_cmd("having -pool"))
+
+    def test_having_after_update(self):
+        HBNBCommand().onecmd('update Place {} amenity_ids ["pets"]'.format(
+            self.ids[0]))
+        self.assertEqual(self.found(1), self.run_cmd("having wifi"))
+        self.assertEqual(self.found(0), self.run_cmd("having pets"))
+
+
+class TestHBNBCommand_transaction(unittest.TestCase):
+    """Unittests for testing transactions of the HBNB command interpreter."""
+
+    @classmethod
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    @classmethod
+    def tearDown(self):
+        storage.rollback()
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+
+    def test_commit_saves_once(self):
+        self.assertFalse(HBNBCommand().onecmd("begin"))
+        with patch("sys.stdout", new=StringIO()) as output:
+            for i in range(3):
+                self.assertFalse(HBNBCommand().onecmd("create User"))
+            ids = output.getvalue().split()
+        self.assertFalse(os.path.exists("file.json"))
+        self.assertFalse(HBNBCommand().onecmd("commit"))
+        with open("file.json", "r") as f:
+            text = f.read()
+            for id in ids:
+                self.assertIn("User." + id, text)
+
+    def test_rollback_restores_objects(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("create User"))
+            kept = output.getvalue().strip()
+            self.assertFalse(HBNBCommand().onecmd("create User"))
+            gone = output.getvalue().split()[1]
+        self.assertFalse(HBNBCommand().onecmd("begin"))
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("create User"))
+            new = output.getvalue().strip()
+        cmd = "update User {} first_name 'Betty'".format(kept)
+        self.assertFalse(HBNBCommand().onecmd(cmd))
+        self.assertFalse(HBNBCommand().onecmd("destroy User " + gone))
+        self.assertFalse(HBNBCommand().onecmd("rollback"))
+        self.assertEqual({"User." + kept, "User." + gone},
+                         set(storage.all()))
+        self.assertNotIn("first_name",
+                         storage.all()["User." + kept].__dict__)
+        self.assertEqual(2, storage.count("User"))
+
+
+class TestHBNBCommand_export_import(unittest.TestCase):
+    """Unittests for testing export and import of the HBNB command
+    interpreter."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        for name in ("file.json", "dump.ndjson"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def create(self, *classes):
+        with patch("sys.stdout", new=StringIO()) as output:
+            for cls_name in classes:
+                self.assertFalse(HBNBCommand().onecmd("create " + cls_name))
+            return output.getvalue().split()
+
+    def test_export_missing_path(self):
+        correct = "** file path missing **"
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("export"))
+            self.assertEqual(correct, output.getvalue().strip())
+
+    def test_export_class_missing_path(self):
+        correct = "** file path missing **"
+        self.create("User")
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("export User"))
+            self.assertEqual(correct, output.getvalue().strip())
+        self.assertFalse(os.path.exists("User"))
+
+    def test_export_invalid_class(self):
+        correct = "** class doesn't exist **"
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("export MyModel x"))
+            self.assertEqual(correct, output.getvalue().strip())
+        self.assertFalse(os.path.exists("x"))
+
+    def test_export_all(self):
+        ids = self.create("User", "State")
+        self.assertFalse(HBNBCommand().onecmd("export dump.ndjson"))
+        with open("dump.ndjson", "r") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(sorted(ids), sorted(rec["id"] for rec in lines))
+        self.assertEqual({"User", "State"},
+                         {rec["__class__"] for rec in lines})
+
+    def test_export_class(self):
+        ids = self.create("User", "State", "User")
+        self.assertFalse(HBNBCommand().onecmd("export User dump.ndjson"))
+        with open("dump.ndjson", "r") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(sorted([ids[0], ids[2]]),
+                         sorted(rec["id"] for rec in lines))
+
+    def test_export_invalid_path(self):
+        correct = "** file can't be written **"
+        for path in ("nope/dir/dump.ndjson", "."):
+            with patch("sys.stdout", new=StringIO()) as output:
+                self.assertFalse(HBNBCommand().onecmd("export " + path))
+                self.assertEqual(correct, output.getvalue().strip())
+
+    def test_import_missing_path(self):
+        correct = "** file path missing **"
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("import"))
+            self.assertEqual(correct, output.getvalue().strip())
+
+    def test_import_missing_file(self):
+        correct = "** file doesn't exist **"
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("import nope.ndjson"))
+            self.assertEqual(correct, output.getvalue().strip())
+
+    def test_import_directory(self):
+        correct = "** file can't be read **"
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("import ."))
+            self.assertEqual(correct, output.getvalue().strip())
+
+    def test_export_then_import(self):
+        ids = self.create("User", "Place")
+        obj = storage.all()["User." + ids[0]]
+        obj.first_name = "Betty"
+        self.assertFalse(HBNBCommand().onecmd("export dump.ndjson"))
+        FileStorage._FileStorage__objects = {}
+        self.assertFalse(HBNBCommand().onecmd("import dump.ndjson"))
+        self.assertEqual({"User." + ids[0], "Place." + ids[1]},
+                         set(storage.all()))
+        self.assertEqual(obj.to_dict(),
+                         storage.all()["User." + ids[0]].to_dict())
+        with open("file.json", "r") as f:
+            self.assertIn("Place." + ids[1], f.read())
+
+    def test_import_json_file(self):
+        ids = self.create("User")
+        FileStorage._FileStorage__objects = {}
+        self.assertFalse(HBNBCommand().onecmd("import file.json"))
+        self.assertEqual(["User." + ids[0]], list(storage.all()))
+
+    def test_import_skips_unknown_classes(self):
+        with open("dump.ndjson", "w") as f:
+            f.write('{"id": "1", "__class__": "MyModel"}\n')
+            f.write('{"id": "2", "created_at": "2017-09-28T21:03:54",'
+                    ' "updated_at": "2017-09-28T21:03:54",'
+                    ' "__class__": "User"}\n')
+        self.assertFalse(HBNBCommand().onecmd("import dump.ndjson"))
+        self.assertEqual(["User.2"], list(storage.all()))
+
+    def test_import_invalid_record(self):
+        with open("dump.ndjson", "w") as f:
+            f.write('{"id": "2", "created_at": "2017-09-28T21:03:54",'
+                    ' "updated_at": "2017-09-28T21:03:54",'
+                    ' "__class__": "User"}\n{"id": \n')
+        correct = "** invalid record **"
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("import dump.ndjson"))
+            self.assertEqual(correct, output.getvalue().strip())
+        self.assertEqual(["User.2"], list(storage.all()))
+
+
+class TestHBNBCommand_stats(unittest.TestCase):
+    """Unittests for testing stats of the HBNB command interpreter."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        strings.clear()
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_stats_empty(self):
+        correct = ("interned strings: 0\nshared references: 0\n"
+                   "memory saved: 0 bytes")
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("stats"))
+            self.assertEqual(correct, output.getvalue().strip())
+
+    def test_update_interns_foreign_keys(self):
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("create Review"))
+            self.assertFalse(HBNBCommand().onecmd("create Review"))
+            ids = output.getvalue().split()
+        for id in ids:
+            cmd = "update Review {} user_id user-1".format(id)
+            self.assertFalse(HBNBCommand().onecmd(cmd))
+        cmd = "Review.update({}, {{'place_id': 'p', 'text': 't'}})"
+        self.assertFalse(HBNBCommand().onecmd(cmd.format(ids[0])))
+        first, second = (storage.all()["Review." + id] for id in ids)
+        self.assertIs(first.user_id, second.user_id)
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd("stats"))
+            lines = output.getvalue().splitlines()
+        self.assertEqual("interned strings: 2", lines[0])
+        self.assertEqual("shared references: 1", lines[1])
+        self.assertNotEqual("memory saved: 0 bytes", lines[2])
+
+
+class TestHBNBCommand_read_only(unittest.TestCase):
+    """Unittests for testing the HBNB command interpreter on a read-only
+    storage."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        storage.file_format("mapped")
+        self.user = User()
+        storage.save()
+        storage.file_format("json")
+        mapped = MappedStorage()
+        mapped.reload()
+        patcher = patch("models.storage", mapped)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch("console.storage", mapped)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def run_command(self, command):
+        """Return the output of command."""
+        with patch("sys.stdout", new=StringIO()) as output:
+            self.assertFalse(HBNBCommand().onecmd(command))
+        return output.getvalue().strip()
+
+    def test_create(self):
+        self.assertEqual("** storage is read-only **",
+                         self.run_command("create User"))
+
+    def test_destroy(self):
+        correct = "** storage is read-only **"
+        cmd = "destroy User {}".format(self.user.id)
+        self.assertEqual(correct, self.run_command(cmd))
+        cmd = "User.destroy({})".format(self.user.id)
+        self.assertEqual(correct, self.run_command(cmd))
+
+    def test_update(self):
+        correct = "** storage is read-only **"
+        cmd = "update User {} first_name Betty".format(self.user.id)
+        self.assertEqual(correct, self.run_command(cmd))
+        cmd = "User.update({}, {{'first_name': 'Betty'}})"
+        self.assertEqual(correct, self.run_command(cmd.format(self.user.id)))
+
+    def test_import(self):
+        with open("dump.ndjson", "w") as f:
+            f.write(json.dumps({"__class__": "User", "id": "2"}) + "\n")
+        self.addCleanup(os.remove, "dump.ndjson")
+        self.assertEqual("** storage is read-only **",
+                         self.run_command("import dump.ndjson"))
+
+    def test_show_still_works(self):
+        cmd = "show User {}".format(self.user.id)
+        self.assertIn(self.user.id, self.run_command(cmd))
+
+
 if __name__ == "__main__":
     unittest.main()
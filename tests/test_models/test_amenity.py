@@ -90,20 +90,22 @@ class TestAmenity_save(unittest.TestCase):
 
     @classmethod
     def setUp(self):
-        try:
-            os.rename("file.json", "tmp")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.bak"):
+            try:
+                os.rename(name, "tmp" + name[9:])
+            except IOError:
+                pass
 
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
-        try:
-            os.rename("tmp", "file.json")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.bak"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+            try:
+                os.rename("tmp" + name[9:], name)
+            except IOError:
+                pass
 
     def test_one_save(self):
         am = Amenity()
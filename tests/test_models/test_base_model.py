@@ -5,13 +5,16 @@ Unittest classes:
     TestBaseModel_instantiation
     TestBaseModel_save
     TestBaseModel_to_dict
+    TestBaseModel_classes
 """
 import os
 import models
 import unittest
 from datetime import datetime
 from time import sleep
-from models.base_model import BaseModel
+from unittest.mock import patch
+from models.base_model import BaseModel, classes
+from models.engine.file_storage import FileStorage
 
 
 class TestBaseModel_instantiation(unittest.TestCase):
@@ -73,6 +76,17 @@ class TestBaseModel_instantiation(unittest.TestCase):
         self.assertEqual(bm.created_at, dt)
         self.assertEqual(bm.updated_at, dt)
 
+    def test_instantiation_with_kwargs_without_microseconds(self):
+        dt = datetime(2017, 9, 28, 21, 3, 54)
+        bm = BaseModel(id="345", created_at=dt.isoformat(),
+                       updated_at="2017-09-28T21:03:54.000000")
+        self.assertEqual(bm.created_at, dt)
+        self.assertEqual(bm.updated_at, dt)
+
+    def test_instantiation_with_invalid_datetime_kwargs(self):
+        with self.assertRaises(ValueError):
+            BaseModel(id="345", created_at="28/09/2017")
+
     def test_instantiation_with_None_kwargs(self):
         with self.assertRaises(TypeError):
             BaseModel(id=None, created_at=None, updated_at=None)
@@ -85,27 +99,37 @@ class TestBaseModel_instantiation(unittest.TestCase):
         self.assertEqual(bm.created_at, dt)
         self.assertEqual(bm.updated_at, dt)
 
+    def test_instantiation_does_not_mark(self):
+        dt_iso = datetime.today().isoformat()
+        with patch.object(models.storage, "mark") as mark:
+            BaseModel(id="345", created_at=dt_iso, updated_at=dt_iso)
+            bm = BaseModel()
+        mark.assert_not_called()
+        models.storage.delete(bm)
+
 
 class TestBaseModel_save(unittest.TestCase):
     """Unittests for testing save method of the BaseModel class."""
 
     @classmethod
     def setUp(self):
-        try:
-            os.rename("file.json", "tmp")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.bak"):
+            try:
+                os.rename(name, "tmp" + name[9:])
+            except IOError:
+                pass
 
     @classmethod
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
-        try:
-            os.rename("tmp", "file.json")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.bak"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+            try:
+                os.rename("tmp" + name[9:], name)
+            except IOError:
+                pass
 
     def test_one_save(self):
         bm = BaseModel()
@@ -137,6 +161,15 @@ class TestBaseModel_save(unittest.TestCase):
         with open("file.json", "r") as f:
             self.assertIn(bmid, f.read())
 
+    def test_save_does_not_restore_deleted(self):
+        bm = BaseModel()
+        models.storage.delete(bm)
+        bm.save()
+        bmid = "BaseModel." + bm.id
+        self.assertNotIn(bmid, models.storage.all())
+        with open("file.json", "r") as f:
+            self.assertNotIn(bmid, f.read())
+
 
 class TestBaseModel_to_dict(unittest.TestCase):
     """Unittests for testing to_dict method of the BaseModel class."""
@@ -188,5 +221,50 @@ class TestBaseModel_to_dict(unittest.TestCase):
             bm.to_dict(None)
 
 
+class TestBaseModel_classes(unittest.TestCase):
+    """Unittests for testing the model class registry."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        classes.pop("Listing", None)
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_builtin_classes_registered(self):
+        self.assertEqual(
+            ["Amenity", "BaseModel", "City", "Place", "Review", "State",
+             "User"], sorted(n for n in classes if n != "Listing"))
+        self.assertIs(BaseModel, classes["BaseModel"])
+
+    def test_subclass_registered(self):
+        class Listing(BaseModel):
+            pass
+        self.assertIs(Listing, classes["Listing"])
+
+    def test_subclass_reloaded(self):
+        class Listing(BaseModel):
+            pass
+        listing = Listing()
+        listing.name = "Loft"
+        models.storage.save()
+        models.storage.reload()
+        obj = models.storage.all()["Listing." + listing.id]
+        self.assertIsInstance(obj, Listing)
+        self.assertEqual("Loft", obj.name)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -12,6 +12,7 @@ import unittest
 from datetime import datetime
 from time import sleep
 from models.city import City
+from models.place import Place
 
 
 class TestCity_instantiation(unittest.TestCase):
@@ -89,26 +90,35 @@ class TestCity_instantiation(unittest.TestCase):
         with self.assertRaises(TypeError):
             City(id=None, created_at=None, updated_at=None)
 
+    def test_places(self):
+        cy = City()
+        pl = Place()
+        pl.city_id = cy.id
+        self.assertEqual([pl], cy.places)
+        self.assertEqual([], City().places)
+
 
 class TestCity_save(unittest.TestCase):
     """Unittests for testing save method of the City class."""
 
     @classmethod
     def setUp(self):
-        try:
-            os.rename("file.json", "tmp")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.bak"):
+            try:
+                os.rename(name, "tmp" + name[9:])
+            except IOError:
+                pass
 
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
-        try:
-            os.rename("tmp", "file.json")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.bak"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+            try:
+                os.rename("tmp" + name[9:], name)
+            except IOError:
+                pass
 
     def test_one_save(self):
         cy = City()
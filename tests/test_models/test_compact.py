@@ -0,0 +1,143 @@
+#!/usr/bin/python3
+"""Defines unittests for models/compact.py.
+
+Unittest classes:
+    TestCompact_instantiation
+    TestCompact_attributes
+    TestCompact_storage
+"""
+import os
+import json
+import models
+import unittest
+from datetime import datetime
+from models.compact import compact
+from models.engine.file_storage import FileStorage
+from models.base_model import BaseModel
+from models.place import Place
+from models.review import Review
+
+
+class TestCompact_instantiation(unittest.TestCase):
+    """Unittests for testing instantiation of compact model variants."""
+
+    def test_variant_is_cached(self):
+        self.assertIs(compact(Review), compact(Review))
+
+    def test_variant_has_no_instance_dict(self):
+        self.assertEqual(0, compact(Review).__dictoffset__)
+        self.assertNotEqual(0, Review.__dictoffset__)
+
+    def test_no_args_stored_in_objects(self):
+        rv = compact(Review)()
+        self.assertIn(rv, models.storage.all().values())
+
+    def test_reports_model_class(self):
+        rv = compact(Review)()
+        self.assertIs(Review, rv.__class__)
+        self.assertIsInstance(rv, Review)
+        self.assertIsInstance(rv, BaseModel)
+
+    def test_kwargs_match_model(self):
+        dt = datetime.today().isoformat()
+        kwargs = {"id": "345", "created_at": dt, "updated_at": dt,
+                  "text": "Great", "place_id": "12"}
+        rv = Review(**kwargs)
+        crv = compact(Review)(**kwargs)
+        self.assertEqual(json.dumps(rv.to_dict()),
+                         json.dumps(crv.to_dict()))
+        self.assertEqual(str(rv), str(crv))
+
+    def test_kwargs_without_id(self):
+        rv = compact(Review)(text="Great")
+        self.assertEqual(str, type(rv.id))
+        self.assertEqual(datetime, type(rv.created_at))
+
+
+class TestCompact_attributes(unittest.TestCase):
+    """Unittests for testing attributes of compact model variants."""
+
+    def test_class_attribute_default(self):
+        pl = compact(Place)()
+        self.assertEqual(0, pl.max_guest)
+        self.assertNotIn("max_guest", pl.__dict__)
+
+    def test_set_schema_attribute(self):
+        pl = compact(Place)()
+        pl.max_guest = 4
+        self.assertEqual(4, pl.max_guest)
+        self.assertEqual(4, pl.to_dict()["max_guest"])
+
+    def test_set_ad_hoc_attribute(self):
+        pl = compact(Place)()
+        pl.my_number = 98
+        pl.my_number = 99
+        self.assertEqual(99, pl.my_number)
+        self.assertEqual(["id", "created_at", "updated_at", "my_number"],
+                         list(pl.__dict__))
+
+    def test_set_attribute_stored_as_frozenset(self):
+        pl = compact(Place)(amenity_ids=["a", "b"])
+        self.assertEqual(frozenset(["a", "b"]), pl.amenity_ids)
+        pl.amenity_ids = ["c"]
+        self.assertEqual(frozenset(["c"]), pl.amenity_ids)
+        self.assertEqual(["c"], pl.to_dict()["amenity_ids"])
+
+    def test_missing_attribute(self):
+        with self.assertRaises(AttributeError):
+            compact(Place)().my_number
+
+    def test_instances_share_attribute_names(self):
+        pl1 = compact(Place)()
+        pl2 = compact(Place)()
+        pl1.name = pl2.name = "Home"
+        self.assertIs(pl1._keys, pl2._keys)
+
+
+class TestCompact_storage(unittest.TestCase):
+    """Unittests for testing the compact mode of FileStorage."""
+
+    def setUp(self):
+        for name in ("file.json", "file.json.bak"):
+            try:
+                os.rename(name, "tmp" + name[9:])
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        models.storage.compact(False)
+        for name in ("file.json", "file.json.bak"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+            try:
+                os.rename("tmp" + name[9:], name)
+            except IOError:
+                pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_reload_builds_compact_objects(self):
+        rv = Review()
+        rv.text = "Great"
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.compact()
+        models.storage.reload()
+        crv = models.storage.get(Review, rv.id)
+        self.assertIs(compact(Review), type(crv))
+        self.assertEqual(rv.to_dict(), crv.to_dict())
+
+    def test_save_compact_objects(self):
+        rv = compact(Review)()
+        models.storage.save()
+        rv.text = "Great"
+        models.storage.save()
+        with open("file.json", "r") as f:
+            self.assertEqual(rv.to_dict(),
+                             json.load(f)["Review." + rv.id])
+
+
+if __name__ == "__main__":
+    unittest.main()
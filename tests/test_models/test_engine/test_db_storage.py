@@ -0,0 +1,305 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/db_storage.py.
+
+Unittest classes:
+    TestDBStorage_instantiation
+    TestDBStorage_methods
+    TestDBStorage_transaction
+"""
+import os
+import sqlite3
+import models
+import unittest
+from unittest.mock import patch
+from models.engine.db_storage import DBStorage, columns
+from models.base_model import BaseModel
+from models.user import User
+from models.state import State
+from models.place import Place
+from models.review import Review
+
+
+class TestDBStorage_instantiation(unittest.TestCase):
+    """Unittests for testing instantiation of the DBStorage class."""
+
+    def tearDown(self):
+        try:
+            os.remove("test.db")
+        except IOError:
+            pass
+
+    def test_DBStorage_instantiation_with_path(self):
+        self.assertEqual(DBStorage, type(DBStorage("test.db")))
+        self.assertTrue(os.path.exists("test.db"))
+
+    def test_reload_creates_tables(self):
+        DBStorage("test.db").reload()
+        with sqlite3.connect("test.db") as db:
+            tables = {r[0] for r in db.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.assertEqual({"BaseModel", "User", "State", "City", "Place",
+                          "Amenity", "Review"}, tables)
+
+    def test_reload_adds_columns(self):
+        DBStorage("test.db").reload()
+        with sqlite3.connect("test.db") as db:
+            names = [r[1] for r in db.execute("PRAGMA table_info(Place)")]
+        self.assertEqual(["id", "created_at", "updated_at", "_attrs"],
+                         names[:4])
+        self.assertEqual(sorted(columns(Place)), sorted(names[4:]))
+
+
+class TestDBStorage_methods(unittest.TestCase):
+    """Unittests for testing methods of the DBStorage class."""
+
+    def setUp(self):
+        self.storage = DBStorage("test.db")
+        self.storage.reload()
+        self.patch = patch("models.storage", self.storage)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+        self.storage._DBStorage__engine.close()
+        for name in ("test.db", "test.db-journal"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+
+    def reopen(self):
+        self.storage._DBStorage__engine.close()
+        self.storage = DBStorage("test.db")
+        self.storage.reload()
+        self.patch.stop()
+        self.patch = patch("models.storage", self.storage)
+        self.patch.start()
+
+    def test_new_and_all(self):
+        us = User()
+        self.assertIn("User." + us.id, self.storage.all())
+        self.assertIs(us, self.storage.all(User)["User." + us.id])
+        self.assertEqual({}, self.storage.all(State))
+
+    def test_related(self):
+        st = State()
+        pl = Place()
+        pl.user_id = "u1"
+        Place().user_id = "u2"
+        rv = Review()
+        rv.user_id = "u1"
+        pl.save()
+        self.reopen()
+        self.assertEqual(["Place." + pl.id],
+                         list(self.storage.related(Place, "user_id", "u1")))
+        self.assertEqual({}, self.storage.related("Place", "user_id", "u3"))
+        self.assertEqual({}, self.storage.related("Nope", "user_id", "u1"))
+
+    def test_related_unsaved(self):
+        rv = Review()
+        rv.place_id = "p1"
+        self.assertIs(rv, self.storage.related(
+            "Review", "place_id", "p1")["Review." + rv.id])
+
+    def test_where(self):
+        places = [Place() for i in range(3)]
+        for pl, price in zip(places, [50, 100, 150]):
+            pl.price_by_night = price
+        places[1].name = "Loft"
+        places[1].color = "red"
+        pl.save()
+        self.reopen()
+        self.assertEqual(["Place." + places[0].id], list(self.storage.where(
+            Place, ("price_by_night", "<", 100))))
+        self.assertEqual(["Place." + places[1].id], list(self.storage.where(
+            "Place", ("price_by_night", ">=", 100), ("name", "=", "Loft"),
+            ("color", "=", "red"))))
+        self.assertEqual(3, len(self.storage.where(
+            Place, ("max_guest", "=", 0))))
+        with self.assertRaises(KeyError):
+            self.storage.where(Place, ("max_guest", "!", 0))
+
+    def test_spatial(self):
+        pl = Place()
+        pl.latitude = 48.8566
+        pl.longitude = 2.3522
+        Place()
+        pl.save()
+        self.reopen()
+        key = "Place." + pl.id
+        self.assertEqual([key], list(self.storage.box(45, 0, 50, 5)))
+        self.assertEqual([key], list(self.storage.within(48, 2, 100)))
+        self.assertEqual([key], list(self.storage.nearest(0, 0, 5)))
+        with self.assertRaises(ValueError):
+            self.storage.within(0, 0, -1)
+
+    def test_search(self):
+        reviews = [Review() for i in range(3)]
+        for rv, text in zip(reviews, ["Clean and quiet", "Noisy", "Clean"]):
+            rv.text = text
+        rv.save()
+        self.reopen()
+        self.assertEqual(["Review." + reviews[0].id], list(
+            self.storage.search(Review, "quiet clean", 1)))
+        self.assertEqual(["Review." + reviews[1].id], list(
+            self.storage.search("Review", "noisy")))
+        self.assertEqual({}, self.storage.search("Place", "clean"))
+
+    def test_having(self):
+        places = [Place() for i in range(3)]
+        for pl, ids in zip(places, [["wifi", "pool"], ["wifi"], []]):
+            pl.amenity_ids = ids
+        pl.save()
+        self.reopen()
+        self.assertEqual({"Place." + pl.id for pl in places[:2]},
+                         set(self.storage.having(["wifi"])))
+        self.assertEqual(["Place." + places[1].id], list(
+            self.storage.having(["wifi"], none_of=["pool"])))
+        self.assertEqual(frozenset(["wifi", "pool"]), self.storage.get(
+            Place, places[0].id).amenity_ids)
+
+    def test_reload_creates_indexes(self):
+        with sqlite3.connect("test.db") as db:
+            names = {r[0] for r in db.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index' "
+                "AND tbl_name = 'Review'")}
+        self.assertIn("Review.place_id", names)
+        self.assertIn("Review.user_id", names)
+
+    def test_all_with_class_name(self):
+        st = State()
+        self.assertEqual(["State." + st.id], list(self.storage.all("State")))
+
+    def test_save_and_reload(self):
+        pl = Place()
+        pl.name = "Home"
+        pl.number_rooms = 3
+        pl.latitude = 1.5
+        pl.amenity_ids = ["a", "b"]
+        pl.color = "red"
+        pl.save()
+        self.reopen()
+        loaded = self.storage.get(Place, pl.id)
+        self.assertIsNot(pl, loaded)
+        self.assertEqual(pl.to_dict(), loaded.to_dict())
+
+    def test_save_upserts(self):
+        us = User()
+        us.save()
+        us.first_name = "Betty"
+        us.save()
+        self.reopen()
+        self.assertEqual("Betty", self.storage.get(User, us.id).first_name)
+        self.assertEqual(1, self.storage.count(User))
+
+    def test_unsaved_changes_are_discarded(self):
+        us = User()
+        us.save()
+        us.first_name = "Betty"
+        self.assertEqual(1, self.storage.count())
+        self.reopen()
+        self.assertNotIn("first_name",
+                         self.storage.get(User, us.id).__dict__)
+
+    def test_unset_attributes_use_class_default(self):
+        rv = Review()
+        rv.save()
+        self.reopen()
+        loaded = self.storage.get(Review, rv.id)
+        self.assertEqual(rv.to_dict(), loaded.to_dict())
+        self.assertEqual("", loaded.text)
+
+    def test_lookups_return_the_same_object(self):
+        us = User()
+        us.save()
+        self.reopen()
+        obj = self.storage.get(User, us.id)
+        self.assertIs(obj, self.storage.get("User", us.id))
+        self.assertIs(obj, self.storage.all(User)["User." + us.id])
+
+    def test_get_missing(self):
+        self.assertIsNone(self.storage.get(User, "nope"))
+        self.assertIsNone(self.storage.get("Nope", "nope"))
+
+    def test_count(self):
+        User()
+        User()
+        State()
+        self.assertEqual(3, self.storage.count())
+        self.assertEqual(2, self.storage.count(User))
+        self.assertEqual(1, self.storage.count("State"))
+        self.assertEqual(0, self.storage.count("Nope"))
+
+    def test_delete(self):
+        us = User()
+        us.save()
+        self.storage.delete(us)
+        self.assertIsNone(self.storage.get(User, us.id))
+        self.storage.save()
+        self.reopen()
+        self.assertEqual(0, self.storage.count())
+
+    def test_base_model(self):
+        bm = BaseModel()
+        bm.save()
+        self.reopen()
+        self.assertEqual(bm.to_dict(),
+                         self.storage.get(BaseModel, bm.id).to_dict())
+
+    def test_flush(self):
+        self.assertIsNone(self.storage.flush())
+
+    def test_progress(self):
+        User().save()
+        counts = []
+        self.storage.reload(progress=counts.append)
+        self.assertEqual([1], counts)
+
+
+class TestDBStorage_transaction(unittest.TestCase):
+    """Unittests for testing transactions of the DBStorage class."""
+
+    def setUp(self):
+        self.storage = DBStorage("test.db")
+        self.storage.reload()
+        self.patch = patch("models.storage", self.storage)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+        self.storage._DBStorage__engine.close()
+        for name in ("test.db", "test.db-journal"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+
+    def test_commit(self):
+        self.storage.begin()
+        us = User()
+        us.save()
+        self.storage.commit()
+        self.storage.rollback()
+        self.assertIsNotNone(self.storage.get(User, us.id))
+
+    def test_rollback(self):
+        us = User()
+        us.save()
+        self.storage.begin()
+        us.first_name = "Betty"
+        State().save()
+        self.storage.rollback()
+        self.assertEqual(0, self.storage.count(State))
+        self.assertNotIn("first_name",
+                         self.storage.get(User, us.id).__dict__)
+
+    def test_transaction_rolls_back_on_error(self):
+        with self.assertRaises(KeyError):
+            with self.storage.transaction():
+                User().save()
+                raise KeyError
+        self.assertEqual(0, self.storage.count())
+
+
+if __name__ == "__main__":
+    unittest.main()
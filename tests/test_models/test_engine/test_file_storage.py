@@ -4,14 +4,37 @@
 Unittest classes:
     TestFileStorage_instantiation
     TestFileStorage_methods
+    TestFileStorage_journal
+    TestFileStorage_dirty
+    TestFileStorage_iterload
+    TestFileStorage_lazy
+    TestFileStorage_atomic
+    TestFileStorage_transaction
+    TestFileStorage_write_behind
+    TestFileStorage_shards
+    TestFileStorage_workers
+    TestFileStorage_key_index
+    TestFileStorage_related
+    TestFileStorage_where
+    TestFileStorage_spatial
+    TestFileStorage_search
+    TestFileStorage_having
 """
 import os
+import sys
 import json
+import shutil
 import models
+import subprocess
 import unittest
+from io import StringIO
+from time import sleep
 from datetime import datetime
+from unittest.mock import patch
 from models.base_model import BaseModel
-from models.engine.file_storage import FileStorage
+from models.engine.file_storage import FileStorage, iterload, atomic_open
+from models.engine.file_storage import decode
+from models.engine.indexes import TextIndex
 from models.user import User
 from models.state import State
 from models.place import Place
@@ -20,6 +43,48 @@ from models.amenity import Amenity
 from models.review import Review
 
 
+class FileStorageTestCase(unittest.TestCase):
+    """Base class of the tests that run on an empty FileStorage.
+
+    setUp moves every file of the storage aside, to the same name with
+    file.json replaced by tmp, and tearDown puts them back.
+
+    Attributes:
+        objs (list): The objects the test looks up with found().
+    """
+
+    def setUp(self):
+        self.moved = [name for name in os.listdir(".")
+                      if name.startswith("file.json")]
+        for name in self.moved:
+            os.rename(name, "tmp" + name[len("file.json"):])
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__raw = {}
+        self.objs = []
+
+    def tearDown(self):
+        models.storage.text_index(False)
+        models.storage.lazy(False)
+        FileStorage._FileStorage__raw = {}
+        for name in os.listdir("."):
+            if name.startswith("file.json"):
+                if os.path.isdir(name):
+                    shutil.rmtree(name)
+                else:
+                    os.remove(name)
+        for name in self.moved:
+            os.rename("tmp" + name[len("file.json"):], name)
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__dirty = set()
+        FileStorage._FileStorage__deleted = set()
+        FileStorage._FileStorage__unsaved = False
+
+    def found(self, *indexes):
+        """Return the keys of the objects of objs at indexes."""
+        return ["{}.{}".format(type(self.objs[i]).__name__, self.objs[i].id)
+                for i in indexes]
+
+
 class TestFileStorage_instantiation(unittest.TestCase):
     """Unittests for testing instantiation of the FileStorage class."""
 
@@ -65,9 +130,34 @@ class TestFileStorage_methods(unittest.TestCase):
     def test_all(self):
         self.assertEqual(dict, type(models.storage.all()))
 
-    def test_all_with_arg(self):
-        with self.assertRaises(TypeError):
-            models.storage.all(None)
+    def test_all_with_None(self):
+        self.assertIs(models.storage.all(), models.storage.all(None))
+
+    def test_all_with_class(self):
+        bm = BaseModel()
+        us = User()
+        self.assertEqual({"User." + us.id: us}, models.storage.all(User))
+        self.assertEqual({"User." + us.id: us}, models.storage.all("User"))
+        self.assertEqual({}, models.storage.all("Review"))
+
+    def test_all_with_class_after_delete(self):
+        us = User()
+        models.storage.delete(us)
+        self.assertEqual({}, models.storage.all(User))
+
+    def test_count(self):
+        BaseModel()
+        User()
+        User()
+        self.assertEqual(3, models.storage.count())
+        self.assertEqual(2, models.storage.count(User))
+        self.assertEqual(1, models.storage.count("BaseModel"))
+        self.assertEqual(0, models.storage.count("MyModel"))
+
+    def test_count_after_objects_replaced(self):
+        User()
+        FileStorage._FileStorage__objects = {}
+        self.assertEqual(0, models.storage.count(User))
 
     def test_new(self):
         bm = BaseModel()
@@ -160,10 +250,1296 @@ class TestFileStorage_methods(unittest.TestCase):
         self.assertIn("Amenity." + am.id, objs)
         self.assertIn("Review." + rv.id, objs)
 
+    def test_get(self):
+        us = User()
+        self.assertIs(us, models.storage.get(User, us.id))
+        self.assertIs(us, models.storage.get("User", us.id))
+        self.assertIsNone(models.storage.get("User", "1234"))
+        self.assertIsNone(models.storage.get("MyModel", us.id))
+
+    def test_reload_reports_progress(self):
+        BaseModel()
+        User()
+        models.storage.save()
+        counts = []
+        models.storage.reload(progress=counts.append)
+        self.assertEqual([2], counts)
+
     def test_reload_with_arg(self):
         with self.assertRaises(TypeError):
             models.storage.reload(None)
 
 
+class TestFileStorage_journal(unittest.TestCase):
+    """Unittests for testing the journal mode of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        models.storage.journal(3)
+
+    def tearDown(self):
+        models.storage.journal(0)
+        for name in ("file.json", "file.json.log"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_first_save_writes_snapshot(self):
+        bm = BaseModel()
+        models.storage.save()
+        with open("file.json", "r") as f:
+            self.assertIn("BaseModel." + bm.id, f.read())
+        self.assertFalse(os.path.exists("file.json.log"))
+
+    def test_save_appends_changes(self):
+        bm = BaseModel()
+        models.storage.save()
+        us = User()
+        models.storage.save()
+        with open("file.json", "r") as f:
+            self.assertNotIn("User." + us.id, f.read())
+        with open("file.json.log", "r") as f:
+            lines = f.readlines()
+        self.assertEqual(1, len(lines))
+        self.assertIn("User." + us.id, lines[0])
+
+    def test_reload_replays_journal(self):
+        bm = BaseModel()
+        us = User()
+        models.storage.save()
+        bm.name = "Holberton"
+        bm.save()
+        models.storage.delete(us)
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        objs = models.storage.all()
+        self.assertEqual("Holberton", objs["BaseModel." + bm.id].name)
+        self.assertNotIn("User." + us.id, objs)
+
+    def test_reload_ignores_torn_record(self):
+        bm = BaseModel()
+        models.storage.save()
+        us = User()
+        models.storage.save()
+        with open("file.json.log", "a") as f:
+            f.write('{"op": "del", "key": "BaseMo')
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertIn("User." + us.id, models.storage.all())
+
+    def test_save_after_torn_record(self):
+        BaseModel()
+        models.storage.save()
+        us = User()
+        models.storage.save()
+        with open("file.json.log", "a") as f:
+            f.write('{"op": "del", "key": "BaseMo')
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        st = State()
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        objs = models.storage.all()
+        self.assertIn("User." + us.id, objs)
+        self.assertIn("State." + st.id, objs)
+
+    def test_journal_compacts_past_limit(self):
+        BaseModel()
+        models.storage.save()
+        objs = [BaseModel() for i in range(4)]
+        models.storage.save()
+        self.assertFalse(os.path.exists("file.json.log"))
+        with open("file.json", "r") as f:
+            text = f.read()
+            for bm in objs:
+                self.assertIn("BaseModel." + bm.id, text)
+
+
+class TestFileStorage_dirty(unittest.TestCase):
+    """Unittests for testing change tracking of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_save_serializes_only_changed_objects(self):
+        bm = BaseModel()
+        us = User()
+        models.storage.save()
+        us.first_name = "Betty"
+        with patch.object(BaseModel, "to_dict", autospec=True,
+                          side_effect=BaseModel.to_dict) as to_dict:
+            models.storage.save()
+        self.assertEqual(1, to_dict.call_count)
+        self.assertIs(us, to_dict.call_args[0][0])
+
+    def test_save_output_matches_objects(self):
+        bm = BaseModel()
+        us = User()
+        models.storage.save()
+        us.first_name = "Betty"
+        models.storage.delete(bm)
+        models.storage.save()
+        with open("file.json", "r") as f:
+            saved = json.load(f)
+        self.assertEqual({"User." + us.id: us.to_dict()}, saved)
+
+    def test_save_drops_keys_removed_from_all(self):
+        bm = BaseModel()
+        models.storage.save()
+        del models.storage.all()["BaseModel." + bm.id]
+        models.storage.save()
+        with open("file.json", "r") as f:
+            self.assertEqual({}, json.load(f))
+
+
+class TestFileStorage_iterload(unittest.TestCase):
+    """Unittests for testing the iterload function."""
+
+    def test_iterload_empty_object(self):
+        self.assertEqual([], list(iterload(StringIO(" {} "))))
+
+    def test_iterload_members(self):
+        data = {"BaseModel.{}".format(i): {"text": "}, {" * i, "n": [i]}
+                for i in range(50)}
+        for size in (1, 3, 64, 65536):
+            f = StringIO(json.dumps(data))
+            self.assertEqual(list(data.items()), list(iterload(f, size)))
+
+    def test_iterload_indented(self):
+        data = {"a": {"b": 1}, "c": {"d": [1, 2]}}
+        f = StringIO(json.dumps(data, indent=4))
+        self.assertEqual(data, dict(iterload(f, 2)))
+
+    def test_iterload_not_object(self):
+        with self.assertRaises(ValueError):
+            list(iterload(StringIO("[1, 2]")))
+
+    def test_iterload_truncated(self):
+        with self.assertRaises(ValueError):
+            list(iterload(StringIO('{"a": {"b": 1}, "c": {"d"')))
+
+
+class TestFileStorage_lazy(unittest.TestCase):
+    """Unittests for testing the lazy mode of the FileStorage class."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.bm = BaseModel()
+        self.us = User()
+        self.us.first_name = "Betty"
+        self.st = State()
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.lazy()
+        models.storage.reload()
+
+    def tearDown(self):
+        models.storage.lazy(False)
+        FileStorage._FileStorage__raw = {}
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_reload_builds_no_objects(self):
+        self.assertEqual({}, FileStorage._FileStorage__objects)
+        self.assertEqual(3, models.storage.count())
+        self.assertEqual(1, models.storage.count(User))
+
+    def test_get_builds_one_object(self):
+        us = models.storage.get(User, self.us.id)
+        self.assertEqual(User, type(us))
+        self.assertEqual("Betty", us.first_name)
+        self.assertEqual(["User." + self.us.id],
+                         list(FileStorage._FileStorage__objects))
+        self.assertIs(us, models.storage.get(User, self.us.id))
+
+    def test_all_with_class_builds_class(self):
+        objs = models.storage.all(State)
+        self.assertEqual(["State." + self.st.id], list(objs))
+        self.assertEqual(1, len(FileStorage._FileStorage__objects))
+
+    def test_all_builds_everything(self):
+        self.assertEqual(3, len(models.storage.all()))
+        self.assertEqual(3, models.storage.count())
+
+    def test_save_keeps_records_not_built(self):
+        us = models.storage.get(User, self.us.id)
+        us.last_name = "Holberton"
+        models.storage.save()
+        with open("file.json", "r") as f:
+            saved = json.load(f)
+        self.assertEqual(3, len(saved))
+        self.assertEqual("Holberton", saved["User." + us.id]["last_name"])
+        self.assertEqual(self.st.to_dict(), saved["State." + self.st.id])
+
+
+class TestFileStorage_atomic(FileStorageTestCase):
+    """Unittests for testing crash-safe saving of the FileStorage class."""
+
+    def test_atomic_open_replaces_file(self):
+        with open("file.json", "w") as f:
+            f.write("old")
+        with atomic_open("file.json") as f:
+            f.write("new")
+        with open("file.json", "r") as f:
+            self.assertEqual("new", f.read())
+        with open("file.json.bak", "r") as f:
+            self.assertEqual("old", f.read())
+
+    def test_atomic_open_keeps_file_on_error(self):
+        with open("file.json", "w") as f:
+            f.write("old")
+        with self.assertRaises(RuntimeError):
+            with atomic_open("file.json") as f:
+                f.write("new")
+                raise RuntimeError
+        with open("file.json", "r") as f:
+            self.assertEqual("old", f.read())
+        self.assertEqual([], [n for n in os.listdir(".")
+                              if n.endswith(".tmp")])
+
+    def test_save_keeps_file_on_error(self):
+        bm = BaseModel()
+        models.storage.save()
+        us = User()
+        with patch.object(User, "to_dict", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                models.storage.save()
+        with open("file.json", "r") as f:
+            self.assertEqual(["BaseModel." + bm.id], list(json.load(f)))
+
+    def test_reload_falls_back_to_backup(self):
+        bm = BaseModel()
+        models.storage.save()
+        us = User()
+        models.storage.save()
+        with open("file.json", "r+") as f:
+            f.truncate(60)
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(["BaseModel." + bm.id],
+                         list(models.storage.all()))
+
+    def test_atomic_open_new_file_mode(self):
+        with patch("models.engine.file_storage.UMASK", 0o022):
+            with atomic_open("file.json") as f:
+                f.write("{}")
+        self.assertEqual(0o644, os.stat("file.json").st_mode & 0o777)
+
+    def test_atomic_open_keeps_mode(self):
+        with open("file.json", "w") as f:
+            f.write("{}")
+        os.chmod("file.json", 0o640)
+        with atomic_open("file.json") as f:
+            f.write("[]")
+        self.assertEqual(0o640, os.stat("file.json").st_mode & 0o777)
+
+    def test_reload_empty_file_falls_back_to_backup(self):
+        bm = BaseModel()
+        models.storage.save()
+        models.storage.save()
+        open("file.json", "w").close()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(["BaseModel." + bm.id],
+                         list(models.storage.all()))
+
+    def test_reload_empty_file_without_backup(self):
+        open("file.json", "w").close()
+        with self.assertRaises(ValueError):
+            models.storage.reload()
+
+    def test_save_empty_ndjson_store(self):
+        models.storage.file_format("ndjson")
+        try:
+            models.storage.delete(BaseModel())
+            models.storage.save()
+            self.assertNotEqual(0, os.path.getsize("file.json"))
+            models.storage.reload()
+        finally:
+            models.storage.file_format("json")
+        self.assertEqual({}, models.storage.all())
+
+    def test_reload_corrupt_without_backup(self):
+        with open("file.json", "w") as f:
+            f.write('{"BaseModel.1": {"id": ')
+        with self.assertRaises(ValueError):
+            models.storage.reload()
+        with open("file.json", "r") as f:
+            self.assertEqual('{"BaseModel.1": {"id": ', f.read())
+
+    def test_reload_missing_file(self):
+        models.storage.reload()
+        self.assertEqual({}, models.storage.all())
+
+
+class TestFileStorage_transaction(FileStorageTestCase):
+    """Unittests for testing transactions of the FileStorage class."""
+
+    def tearDown(self):
+        models.storage.rollback()
+        super().tearDown()
+
+    def test_save_deferred_until_commit(self):
+        models.storage.begin()
+        bm = BaseModel()
+        bm.save()
+        self.assertFalse(os.path.exists("file.json"))
+        models.storage.commit()
+        with open("file.json", "r") as f:
+            self.assertIn("BaseModel." + bm.id, f.read())
+
+    def test_rollback(self):
+        bm = BaseModel()
+        bm.name = "Holberton"
+        us = User()
+        models.storage.save()
+        models.storage.begin()
+        bm.name = "School"
+        bm.number = 98
+        models.storage.delete(us)
+        st = State()
+        models.storage.rollback()
+        self.assertEqual({"BaseModel." + bm.id: bm, "User." + us.id: us},
+                         models.storage.all())
+        self.assertEqual("Holberton", bm.name)
+        self.assertNotIn("number", bm.__dict__)
+        self.assertEqual(0, models.storage.count(State))
+
+    def test_rollback_created_object(self):
+        us = User()
+        models.storage.save()
+        models.storage.begin()
+        st = State()
+        st.name = "California"
+        models.storage.rollback()
+        self.assertEqual(["User." + us.id], list(models.storage.all()))
+        self.assertEqual("California", st.name)
+        self.assertIn("id", st.__dict__)
+        self.assertNotIn(st, FileStorage._FileStorage__dirty)
+
+    def test_rollback_created_object_then_save(self):
+        for mode in ("journal", "shards"):
+            FileStorage._FileStorage__objects = {}
+            if mode == "journal":
+                models.storage.journal(100)
+            else:
+                models.storage.shards(2)
+            try:
+                us = User()
+                models.storage.save()
+                models.storage.begin()
+                State()
+                models.storage.rollback()
+                ct = City()
+                models.storage.save()
+                FileStorage._FileStorage__objects = {}
+                models.storage.reload()
+                self.assertEqual({"User." + us.id, "City." + ct.id},
+                                 set(models.storage.all()))
+            finally:
+                models.storage.journal(0)
+                models.storage.shards(0)
+
+    def test_transaction_context(self):
+        with self.assertRaises(RuntimeError):
+            with models.storage.transaction():
+                bm = BaseModel()
+                raise RuntimeError
+        self.assertEqual({}, models.storage.all())
+        with models.storage.transaction():
+            bm = BaseModel()
+        with open("file.json", "r") as f:
+            self.assertIn("BaseModel." + bm.id, f.read())
+
+
+class TestFileStorage_write_behind(unittest.TestCase):
+    """Unittests for testing the write-behind mode of FileStorage."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        models.storage.write_behind(0.05)
+
+    def tearDown(self):
+        models.storage.write_behind(0)
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_save_is_delayed(self):
+        bm = BaseModel()
+        bm.save()
+        self.assertFalse(os.path.exists("file.json"))
+        sleep(0.3)
+        with open("file.json", "r") as f:
+            self.assertIn("BaseModel." + bm.id, f.read())
+
+    def test_saves_are_coalesced(self):
+        with patch.object(FileStorage, "_FileStorage__snapshot") as write:
+            for i in range(5):
+                BaseModel().save()
+            sleep(0.3)
+        self.assertEqual(1, write.call_count)
+
+    def test_flush_writes_now(self):
+        bm = BaseModel()
+        bm.save()
+        models.storage.flush()
+        with open("file.json", "r") as f:
+            self.assertIn("BaseModel." + bm.id, f.read())
+
+    def test_flush_without_save(self):
+        BaseModel()
+        models.storage.flush()
+        self.assertFalse(os.path.exists("file.json"))
+
+    def test_disable_flushes(self):
+        bm = BaseModel()
+        bm.save()
+        models.storage.write_behind(0)
+        with open("file.json", "r") as f:
+            self.assertIn("BaseModel." + bm.id, f.read())
+
+    def test_change_during_write_is_kept(self):
+        us = User()
+        us.first_name = "b"
+        us.save()
+        fragment = FileStorage._FileStorage__fragment
+
+        def changing(key, odata):
+            if key == "User." + us.id:
+                us.first_name = "c"
+            return fragment(key, odata)
+
+        with patch.object(FileStorage, "_FileStorage__fragment",
+                          side_effect=changing):
+            models.storage.flush()
+        with open("file.json", "r") as f:
+            self.assertEqual("b", json.load(f)["User." + us.id]["first_name"])
+        models.storage.save()
+        models.storage.flush()
+        with open("file.json", "r") as f:
+            self.assertEqual("c", json.load(f)["User." + us.id]["first_name"])
+
+    def test_failed_write_is_retried(self):
+        bm = BaseModel()
+        bm.save()
+        with patch("models.engine.file_storage.atomic_open",
+                   side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                models.storage.flush()
+        self.assertFalse(os.path.exists("file.json"))
+        models.storage.flush()
+        with open("file.json", "r") as f:
+            self.assertIn("BaseModel." + bm.id, f.read())
+
+
+class TestFileStorage_shards(FileStorageTestCase):
+    """Unittests for testing the sharded layout of FileStorage."""
+
+    def setUp(self):
+        super().setUp()
+        models.storage.shards(4)
+
+    def tearDown(self):
+        models.storage.shards(0)
+        FileStorage._FileStorage__loaded = None
+        super().tearDown()
+
+    def files(self):
+        return sorted(n for n in os.listdir("file.json.d")
+                      if n.endswith(".json"))
+
+    def inodes(self):
+        return {n: os.stat(os.path.join("file.json.d", n)).st_ino
+                for n in self.files()}
+
+    def reload(self, **kwargs):
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload(**kwargs)
+
+    def test_save_writes_shards(self):
+        objs = [User() for i in range(20)] + [State()]
+        models.storage.save()
+        self.assertFalse(os.path.exists("file.json"))
+        names = self.files()
+        self.assertIn("State", {n.split(".")[0] for n in names})
+        self.assertTrue(all(int(n.split(".")[1]) < 4 for n in names))
+        self.assertLess(1, len([n for n in names if n.startswith("User")]))
+        self.reload()
+        self.assertEqual({"{}.{}".format(type(o).__name__, o.id)
+                          for o in objs}, set(models.storage.all()))
+
+    def test_save_rewrites_changed_shards_only(self):
+        users = [User() for i in range(20)]
+        State()
+        models.storage.save()
+        before = self.inodes()
+        users[0].first_name = "Betty"
+        models.storage.save()
+        after = self.inodes()
+        changed = [n for n in before if before[n] != after[n]]
+        self.assertEqual(1, len(changed))
+        self.assertTrue(changed[0].startswith("User."))
+        self.reload()
+        self.assertEqual("Betty",
+                         models.storage.get(User, users[0].id).first_name)
+
+    def test_delete_removes_empty_shard(self):
+        st = State()
+        models.storage.save()
+        models.storage.delete(st)
+        models.storage.save()
+        self.assertEqual([], self.files())
+
+    def test_reload_selected_classes(self):
+        st = State()
+        ct = City()
+        us = User()
+        models.storage.save()
+        self.reload(classes=["State", "City"])
+        self.assertEqual({"State." + st.id, "City." + ct.id},
+                         set(models.storage.all()))
+        self.assertIsNone(models.storage.get(User, us.id))
+
+    def test_save_loads_unloaded_class(self):
+        old = User()
+        State()
+        models.storage.save()
+        self.reload(classes=["State"])
+        new = User()
+        models.storage.save()
+        self.reload()
+        self.assertIsNotNone(models.storage.get(User, old.id))
+        self.assertIsNotNone(models.storage.get(User, new.id))
+
+    def test_existing_file_is_moved_to_shards(self):
+        models.storage.shards(0)
+        us = User()
+        models.storage.save()
+        models.storage.shards(4)
+        self.reload()
+        State().save()
+        self.assertIn("User", {n.split(".")[0] for n in self.files()})
+        self.reload()
+        self.assertIsNotNone(models.storage.get(User, us.id))
+
+    def test_changing_count_reshards(self):
+        users = [User() for i in range(20)]
+        models.storage.save()
+        models.storage.shards(2)
+        self.reload()
+        users[0].first_name = "Betty"
+        models.storage.save()
+        self.assertTrue(all(int(n.split(".")[1]) < 2 for n in self.files()))
+        self.reload()
+        self.assertEqual(20, models.storage.count(User))
+
+    def test_changing_count_after_partial_reload(self):
+        states = [State() for i in range(3)]
+        users = [User() for i in range(5)]
+        models.storage.shards(2)
+        models.storage.save()
+        self.reload(classes=["State"])
+        st = models.storage.get(State, states[0].id)
+        st.name = "Nevada"
+        models.storage.delete(models.storage.get(State, states[1].id))
+        models.storage.shards(4)
+        models.storage.save()
+        self.assertEqual("Nevada", st.name)
+        self.assertIsNone(models.storage.get(State, states[1].id))
+        self.assertTrue(all(int(n.split(".")[1]) < 4 for n in self.files()))
+        self.reload()
+        self.assertEqual("Nevada",
+                         models.storage.get(State, states[0].id).name)
+        self.assertIsNone(models.storage.get(State, states[1].id))
+        self.assertEqual(2, models.storage.count(State))
+        self.assertEqual(len(users), models.storage.count(User))
+
+    def test_lazy_shards(self):
+        users = [User() for i in range(20)]
+        models.storage.save()
+        models.storage.lazy()
+        self.reload()
+        users[0].first_name = "Betty"
+        models.storage.new(users[0])
+        models.storage.save()
+        models.storage.lazy(False)
+        self.reload()
+        self.assertEqual(20, models.storage.count(User))
+        self.assertEqual("Betty",
+                         models.storage.get(User, users[0].id).first_name)
+
+
+class TestFileStorage_workers(FileStorageTestCase):
+    """Unittests for testing parallel reloads of FileStorage."""
+
+    def setUp(self):
+        super().setUp()
+        models.storage.shards(4)
+        models.storage.workers(2)
+
+    def tearDown(self):
+        models.storage.workers(1)
+        models.storage.shards(0)
+        super().tearDown()
+
+    def shard(self):
+        return [n for n in os.listdir("file.json.d")
+                if n.endswith(".json")][0]
+
+    def test_workers_default(self):
+        models.storage.workers()
+        self.assertEqual(os.cpu_count(),
+                         FileStorage._FileStorage__workers)
+
+    def test_decode(self):
+        us = User()
+        us.first_name = "Betty"
+        models.storage.save()
+        shapes, rows = decode(os.path.join("file.json.d", self.shard()))
+        key, i, values = rows[0]
+        self.assertEqual("User." + us.id, key)
+        rec = dict(zip(shapes[i], values))
+        self.assertEqual(us.created_at, rec["created_at"])
+        self.assertEqual("Betty", rec["first_name"])
+
+    def test_decode_falls_back_to_backup(self):
+        us = User()
+        models.storage.save()
+        us.first_name = "Betty"
+        models.storage.save()
+        path = os.path.join("file.json.d", self.shard())
+        with open(path, "w") as f:
+            f.write("{")
+        shapes, rows = decode(path)
+        self.assertEqual(["User." + us.id], [r[0] for r in rows])
+
+    def test_decode_corrupt_without_backup(self):
+        User()
+        models.storage.save()
+        path = os.path.join("file.json.d", self.shard())
+        self.assertFalse(os.path.exists(path + ".bak"))
+        with open(path, "w") as f:
+            f.write("{")
+        with self.assertRaises(ValueError):
+            decode(path)
+
+    def test_parallel_reload(self):
+        objs = [User() for i in range(20)] + [State() for i in range(20)]
+        objs[0].first_name = "Betty"
+        models.storage.save()
+        counts = []
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload(progress=counts.append)
+        self.assertEqual(40, counts[-1])
+        self.assertEqual(sorted(counts), counts)
+        for obj in objs:
+            loaded = models.storage.get(type(obj), obj.id)
+            self.assertIsNot(obj, loaded)
+            self.assertEqual(obj.to_dict(), loaded.to_dict())
+        self.assertEqual(set(), FileStorage._FileStorage__dirty)
+
+    def test_parallel_reload_selected_classes(self):
+        [User() for i in range(20)] + [State() for i in range(20)]
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload(classes=["State"])
+        self.assertEqual(20, models.storage.count())
+        FileStorage._FileStorage__loaded = None
+
+    def test_parallel_reload_corrupt_without_backup(self):
+        [User() for i in range(20)]
+        models.storage.save()
+        with open(os.path.join("file.json.d", self.shard()), "w") as f:
+            f.write("{")
+        FileStorage._FileStorage__objects = {}
+        with self.assertRaises(ValueError):
+            models.storage.reload()
+
+    def test_parallel_reload_at_import(self):
+        [User() for i in range(20)]
+        models.storage.save()
+        console = os.path.join(os.path.dirname(os.path.abspath(
+            models.__file__)), os.pardir, "console.py")
+        env = dict(os.environ, HBNB_SHARDS="4", HBNB_WORKERS="2")
+        result = subprocess.run(
+            [sys.executable, console], input="count User\n", env=env,
+            capture_output=True, text=True, timeout=30)
+        self.assertEqual(0, result.returncode)
+        self.assertIn("20", result.stdout)
+
+
+class TestFileStorage_key_index(FileStorageTestCase):
+    """Unittests for testing the key index of FileStorage."""
+
+    def setUp(self):
+        super().setUp()
+        models.storage.key_index()
+        self.users = [User() for i in range(5)]
+        self.users[0].first_name = "Betty"
+        self.state = State()
+        models.storage.save()
+        self.reload()
+
+    def tearDown(self):
+        models.storage.key_index(False)
+        models.storage.journal(0)
+        FileStorage._FileStorage__deferred = None
+        super().tearDown()
+
+    def reload(self):
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+
+    def loaded(self):
+        return set(FileStorage._FileStorage__objects)
+
+    def test_index_is_written(self):
+        self.assertTrue(os.path.exists("file.json.idx"))
+
+    def test_reload_reads_index_only(self):
+        self.assertEqual(set(), self.loaded())
+
+    def test_get_loads_one_object(self):
+        us = models.storage.get(User, self.users[0].id)
+        self.assertEqual(self.users[0].to_dict(), us.to_dict())
+        self.assertEqual({"User." + us.id}, self.loaded())
+        self.assertIs(us, models.storage.get(User, us.id))
+        self.assertEqual(set(), FileStorage._FileStorage__dirty)
+
+    def test_get_missing(self):
+        self.assertIsNone(models.storage.get(User, self.state.id))
+        self.assertEqual(set(), self.loaded())
+
+    def test_all_loads_the_rest(self):
+        us = models.storage.get(User, self.users[0].id)
+        us.first_name = "Holberton"
+        self.assertEqual(6, len(models.storage.all()))
+        self.assertIs(us, models.storage.all()["User." + us.id])
+        self.assertEqual("Holberton", us.first_name)
+
+    def test_count_loads_the_rest(self):
+        self.assertEqual(5, models.storage.count(User))
+
+    def test_save_after_delete(self):
+        models.storage.delete(models.storage.get(User, self.users[0].id))
+        models.storage.save()
+        self.reload()
+        self.assertIsNone(models.storage.get(User, self.users[0].id))
+        self.assertEqual(5, models.storage.count())
+
+    def test_new_replaces_indexed_object(self):
+        us = User(**self.users[1].to_dict())
+        us.first_name = "New"
+        models.storage.new(us)
+        self.assertIs(us, models.storage.get(User, us.id))
+        models.storage.save()
+        self.reload()
+        self.assertEqual("New", models.storage.get(User, us.id).first_name)
+
+    def test_stale_index_is_ignored(self):
+        models.storage.key_index(False)
+        models.storage.all()
+        User().save()
+        models.storage.key_index()
+        self.reload()
+        self.assertEqual(7, len(self.loaded()))
+
+    def test_journal_keeps_index(self):
+        models.storage.journal(100)
+        models.storage.delete(models.storage.get(User, self.users[0].id))
+        us = models.storage.get(User, self.users[1].id)
+        us.first_name = "Journal"
+        models.storage.save()
+        self.assertEqual({"User." + us.id}, self.loaded())
+        self.reload()
+        self.assertEqual({"User." + us.id}, self.loaded())
+        self.assertIsNone(models.storage.get(User, self.users[0].id))
+        self.assertEqual("Journal",
+                         models.storage.get(User, us.id).first_name)
+        self.assertEqual(5, models.storage.count())
+
+    def test_compressed_snapshot_is_not_indexed(self):
+        models.storage.compression("gzip")
+        try:
+            models.storage.all()
+            models.storage.save()
+        finally:
+            models.storage.compression()
+        self.reload()
+        self.assertEqual(6, len(self.loaded()))
+
+    def test_changed_file_is_loaded_in_full(self):
+        with open("file.json", "a") as f:
+            f.write(" ")
+        us = models.storage.get(User, self.users[0].id)
+        self.assertEqual("Betty", us.first_name)
+        self.assertEqual(6, len(self.loaded()))
+
+
+class TestFileStorage_related(unittest.TestCase):
+    """Unittests for testing the foreign key index of FileStorage."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        self.state = State()
+        self.cities = [City() for i in range(3)]
+        for city in self.cities:
+            city.state_id = self.state.id
+
+    def tearDown(self):
+        models.storage.rollback()
+        models.storage.lazy(False)
+        FileStorage._FileStorage__raw = {}
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def related(self, id=None):
+        return set(models.storage.related(
+            "City", "state_id", id or self.state.id))
+
+    def keys(self, objs):
+        return {"City." + obj.id for obj in objs}
+
+    def test_related_new(self):
+        self.assertEqual(self.keys(self.cities), self.related())
+
+    def test_related_with_class(self):
+        objs = models.storage.related(City, "state_id", self.state.id)
+        self.assertEqual(self.keys(self.cities), set(objs))
+        self.assertIs(self.cities[0], objs["City." + self.cities[0].id])
+
+    def test_related_other_class(self):
+        self.assertEqual({}, models.storage.related(
+            "Place", "state_id", self.state.id))
+
+    def test_related_missing_id(self):
+        self.assertEqual(set(), self.related("missing"))
+
+    def test_related_update(self):
+        other = State()
+        self.cities[0].state_id = other.id
+        self.assertEqual(self.keys(self.cities[1:]), self.related())
+        self.assertEqual(self.keys(self.cities[:1]), self.related(other.id))
+
+    def test_related_delete(self):
+        models.storage.delete(self.cities[0])
+        self.assertEqual(self.keys(self.cities[1:]), self.related())
+
+    def test_related_replaced(self):
+        rec = self.cities[0].to_dict()
+        rec["state_id"] = "other"
+        models.storage.new(City(**rec))
+        self.assertEqual(self.keys(self.cities[1:]), self.related())
+        self.assertEqual(self.keys(self.cities[:1]), self.related("other"))
+
+    def test_related_result_is_a_copy(self):
+        models.storage.related("City", "state_id", self.state.id).clear()
+        self.assertEqual(self.keys(self.cities), self.related())
+
+    def test_related_reload(self):
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(self.keys(self.cities), self.related())
+
+    def test_related_lazy_reload(self):
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.lazy()
+        models.storage.reload()
+        self.assertEqual(self.keys(self.cities), self.related())
+
+    def test_related_rollback(self):
+        models.storage.begin()
+        self.cities[0].state_id = "other"
+        City().state_id = self.state.id
+        models.storage.rollback()
+        self.assertEqual(self.keys(self.cities), self.related())
+        self.assertEqual(set(), self.related("other"))
+
+
+class TestFileStorage_where(FileStorageTestCase):
+    """Unittests for testing range queries of the FileStorage class."""
+
+    def setUp(self):
+        super().setUp()
+        for price, guests in [(50, 2), (80, 4), (120, 4), (200, 6)]:
+            pl = Place()
+            pl.price_by_night = price
+            pl.max_guest = guests
+            self.objs.append(pl)
+        self.places = self.objs
+
+    def where(self, *conditions):
+        return set(models.storage.where(Place, *conditions))
+
+    def keys(self, *indexes):
+        return set(self.found(*indexes))
+
+    def test_where_no_conditions(self):
+        self.assertEqual(self.keys(0, 1, 2, 3), self.where())
+
+    def test_where_one_range(self):
+        self.assertEqual(self.keys(0, 1),
+                         self.where(("price_by_night", "<", 100)))
+
+    def test_where_ranges_intersect(self):
+        self.assertEqual(self.keys(1), self.where(
+            ("price_by_night", "<", 100), ("max_guest", ">=", 4)))
+        self.assertEqual(set(), self.where(
+            ("price_by_night", ">", 100), ("price_by_night", "<", 100)))
+
+    def test_where_not_indexed(self):
+        self.places[2].name = "Loft"
+        self.assertEqual(self.keys(2), self.where(
+            ("name", "=", "Loft"), ("max_guest", "=", 4)))
+        self.assertEqual(self.keys(2), self.where(("name", "=", "Loft")))
+
+    def test_where_class_default(self):
+        Place()
+        self.assertEqual(1, len(self.where(("number_rooms", "=", 0),
+                                           ("max_guest", "<", 1))))
+
+    def test_where_other_class(self):
+        self.assertEqual({}, models.storage.where(
+            "User", ("price_by_night", ">", 0)))
+
+    def test_where_unknown_operator(self):
+        with self.assertRaises(KeyError):
+            self.where(("price_by_night", "!=", 50))
+
+    def test_where_update(self):
+        self.places[3].price_by_night = 90
+        self.assertEqual(self.keys(0, 1, 3),
+                         self.where(("price_by_night", "<", 100)))
+
+    def test_where_delete(self):
+        models.storage.delete(self.places[0])
+        self.assertEqual(self.keys(1),
+                         self.where(("price_by_night", "<", 100)))
+
+    def test_where_rollback(self):
+        models.storage.begin()
+        self.places[3].price_by_night = 90
+        models.storage.rollback()
+        self.assertEqual(self.keys(0, 1),
+                         self.where(("price_by_night", "<", 100)))
+
+    def test_where_lazy_reload(self):
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.lazy()
+        models.storage.reload()
+        self.assertEqual(self.keys(2, 3),
+                         self.where(("price_by_night", ">=", 100)))
+
+
+class TestFileStorage_spatial(FileStorageTestCase):
+    """Unittests for testing spatial queries of the FileStorage class."""
+
+    def setUp(self):
+        super().setUp()
+        self.places = {}
+        for name, lat, lon in [("paris", 48.8566, 2.3522),
+                               ("london", 51.5072, -0.1276),
+                               ("suva", -18.1416, 178.4419)]:
+            pl = Place()
+            pl.name = name
+            pl.latitude = lat
+            pl.longitude = lon
+            self.places[name] = pl
+        Place()
+
+    def names(self, objs):
+        return [obj.name for obj in objs.values()]
+
+    def test_box(self):
+        self.assertEqual(["paris", "london"],
+                         self.names(models.storage.box(45, -5, 55, 5)))
+        self.assertEqual(["suva"],
+                         self.names(models.storage.box(-20, 170, 0, -170)))
+
+    def test_within(self):
+        self.assertEqual(["paris", "london"], self.names(
+            models.storage.within(48.8566, 2.3522, 400)))
+        self.assertEqual(["paris"], self.names(
+            models.storage.within(48.8566, 2.3522, 100)))
+
+    def test_nearest(self):
+        self.assertEqual(["london", "paris"], self.names(
+            models.storage.nearest(52, 0, 2)))
+        self.assertEqual(["suva"], self.names(
+            models.storage.nearest(-10, -170)))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            models.storage.within(100, 0, 1)
+
+    def test_update(self):
+        self.places["suva"].latitude = 51.0
+        self.places["suva"].longitude = 0.0
+        self.assertEqual(["suva", "london"], self.names(
+            models.storage.within(51, 0, 100)))
+
+    def test_delete(self):
+        models.storage.delete(self.places["paris"])
+        self.assertEqual(["london"], self.names(
+            models.storage.nearest(48.8566, 2.3522)))
+
+    def test_lazy_reload(self):
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.lazy()
+        models.storage.reload()
+        self.assertEqual(["paris"], self.names(
+            models.storage.nearest(48, 2)))
+
+
+class TestFileStorage_search(FileStorageTestCase):
+    """Unittests for testing full-text search of the FileStorage class."""
+
+    def setUp(self):
+        super().setUp()
+        for text in ["Quiet and clean, a quiet street",
+                     "Clean room but a noisy street", "Lovely host"]:
+            rv = Review()
+            rv.text = text
+            self.objs.append(rv)
+        self.reviews = self.objs
+        self.place = Place()
+        self.place.name = "Quiet loft"
+
+    def test_search(self):
+        self.assertEqual(self.found(0, 1),
+                         list(models.storage.search(Review, "quiet clean")))
+        self.assertEqual(self.found(1, 0),
+                         list(models.storage.search("Review", "noisy clean")))
+        self.assertEqual(self.found(0), list(
+            models.storage.search("Review", "quiet clean", 1)))
+        self.assertEqual(["Place." + self.place.id],
+                         list(models.storage.search("Place", "QUIET")))
+        self.assertEqual({}, models.storage.search("Review", "pool"))
+
+    def test_update(self):
+        self.reviews[2].text = "Noisy host"
+        self.place.description = "Lovely view"
+        self.assertEqual([], list(models.storage.search("Review", "lovely")))
+        self.assertEqual(self.found(2, 1),
+                         list(models.storage.search("Review", "noisy")))
+        self.assertEqual(["Place." + self.place.id],
+                         list(models.storage.search("Place", "view")))
+
+    def test_delete(self):
+        models.storage.delete(self.reviews[0])
+        self.assertEqual(self.found(1),
+                         list(models.storage.search("Review", "clean")))
+
+    def test_rollback(self):
+        models.storage.begin()
+        self.reviews[2].text = "Noisy host"
+        models.storage.rollback()
+        self.assertEqual(self.found(2),
+                         list(models.storage.search("Review", "lovely")))
+
+    def test_reload(self):
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(self.found(0, 1),
+                         list(models.storage.search("Review", "quiet clean")))
+
+    def test_text_index_saved(self):
+        models.storage.text_index()
+        models.storage.save()
+        self.assertTrue(os.path.isfile("file.json.fts"))
+        FileStorage._FileStorage__objects = {}
+        with patch.object(TextIndex, "_TextIndex__count") as count:
+            models.storage.reload()
+        count.assert_not_called()
+        self.assertEqual(self.found(0, 1),
+                         list(models.storage.search("Review", "quiet clean")))
+        rv = models.storage.get(Review, self.reviews[2].id)
+        rv.text = "Noisy"
+        self.assertEqual(self.found(2, 1),
+                         list(models.storage.search("Review", "noisy")))
+
+    def test_text_index_out_of_date(self):
+        models.storage.text_index()
+        models.storage.save()
+        models.storage.text_index(False)
+        self.reviews[0].text = "Pool"
+        models.storage.save()
+        models.storage.text_index()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(self.found(0),
+                         list(models.storage.search("Review", "pool")))
+        self.assertEqual(self.found(1),
+                         list(models.storage.search("Review", "clean")))
+
+    def test_text_index_other_version(self):
+        models.storage.text_index()
+        models.storage.save()
+        with open("file.json.fts", "rb") as f:
+            stamp = f.read(16)
+            saved = json.loads(f.read())
+        self.assertEqual(1, saved["version"])
+        saved["version"] = 0
+        saved["postings"] = {}
+        with open("file.json.fts", "wb") as f:
+            f.write(stamp + json.dumps(saved).encode())
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(self.found(0, 1),
+                         list(models.storage.search("Review", "quiet clean")))
+
+    def test_text_index_corrupt(self):
+        models.storage.text_index()
+        models.storage.save()
+        with open("file.json.fts", "r+b") as f:
+            f.seek(20)
+            f.write(b"\xff\xff\xff")
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(self.found(0, 1),
+                         list(models.storage.search("Review", "quiet clean")))
+
+    def test_lazy_reload(self):
+        models.storage.text_index()
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.lazy()
+        models.storage.reload()
+        self.assertEqual(self.found(2),
+                         list(models.storage.search("Review", "host")))
+
+
+class TestFileStorage_having(FileStorageTestCase):
+    """Unittests for testing amenity filters of the FileStorage class."""
+
+    def setUp(self):
+        super().setUp()
+        for ids in [["wifi", "pool"], ["wifi"], ["pool", "pets"]]:
+            pl = Place()
+            pl.amenity_ids = ids
+            self.objs.append(pl)
+        self.places = self.objs
+        Place()
+
+    def found(self, *indexes):
+        return sorted(super().found(*indexes))
+
+    def having(self, *args, **kwargs):
+        return sorted(models.storage.having(*args, **kwargs))
+
+    def test_having(self):
+        self.assertEqual(self.found(0, 1), self.having(["wifi"]))
+        self.assertEqual(self.found(0), self.having(["wifi", "pool"]))
+        self.assertEqual(self.found(0, 1, 2),
+                         self.having(any_of=["wifi", "pets"]))
+        self.assertEqual(self.found(2),
+                         self.having(["pool"], none_of=["wifi"]))
+        self.assertEqual(4, len(self.having(none_of=["nope"])))
+
+    def test_update(self):
+        self.having(["pets"])
+        self.places[1].amenity_ids = self.places[1].amenity_ids | {"pets"}
+        self.assertEqual(self.found(1, 2), self.having(["pets"]))
+        self.assertEqual(self.found(1), self.having(["pets", "wifi"]))
+
+    def test_delete(self):
+        models.storage.delete(self.places[0])
+        self.assertEqual(self.found(1), self.having(["wifi"]))
+
+    def test_rollback(self):
+        models.storage.begin()
+        self.places[1].amenity_ids = ["pets"]
+        Place().amenity_ids = ["wifi"]
+        models.storage.rollback()
+        self.assertEqual(self.found(0, 1), self.having(["wifi"]))
+        self.assertEqual(self.found(2), self.having(["pets"]))
+
+    def test_reload(self):
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(self.found(2), self.having(["pets"]))
+        pl = models.storage.get(Place, self.places[2].id)
+        self.assertEqual(frozenset(["pool", "pets"]), pl.amenity_ids)
+
+    def test_saved_as_list(self):
+        models.storage.save()
+        with open("file.json", "r") as f:
+            rec = json.load(f)["Place." + self.places[0].id]
+        self.assertEqual(["pool", "wifi"], rec["amenity_ids"])
+
+    def test_lazy_reload(self):
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        models.storage.lazy()
+        models.storage.reload()
+        self.assertEqual(self.found(0, 2), self.having(["pool"]))
+
+
 if __name__ == "__main__":
     unittest.main()
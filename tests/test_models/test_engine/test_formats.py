@@ -0,0 +1,354 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/formats.py.
+
+Unittest classes:
+    TestFormats_formats
+    TestFormats_KeyIndex
+    TestFormats_compression
+    TestFormats_convert
+    TestFormats_storage
+"""
+import os
+import io
+import json
+import models
+import unittest
+from datetime import datetime
+from models.engine import formats
+from models.engine.formats import JSONFormat, BinaryFormat, MappedFormat
+from models.engine.formats import KeyIndex, NDJSONFormat
+from models.engine.file_storage import FileStorage
+from models.base_model import BaseModel
+from models.user import User
+from models.state import State
+from models.place import Place
+
+
+def records():
+    """Return the (key, record) pairs of a few objects."""
+    us = User(first_name="Betty")
+    pl = Place(name="Home", amenity_ids=["a", "b"], latitude=1.5)
+    bm = BaseModel(created_at=datetime(2017, 9, 28, 21, 3, 54))
+    return [("{}.{}".format(o.__class__.__name__, o.id), o.to_dict())
+            for o in (us, pl, bm)]
+
+
+def dumps(fmt, recs):
+    """Return the bytes of recs written in the format fmt."""
+    f = io.BytesIO()
+    fmt.dump(recs, f)
+    return f.getvalue()
+
+
+class TestFormats_formats(unittest.TestCase):
+    """Unittests for testing the JSON and binary formats."""
+
+    def test_json_matches_json_dump(self):
+        recs = records()
+        self.assertEqual(dict(recs), json.loads(dumps(JSONFormat, recs)))
+
+    def test_json_round_trip(self):
+        recs = records()
+        f = io.BufferedReader(io.BytesIO(dumps(JSONFormat, recs)))
+        self.assertEqual(recs, list(JSONFormat.load(f)))
+
+    def test_ndjson_lines(self):
+        recs = records()
+        lines = dumps(NDJSONFormat, recs).decode().splitlines()
+        self.assertEqual([r for k, r in recs],
+                         [json.loads(line) for line in lines])
+
+    def test_ndjson_round_trip(self):
+        recs = records()
+        f = io.BufferedReader(io.BytesIO(dumps(NDJSONFormat, recs)))
+        self.assertEqual(recs, list(NDJSONFormat.load(f)))
+
+    def test_ndjson_invalid(self):
+        for data in (b'{"id": "1"\n', b'{"id": "1"}\n', b'[1]\n'):
+            f = io.BufferedReader(io.BytesIO(data))
+            with self.assertRaises(ValueError):
+                list(NDJSONFormat.load(f))
+
+    def test_binary_round_trip(self):
+        recs = records()
+        f = io.BufferedReader(io.BytesIO(dumps(BinaryFormat, recs)))
+        loaded = list(BinaryFormat.load(f))
+        self.assertEqual([k for k, r in recs], [k for k, r in loaded])
+        for (key, rec), (lkey, lrec) in zip(recs, loaded):
+            self.assertEqual(list(rec), list(lrec))
+            self.assertEqual(datetime, type(lrec["created_at"]))
+            lrec["created_at"] = lrec["created_at"].isoformat()
+            lrec["updated_at"] = lrec["updated_at"].isoformat()
+            self.assertEqual(rec, lrec)
+
+    def test_binary_accepts_datetimes(self):
+        dt = datetime(2017, 9, 28, 21, 3, 54, 12)
+        rec = {"id": "1", "created_at": dt, "updated_at": dt,
+               "__class__": "User"}
+        f = io.BufferedReader(io.BytesIO(dumps(BinaryFormat, [("k", rec)])))
+        self.assertEqual([("User.1", rec)], list(BinaryFormat.load(f)))
+
+    def test_binary_is_smaller(self):
+        recs = records() * 100
+        self.assertLess(len(dumps(BinaryFormat, recs)),
+                        len(dumps(JSONFormat, recs)))
+
+    def test_binary_truncated(self):
+        data = dumps(BinaryFormat, records())
+        f = io.BufferedReader(io.BytesIO(data[:-5]))
+        with self.assertRaises(ValueError):
+            list(BinaryFormat.load(f))
+
+    def test_binary_version(self):
+        data = dumps(BinaryFormat, records())
+        self.assertEqual(BinaryFormat.magic + b"\x04", data[:6])
+        f = io.BufferedReader(io.BytesIO(data[:5] + b"\xff" + data[6:]))
+        with self.assertRaises(ValueError):
+            list(BinaryFormat.load(f))
+
+    def test_mapped_round_trip(self):
+        recs = records()
+        f = io.BufferedReader(io.BytesIO(dumps(MappedFormat, recs)))
+        self.assertEqual(sorted(recs), list(MappedFormat.load(f)))
+
+    def test_mapped_field(self):
+        rec = records()[1][1]
+        data = MappedFormat.encode(rec)
+        fields = {n: data[s:e] for n, s, e in MappedFormat.fields(data, 0)}
+        self.assertEqual(b'"Home"', fields[b"name"])
+        self.assertEqual(rec, MappedFormat.decode(data, 0))
+
+    def test_mapped_truncated(self):
+        data = dumps(MappedFormat, records())
+        f = io.BufferedReader(io.BytesIO(data[:-5]))
+        with self.assertRaises(ValueError):
+            list(MappedFormat.load(f))
+
+    def test_detect(self):
+        for fmt in (JSONFormat, NDJSONFormat, BinaryFormat, MappedFormat):
+            f = io.BufferedReader(io.BytesIO(dumps(fmt, records())))
+            self.assertIs(fmt, formats.detect(f))
+            self.assertEqual(0, f.tell())
+
+    def test_detect_empty(self):
+        f = io.BufferedReader(io.BytesIO(b" {} "))
+        self.assertIs(JSONFormat, formats.detect(f))
+
+    def test_detect_blank(self):
+        for data in (b"", b" \n\n"):
+            f = io.BufferedReader(io.BytesIO(data))
+            with self.assertRaises(ValueError):
+                formats.detect(f)
+
+    def test_ndjson_no_records(self):
+        f = io.BufferedReader(io.BytesIO(dumps(NDJSONFormat, [])))
+        self.assertEqual([], list(formats.detect(f).load(f)))
+
+
+class TestFormats_KeyIndex(unittest.TestCase):
+    """Unittests for testing the KeyIndex class."""
+
+    def setUp(self):
+        keys = [b"City.1", b"State.10", b"State.2", b"User.a"]
+        f = io.BytesIO()
+        KeyIndex.dump([(k, i * 10, i) for i, k in enumerate(keys)], f)
+        self.index = KeyIndex(f.getvalue())
+
+    def test_entries(self):
+        self.assertEqual(4, len(self.index))
+        self.assertEqual(b"State.10", self.index.key(1))
+        self.assertEqual((20, 2), self.index[2])
+
+    def test_find(self):
+        self.assertEqual(0, self.index.find(b"City.1"))
+        self.assertEqual(3, self.index.find(b"User.a"))
+        self.assertIsNone(self.index.find(b"State.1"))
+        self.assertIsNone(self.index.find(b"Zebra.1"))
+        self.assertIsNone(self.index.find(b"A"))
+
+    def test_span(self):
+        self.assertEqual(range(1, 3), self.index.span(b"State."))
+        self.assertEqual(0, len(self.index.span(b"Place.")))
+
+    def test_empty(self):
+        f = io.BytesIO()
+        KeyIndex.dump([], f)
+        index = KeyIndex(f.getvalue())
+        self.assertEqual(0, len(index))
+        self.assertIsNone(index.find(b"User.a"))
+
+    def test_truncated(self):
+        f = io.BytesIO()
+        KeyIndex.dump([(b"User.a", 0, 1)], f)
+        with self.assertRaises(ValueError):
+            KeyIndex(f.getvalue()[:-1])
+
+
+class TestFormats_compression(unittest.TestCase):
+    """Unittests for testing compressed files."""
+
+    def tearDown(self):
+        try:
+            os.remove("data.tmp")
+        except IOError:
+            pass
+
+    def write(self, name, level=None, fmt=JSONFormat):
+        with open("data.tmp", "wb") as f:
+            with formats.compressing(f, name, level) as out:
+                fmt.dump(records() * 50, out)
+        with open("data.tmp", "rb") as f:
+            return f.read()
+
+    def test_round_trip(self):
+        for name in formats.codecs:
+            for fmt in (JSONFormat, BinaryFormat):
+                data = self.write(name, fmt=fmt)
+                self.assertTrue(data.startswith(formats.codecs[name].magic))
+                with formats.reader("data.tmp") as f:
+                    self.assertIs(fmt, formats.detect(f))
+                    self.assertEqual(150, len(list(fmt.load(f))))
+
+    def test_compresses(self):
+        plain = self.write(None)
+        for name in formats.codecs:
+            self.assertLess(len(self.write(name)) * 5, len(plain))
+
+    def test_level(self):
+        self.assertLess(len(self.write("zlib", 9)),
+                        len(self.write("zlib", 0)))
+
+    def test_uncompressed(self):
+        self.write(None)
+        with formats.reader("data.tmp") as f:
+            self.assertEqual(150, len(list(JSONFormat.load(f))))
+
+    def test_truncated(self):
+        for name in formats.codecs:
+            data = self.write(name)
+            with open("data.tmp", "wb") as f:
+                f.write(data[:len(data) // 2])
+            with formats.reader("data.tmp") as f:
+                with self.assertRaises(ValueError):
+                    list(formats.detect(f).load(f))
+
+    def test_corrupt(self):
+        data = bytearray(self.write("gzip"))
+        data[-6] ^= 0xff
+        with open("data.tmp", "wb") as f:
+            f.write(data)
+        with formats.reader("data.tmp") as f:
+            with self.assertRaises(ValueError):
+                list(formats.detect(f).load(f))
+
+
+class TestFormats_convert(unittest.TestCase):
+    """Unittests for testing the convert function."""
+
+    def tearDown(self):
+        for name in ("src.tmp", "dst.tmp", "back.tmp"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+
+    def test_convert_round_trip(self):
+        recs = records()
+        with open("src.tmp", "wb") as f:
+            JSONFormat.dump(recs, f)
+        formats.convert("src.tmp", "dst.tmp", "binary")
+        with open("dst.tmp", "rb") as f:
+            self.assertIs(BinaryFormat, formats.detect(f))
+        formats.convert("dst.tmp", "back.tmp", "json")
+        with open("src.tmp", "r") as src, open("back.tmp", "r") as back:
+            self.assertEqual(json.load(src), json.load(back))
+
+
+class TestFormats_storage(unittest.TestCase):
+    """Unittests for testing FileStorage with the binary format."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        models.storage.file_format("json")
+        models.storage.compression()
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_save_and_reload_ndjson(self):
+        models.storage.file_format("ndjson")
+        us = User()
+        st = State()
+        models.storage.save()
+        with open("file.json", "r") as f:
+            self.assertEqual(2, len(f.readlines()))
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(us.to_dict(),
+                         models.storage.get(User, us.id).to_dict())
+        self.assertEqual(st.to_dict(),
+                         models.storage.get(State, st.id).to_dict())
+
+    def test_save_and_reload_compressed(self):
+        us = User()
+        us.first_name = "Betty"
+        for name in formats.codecs:
+            models.storage.compression(name, 1)
+            models.storage.save()
+            with open("file.json", "rb") as f:
+                self.assertTrue(f.read().startswith(
+                    formats.codecs[name].magic))
+            models.storage.compression()
+            FileStorage._FileStorage__objects = {}
+            models.storage.reload()
+            self.assertEqual(us.to_dict(),
+                             models.storage.get(User, us.id).to_dict())
+            models.storage.new(us)
+
+    def test_unknown_codec(self):
+        with self.assertRaises(KeyError):
+            models.storage.compression("zip")
+
+    def test_invalid_level(self):
+        with self.assertRaises(ValueError):
+            models.storage.compression("zlib", 10)
+        with self.assertRaises(ValueError):
+            models.storage.compression("lzma", -1)
+        models.storage.compression("gzip", -1)
+        models.storage.compression()
+
+    def test_unknown_format(self):
+        with self.assertRaises(KeyError):
+            models.storage.file_format("xml")
+
+    def test_save_and_reload_binary(self):
+        models.storage.file_format("binary")
+        us = User()
+        us.first_name = "Betty"
+        models.storage.save()
+        with open("file.json", "rb") as f:
+            self.assertEqual(BinaryFormat.magic, f.read(5))
+        models.storage.file_format("json")
+        FileStorage._FileStorage__objects = {}
+        models.storage.reload()
+        self.assertEqual(us.to_dict(),
+                         models.storage.get(User, us.id).to_dict())
+        models.storage.save()
+        with open("file.json", "r") as f:
+            self.assertEqual(us.to_dict(), json.load(f)["User." + us.id])
+
+
+if __name__ == "__main__":
+    unittest.main()
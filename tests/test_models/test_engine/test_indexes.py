@@ -0,0 +1,472 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/indexes.py.
+
+Unittest classes:
+    TestIndexes_functions
+    TestForeignKeyIndex
+    TestRangeIndex
+    TestIndexes_spatial
+    TestGridIndex
+    TestTextIndex
+    TestAmenityIndex
+"""
+import unittest
+from models.engine import indexes
+from models.engine.indexes import AmenityIndex, ForeignKeyIndex, GridIndex
+from models.engine.indexes import RangeIndex
+from models.engine.indexes import TextIndex, text_fields
+from models.engine.indexes import distance, is_number, location, matches
+from models.engine.indexes import tokenize
+from models.city import City
+from models.place import Place
+from models.review import Review
+
+
+def place(**kwargs):
+    return Place(id="p", created_at="2017-09-28T21:05:54.119427",
+                 updated_at="2017-09-28T21:05:54.119427", **kwargs)
+
+
+class TestIndexes_functions(unittest.TestCase):
+    """Unittests for testing the functions of the indexes module."""
+
+    def test_matches(self):
+        pl = place(price_by_night=100, name="Loft")
+        self.assertTrue(matches(pl, []))
+        self.assertTrue(matches(pl, [("price_by_night", "<=", 100),
+                                     ("name", "=", "Loft")]))
+        self.assertFalse(matches(pl, [("price_by_night", "<", 100)]))
+
+    def test_matches_class_default(self):
+        self.assertTrue(matches(place(), [("max_guest", "=", 0)]))
+
+    def test_matches_incomparable(self):
+        pl = place(price_by_night=100)
+        self.assertFalse(matches(pl, [("price_by_night", "<", "x")]))
+        self.assertFalse(matches(pl, [("missing", ">", 1)]))
+
+    def test_is_number(self):
+        self.assertTrue(is_number(1))
+        self.assertTrue(is_number(1.5))
+        self.assertFalse(is_number(True))
+        self.assertFalse(is_number("1"))
+        self.assertFalse(is_number(float("nan")))
+
+    def test_tokenize(self):
+        self.assertEqual(["a", "cozy", "loft", "2", "beds"],
+                         tokenize("A cozy-loft, 2 BEDS!"))
+        self.assertEqual([], tokenize(""))
+
+
+class TestForeignKeyIndex(unittest.TestCase):
+    """Unittests for testing the ForeignKeyIndex class."""
+
+    def setUp(self):
+        self.index = ForeignKeyIndex()
+        self.city = City(id="c1", created_at="2017-09-28T21:05:54.119427",
+                         updated_at="2017-09-28T21:05:54.119427",
+                         state_id="s1")
+        self.index.add("City.c1", self.city)
+
+    def test_covers(self):
+        self.assertTrue(self.index.covers("state_id"))
+        self.assertFalse(self.index.covers("name"))
+        self.assertFalse(self.index.covers("amenity_ids"))
+
+    def test_get(self):
+        self.assertEqual({"City.c1": self.city},
+                         self.index.get("City", "state_id", "s1"))
+        self.assertEqual({}, self.index.get("Place", "state_id", "s1"))
+
+    def test_change(self):
+        self.city.__dict__["state_id"] = "s2"
+        self.index.change("City.c1", self.city, "state_id", "s1")
+        self.assertEqual({}, self.index.get("City", "state_id", "s1"))
+        self.assertEqual(["City.c1"],
+                         list(self.index.get("City", "state_id", "s2")))
+
+    def test_remove_and_clear(self):
+        self.index.remove("City.c1", self.city)
+        self.assertEqual({}, self.index.get("City", "state_id", "s1"))
+        self.index.add("City.c1", self.city)
+        self.index.clear()
+        self.assertEqual({}, self.index.get("City", "state_id", "s1"))
+
+
+class TestRangeIndex(unittest.TestCase):
+    """Unittests for testing the RangeIndex class."""
+
+    def setUp(self):
+        self.index = RangeIndex("Place", ("price_by_night", "max_guest"))
+        self.places = {}
+        for i, price in enumerate([50, 100, 100, 150, 200]):
+            pl = place(price_by_night=price)
+            self.places["Place.{}".format(i)] = pl
+            self.index.add("Place.{}".format(i), pl)
+
+    def select(self, name, op, value):
+        spans = self.index.select("Place", name, op, value)
+        return sorted(key for keys in spans for key in keys)
+
+    def test_covers(self):
+        self.assertTrue(self.index.covers("max_guest"))
+        self.assertFalse(self.index.covers("latitude"))
+
+    def test_select_operators(self):
+        self.assertEqual(["Place.1", "Place.2"],
+                         self.select("price_by_night", "=", 100))
+        self.assertEqual(["Place.0"], self.select("price_by_night", "<", 100))
+        self.assertEqual(["Place.0", "Place.1", "Place.2"],
+                         self.select("price_by_night", "<=", 100))
+        self.assertEqual(["Place.3", "Place.4"],
+                         self.select("price_by_night", ">", 100))
+        self.assertEqual(["Place.1", "Place.2", "Place.3", "Place.4"],
+                         self.select("price_by_night", ">=", 100))
+        self.assertEqual([], self.select("price_by_night", "=", 120))
+
+    def test_select_class_default(self):
+        self.assertEqual(5, len(self.select("max_guest", "=", 0)))
+
+    def test_select_not_indexed(self):
+        self.assertIsNone(self.index.select("City", "max_guest", "=", 0))
+        self.assertIsNone(self.index.select("Place", "latitude", "=", 0))
+        self.assertIsNone(self.index.select("Place", "max_guest", "=", "0"))
+        self.assertIsNone(self.index.select("Place", "max_guest", "!", 0))
+
+    def test_other_classes_ignored(self):
+        self.index.add("City.c1", place())
+        self.assertEqual(5, len(self.select("max_guest", ">=", 0)))
+
+    def test_change(self):
+        pl = self.places["Place.0"]
+        pl.__dict__["price_by_night"] = 300
+        self.index.change("Place.0", pl, "price_by_night", 50)
+        self.assertEqual([], self.select("price_by_night", "<", 100))
+        self.assertEqual(["Place.0", "Place.4"],
+                         self.select("price_by_night", ">", 150))
+
+    def test_change_to_other_type(self):
+        pl = self.places["Place.1"]
+        pl.__dict__["price_by_night"] = "free"
+        self.index.change("Place.1", pl, "price_by_night", 100)
+        self.assertEqual(["Place.2"], self.select("price_by_night", "=", 100))
+
+    def test_remove(self):
+        self.index.remove("Place.1", self.places["Place.1"])
+        self.index.remove("Place.2", self.places["Place.2"])
+        self.assertEqual([], self.select("price_by_night", "=", 100))
+        self.assertEqual(3, len(self.select("max_guest", "=", 0)))
+
+    def test_clear(self):
+        self.index.clear()
+        self.assertEqual([], self.select("price_by_night", ">=", 0))
+
+
+# Places at (latitude, longitude), by name.
+CITIES = {
+    "paris": (48.8566, 2.3522),
+    "london": (51.5072, -0.1276),
+    "brussels": (50.8503, 4.3517),
+    "suva": (-18.1416, 178.4419),
+    "apia": (-13.8507, -171.7514),
+    "longyearbyen": (78.2232, 15.6267),
+}
+
+
+def located(cities=CITIES):
+    objs = {}
+    for name, (lat, lon) in cities.items():
+        objs["Place." + name] = Place(
+            id=name, created_at="2017-09-28T21:05:54.119427",
+            updated_at="2017-09-28T21:05:54.119427",
+            latitude=lat, longitude=lon)
+    return objs
+
+
+class TestIndexes_spatial(unittest.TestCase):
+    """Unittests for testing the spatial functions of the indexes module."""
+
+    def setUp(self):
+        self.objs = located()
+
+    def test_location(self):
+        self.assertEqual(CITIES["paris"],
+                         location(self.objs["Place.paris"]))
+        self.assertIsNone(location(place()))
+        self.assertIsNone(location(place(latitude=1.0)))
+        self.assertIsNone(location(place(latitude=91, longitude=0)))
+        self.assertIsNone(location(place(latitude="1", longitude=0)))
+
+    def test_distance(self):
+        self.assertAlmostEqual(344, distance(*CITIES["paris"],
+                                             *CITIES["london"]), delta=1)
+        self.assertEqual(0, distance(10, 20, 10, 20))
+        self.assertAlmostEqual(20015, distance(0, 0, 0, 180), delta=1)
+
+    def test_box(self):
+        self.assertEqual(["Place.paris", "Place.brussels"], list(
+            indexes.box(self.objs, 45, 0, 51, 5)))
+
+    def test_box_across_antimeridian(self):
+        self.assertEqual(["Place.suva", "Place.apia"], list(
+            indexes.box(self.objs, -20, 170, -10, -170)))
+
+    def test_box_invalid(self):
+        with self.assertRaises(ValueError):
+            indexes.box(self.objs, -91, 0, 0, 0)
+
+    def test_within(self):
+        self.assertEqual(["Place.paris", "Place.brussels"], list(
+            indexes.within(self.objs, 48.8566, 2.3522, 300)))
+        self.assertEqual(["Place.brussels", "Place.paris",
+                          "Place.london"], list(
+            indexes.within(self.objs, 50.5, 2.5, 300)))
+
+    def test_within_invalid(self):
+        with self.assertRaises(ValueError):
+            indexes.within(self.objs, 0, 0, -1)
+        with self.assertRaises(ValueError):
+            indexes.within(self.objs, 0, 181, 1)
+
+    def test_nearest(self):
+        self.assertEqual(["Place.apia", "Place.suva"], list(
+            indexes.nearest(self.objs, -15, -175, 2)))
+        self.assertEqual(6, len(indexes.nearest(self.objs, 0, 0, 10)))
+
+    def test_nearest_invalid(self):
+        with self.assertRaises(ValueError):
+            indexes.nearest(self.objs, 0, 0, 0)
+
+
+class TestGridIndex(unittest.TestCase):
+    """Unittests for testing the GridIndex class."""
+
+    def setUp(self):
+        self.objs = located()
+        self.index = GridIndex("Place", 1.0)
+        for key, obj in self.objs.items():
+            self.index.add(key, obj)
+
+    def test_covers(self):
+        self.assertTrue(self.index.covers("latitude"))
+        self.assertTrue(self.index.covers("longitude"))
+        self.assertFalse(self.index.covers("max_guest"))
+
+    def test_len(self):
+        self.assertEqual(6, len(self.index))
+        self.index.add("Place.none", place())
+        self.index.add("City.paris", self.objs["Place.paris"])
+        self.assertEqual(6, len(self.index))
+
+    def test_queries_match_scan(self):
+        for args in [(45, 0, 51, 5), (-20, 170, -10, -170),
+                     (-90, -180, 90, 180)]:
+            self.assertEqual(indexes.box(self.objs, *args),
+                             self.index.box(*args))
+        for args in [(48.8566, 2.3522, 300), (-15, 179.9, 1000),
+                     (89.9, 0, 1500), (0, 0, 30000)]:
+            self.assertEqual(list(indexes.within(self.objs, *args)),
+                             list(self.index.within(*args)))
+        for args in [(50, 1, 1), (-15, -179.9, 2), (90, 0, 3), (0, 0, 9)]:
+            self.assertEqual(list(indexes.nearest(self.objs, *args)),
+                             list(self.index.nearest(*args)))
+
+    def test_change(self):
+        obj = self.objs["Place.paris"]
+        obj.__dict__["latitude"] = -18.0
+        obj.__dict__["longitude"] = 178.0
+        self.index.change("Place.paris", obj, "longitude", 2.3522)
+        self.assertEqual([], list(self.index.within(48.8566, 2.3522, 10)))
+        self.assertIn("Place.paris", self.index.within(-18.1, 178.4, 100))
+
+    def test_remove(self):
+        self.index.remove("Place.paris", self.objs["Place.paris"])
+        self.assertEqual(["Place.brussels"],
+                         list(self.index.nearest(48.8566, 2.3522)))
+        self.assertEqual(5, len(self.index))
+
+    def test_clear(self):
+        self.index.clear()
+        self.assertEqual({}, self.index.nearest(0, 0, 3))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            self.index.box(0, 0, 100, 0)
+        with self.assertRaises(ValueError):
+            self.index.within(0, 0, float("nan"))
+        with self.assertRaises(ValueError):
+            self.index.nearest(0, 0, -1)
+
+
+def review(id, text):
+    return Review(id=id, created_at="2017-09-28T21:05:54.119427",
+                  updated_at="2017-09-28T21:05:54.119427", text=text)
+
+
+class TestTextIndex(unittest.TestCase):
+    """Unittests for testing the TextIndex class."""
+
+    def setUp(self):
+        self.objs = {
+            "Review.1": review("1", "Quiet and clean, a quiet street"),
+            "Review.2": review("2", "Clean room but a noisy street"),
+            "Review.3": review("3", "Lovely host"),
+            "Place.1": place(name="Quiet loft", description="Clean")
+        }
+        self.index = TextIndex(text_fields)
+        for key, obj in self.objs.items():
+            self.index.add(key, obj)
+
+    def keys(self, cls_name, terms, limit=None):
+        return [key for key, score in
+                self.index.search(cls_name, terms, limit)]
+
+    def test_covers(self):
+        self.assertTrue(self.index.covers("text"))
+        self.assertTrue(self.index.covers("description"))
+        self.assertFalse(self.index.covers("price_by_night"))
+
+    def test_contains(self):
+        self.assertIn("Review.1", self.index)
+        self.assertNotIn("Review.4", self.index)
+        self.index.add("City.1", self.objs["Review.1"])
+        self.assertNotIn("City.1", self.index)
+
+    def test_search_ranks(self):
+        self.assertEqual(["Review.1", "Review.2"],
+                         self.keys("Review", "quiet clean"))
+        self.assertEqual(["Review.2", "Review.1"],
+                         self.keys("Review", "NOISY clean"))
+        self.assertEqual(["Review.1"], self.keys("Review", "clean", 1))
+        self.assertEqual(["Place.1"], self.keys("Place", "quiet"))
+
+    def test_search_nothing(self):
+        self.assertEqual([], self.keys("Review", "pool"))
+        self.assertEqual([], self.keys("Review", ""))
+        self.assertEqual([], self.keys("City", "clean"))
+
+    def test_scores(self):
+        (key, score), = self.index.search("Review", "lovely")
+        self.assertEqual("Review.3", key)
+        self.assertGreater(score, 0)
+
+    def test_change(self):
+        obj = self.objs["Review.3"]
+        obj.__dict__["text"] = "Noisy"
+        self.index.change("Review.3", obj, "text", "Lovely host")
+        self.assertEqual([], self.keys("Review", "lovely host"))
+        self.assertEqual(["Review.3", "Review.2"],
+                         self.keys("Review", "noisy"))
+
+    def test_change_from_class_default(self):
+        obj = place(name="Loft")
+        self.index.add("Place.2", obj)
+        obj.__dict__["description"] = "Sunny"
+        self.index.change("Place.2", obj, "description")
+        self.assertEqual(["Place.2"], self.keys("Place", "sunny"))
+
+    def test_change_other_attribute(self):
+        obj = self.objs["Review.3"]
+        obj.__dict__["user_id"] = "u1"
+        self.index.change("Review.3", obj, "user_id")
+        self.assertEqual(["Review.3"], self.keys("Review", "host"))
+
+    def test_remove(self):
+        self.index.remove("Review.1", self.objs["Review.1"])
+        self.assertNotIn("Review.1", self.index)
+        self.assertEqual(["Review.2"], self.keys("Review", "quiet clean"))
+
+    def test_clear(self):
+        self.index.clear()
+        self.assertEqual([], self.keys("Review", "clean"))
+
+    def test_state_and_restore(self):
+        other = TextIndex(text_fields)
+        other.restore(self.index.state())
+        self.assertEqual(self.index.search("Review", "quiet street"),
+                         other.search("Review", "quiet street"))
+
+    def test_search_function(self):
+        objs = {k: v for k, v in self.objs.items() if k[0] == "R"}
+        self.assertEqual(["Review.1", "Review.2"],
+                         list(indexes.search(objs, "Review", "clean")))
+        self.assertEqual(["Review.3"],
+                         list(indexes.search(objs, "Review", "host", 1)))
+
+
+class TestAmenityIndex(unittest.TestCase):
+    """Unittests for testing the AmenityIndex class."""
+
+    def setUp(self):
+        self.objs = {}
+        for i, ids in enumerate([["wifi", "pool"], ["wifi"], ["pool", "pets"],
+                                 []]):
+            self.objs["Place.{}".format(i)] = place(amenity_ids=ids)
+        self.index = AmenityIndex("Place")
+        for key, obj in self.objs.items():
+            self.index.add(key, obj)
+
+    def select(self, *args):
+        return sorted(self.index.select(*args))
+
+    def test_covers(self):
+        self.assertTrue(self.index.covers("amenity_ids"))
+        self.assertFalse(self.index.covers("name"))
+
+    def test_len(self):
+        self.assertEqual(4, len(self.index))
+        self.index.add("City.1", self.objs["Place.0"])
+        self.index.add("Place.0", self.objs["Place.0"])
+        self.assertEqual(4, len(self.index))
+
+    def test_select(self):
+        self.assertEqual(["Place.0", "Place.1"], self.select(["wifi"]))
+        self.assertEqual(["Place.0"], self.select(["wifi", "pool"]))
+        self.assertEqual(["Place.0", "Place.1", "Place.2"],
+                         self.select((), ["wifi", "pets"]))
+        self.assertEqual(["Place.1", "Place.3"],
+                         self.select((), (), ["pool"]))
+        self.assertEqual(["Place.2"], self.select(["pool"], (), ["wifi"]))
+        self.assertEqual(4, len(self.select()))
+        self.assertEqual([], self.select(["nope"]))
+        self.assertEqual([], self.select((), ["nope"]))
+        self.assertEqual(4, len(self.select((), (), ["nope"])))
+
+    def test_select_matches_scan(self):
+        for args in [(["wifi"],), ((), ["pets", "pool"], ["wifi"]),
+                     (["pool"], ["wifi", "pets"]), ((), (), ["wifi"])]:
+            self.assertEqual(sorted(indexes.having(self.objs, *args)),
+                             self.select(*args))
+
+    def test_change(self):
+        self.select(["wifi"])
+        obj = self.objs["Place.1"]
+        obj.__dict__["amenity_ids"] = frozenset(["pets"])
+        self.index.change("Place.1", obj, "amenity_ids", frozenset(["wifi"]))
+        self.assertEqual(["Place.0"], self.select(["wifi"]))
+        self.assertEqual(["Place.1", "Place.2"], self.select(["pets"]))
+
+    def test_change_from_class_default(self):
+        obj = self.objs["Place.3"]
+        obj.__dict__["amenity_ids"] = frozenset(["wifi"])
+        self.index.change("Place.3", obj, "amenity_ids")
+        self.assertEqual(["Place.0", "Place.1", "Place.3"],
+                         self.select(["wifi"]))
+
+    def test_remove_reuses_ordinal(self):
+        self.select(["pool"])
+        self.index.remove("Place.0", self.objs["Place.0"])
+        self.assertEqual(["Place.2"], self.select(["pool"]))
+        self.assertEqual(3, len(self.select()))
+        self.index.add("Place.9", place(amenity_ids=["pool"]))
+        self.assertEqual(["Place.2", "Place.9"], self.select(["pool"]))
+        self.assertEqual("Place.9", self.index.select()[0])
+
+    def test_clear(self):
+        self.index.clear()
+        self.assertEqual([], self.select())
+        self.assertEqual(0, len(self.index))
+
+
+if __name__ == "__main__":
+    unittest.main()
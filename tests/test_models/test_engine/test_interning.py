@@ -0,0 +1,148 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/interning.py.
+
+Unittest classes:
+    TestInternTable
+    TestInterning_functions
+    TestInterning_reload
+"""
+import os
+import sys
+import models
+import unittest
+from models.engine.file_storage import FileStorage
+from models.engine.interning import InternTable, strings
+from models.engine.interning import interned, intern_value, intern_record
+from models.review import Review
+from models.place import Place
+
+
+def fresh(s):
+    """Return a new string object equal to s."""
+    return "".join(list(s))
+
+
+class TestInternTable(unittest.TestCase):
+    """Unittests for testing the InternTable class."""
+
+    def test_returns_first_string(self):
+        table = InternTable()
+        first = fresh("user-1")
+        self.assertIs(first, table(first))
+        self.assertIs(first, table(fresh("user-1")))
+        self.assertEqual(1, len(table))
+
+    def test_counters(self):
+        table = InternTable()
+        s = fresh("user-1")
+        table(s)
+        table(s)
+        self.assertEqual(0, table.hits)
+        table(fresh("user-1"))
+        table(fresh("user-1"))
+        self.assertEqual(2, table.hits)
+        self.assertEqual(2 * sys.getsizeof(s), table.saved)
+
+    def test_clear(self):
+        table = InternTable()
+        table(fresh("a"))
+        table(fresh("a"))
+        table.clear()
+        self.assertEqual((0, 0, 0), (len(table), table.hits, table.saved))
+
+
+class TestInterning_functions(unittest.TestCase):
+    """Unittests for testing the interning functions."""
+
+    def test_interned(self):
+        for name in ("user_id", "city_id", "amenity_ids", "__class__"):
+            self.assertTrue(interned(name))
+        for name in ("id", "name", "text", "created_at"):
+            self.assertFalse(interned(name))
+
+    def test_intern_value(self):
+        s = intern_value("place_id", fresh("place-1"))
+        self.assertIs(s, intern_value("place_id", fresh("place-1")))
+        t = fresh("place-1")
+        self.assertIs(t, intern_value("text", t))
+        self.assertEqual(3, intern_value("user_id", 3))
+
+    def test_intern_list(self):
+        ids = intern_value("amenity_ids", [fresh("a-1"), fresh("a-2")])
+        again = intern_value("amenity_ids", [fresh("a-1"), 5])
+        self.assertIs(ids[0], again[0])
+        self.assertEqual(5, again[1])
+
+    def test_intern_frozenset(self):
+        ids = intern_value("amenity_ids", frozenset([fresh("a-1")]))
+        again = intern_value("amenity_ids", frozenset([fresh("a-1"), 5]))
+        self.assertEqual(frozenset(["a-1", 5]), again)
+        self.assertIs(next(iter(ids)),
+                      next(v for v in again if isinstance(v, str)))
+
+    def test_intern_record(self):
+        rec = intern_record({"id": fresh("id-1"),
+                             "user_id": fresh("user-1"),
+                             "__class__": fresh("Review")})
+        other = intern_record({"id": fresh("id-1"),
+                               "user_id": fresh("user-1"),
+                               "__class__": fresh("Review")})
+        self.assertIs(rec["user_id"], other["user_id"])
+        self.assertIs(rec["__class__"], other["__class__"])
+        self.assertIsNot(rec["id"], other["id"])
+
+
+class TestInterning_reload(unittest.TestCase):
+    """Unittests for testing interning during FileStorage reloads."""
+
+    def setUp(self):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__raw = {}
+
+    def tearDown(self):
+        models.storage.lazy(False)
+        FileStorage._FileStorage__raw = {}
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def save_reviews(self):
+        reviews = [Review() for i in range(3)]
+        for rv in reviews:
+            rv.user_id = fresh("user-1")
+            rv.place_id = fresh("place-1")
+        pl = Place()
+        pl.amenity_ids = [fresh("amenity-1")]
+        models.storage.save()
+        FileStorage._FileStorage__objects = {}
+        return [rv.id for rv in reviews]
+
+    def test_reload_interns_foreign_keys(self):
+        ids = self.save_reviews()
+        hits = strings.hits
+        models.storage.reload()
+        loaded = [models.storage.get(Review, id) for id in ids]
+        self.assertIs(loaded[0].user_id, loaded[1].user_id)
+        self.assertIs(loaded[1].place_id, loaded[2].place_id)
+        self.assertLessEqual(hits + 4, strings.hits)
+
+    def test_lazy_reload_interns_records(self):
+        ids = self.save_reviews()
+        models.storage.lazy()
+        models.storage.reload()
+        loaded = [models.storage.get(Review, id) for id in ids]
+        self.assertIs(loaded[0].user_id, loaded[2].user_id)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+#!/usr/bin/python3
+"""Defines unittests for models/engine/mapped_storage.py.
+
+Unittest classes:
+    TestMappedStorage_methods
+    TestMappedStorage_views
+"""
+import io
+import os
+import models
+import unittest
+from datetime import datetime
+from models.engine import formats
+from models.engine.file_storage import FileStorage
+from models.engine.mapped_storage import MappedStorage
+from models.user import User
+from models.state import State
+from models.place import Place
+
+
+class TestMappedStorage_methods(unittest.TestCase):
+    """Unittests for testing methods of the MappedStorage class."""
+
+    @classmethod
+    def setUpClass(cls):
+        try:
+            os.rename("file.json", "tmp")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+        models.storage.file_format("mapped")
+        cls.users = [User() for i in range(10)]
+        cls.state = State()
+        cls.place = Place()
+        cls.place.name = "Home"
+        cls.place.description = "A quiet home by the sea"
+        cls.place.amenity_ids = ["a", "b"]
+        cls.place.user_id = cls.users[0].id
+        cls.place.price_by_night = 80
+        cls.place.latitude = 48.8566
+        cls.place.longitude = 2.3522
+        models.storage.save()
+        models.storage.file_format("json")
+        cls.storage = MappedStorage()
+        cls.storage.reload()
+
+    @classmethod
+    def tearDownClass(cls):
+        try:
+            os.remove("file.json")
+        except IOError:
+            pass
+        try:
+            os.rename("tmp", "file.json")
+        except IOError:
+            pass
+        FileStorage._FileStorage__objects = {}
+
+    def test_all(self):
+        self.assertEqual(set(FileStorage._FileStorage__objects),
+                         set(self.storage.all()))
+
+    def test_all_with_class(self):
+        self.assertEqual({"User." + u.id for u in self.users},
+                         set(self.storage.all(User)))
+        self.assertEqual(["State." + self.state.id],
+                         list(self.storage.all("State")))
+        self.assertEqual({}, dict(self.storage.all("Review")))
+
+    def test_count(self):
+        self.assertEqual(12, self.storage.count())
+        self.assertEqual(10, self.storage.count(User))
+        self.assertEqual(1, self.storage.count("Place"))
+        self.assertEqual(0, self.storage.count("City"))
+
+    def test_get(self):
+        us = self.users[3]
+        self.assertEqual(us.to_dict(), self.storage.get(User, us.id).to_dict())
+        self.assertIsNone(self.storage.get(User, self.state.id))
+        self.assertIsNone(self.storage.get("City", "nope"))
+
+    def test_related(self):
+        objs = self.storage.related(Place, "user_id", self.users[0].id)
+        self.assertEqual(["Place." + self.place.id], list(objs))
+        self.assertEqual({}, self.storage.related(
+            "Place", "user_id", self.users[1].id))
+
+    def test_where(self):
+        self.assertEqual(["Place." + self.place.id], list(self.storage.where(
+            Place, ("price_by_night", "<", 100), ("max_guest", "=", 0))))
+        self.assertEqual({}, self.storage.where(
+            "Place", ("price_by_night", ">", 100)))
+
+    def test_spatial(self):
+        key = "Place." + self.place.id
+        self.assertEqual([key], list(self.storage.box(45, 0, 50, 5)))
+        self.assertEqual([key], list(self.storage.within(48, 2, 100)))
+        self.assertEqual({}, self.storage.within(0, 0, 100))
+        self.assertEqual([key], list(self.storage.nearest(0, 0, 5)))
+
+    def test_search(self):
+        self.assertEqual(["Place." + self.place.id], list(
+            self.storage.search(Place, "quiet sea")))
+        self.assertEqual({}, self.storage.search("Place", "noisy"))
+        self.assertEqual({}, self.storage.search("Review", "quiet"))
+
+    def test_having(self):
+        key = "Place." + self.place.id
+        self.assertEqual([key], list(self.storage.having(["a", "b"])))
+        self.assertEqual([key], list(self.storage.having(any_of=["b", "c"])))
+        self.assertEqual({}, self.storage.having(["a"], none_of=["b"]))
+
+    def test_all_getitem_other_class(self):
+        with self.assertRaises(KeyError):
+            self.storage.all(User)["State." + self.state.id]
+
+    def test_writes_are_refused(self):
+        with self.assertRaises(io.UnsupportedOperation):
+            self.storage.new(User(**self.users[0].to_dict()))
+        with self.assertRaises(io.UnsupportedOperation):
+            self.storage.delete(self.storage.get(User, self.users[0].id))
+
+    def test_progress(self):
+        counts = []
+        self.storage.reload(progress=counts.append)
+        self.assertEqual([12], counts)
+
+    def test_missing_file(self):
+        storage = MappedStorage("nope.json")
+        storage.reload()
+        self.assertEqual(0, storage.count())
+        self.assertIsNone(storage.get(User, "nope"))
+
+    def test_json_file_is_refused(self):
+        with open("tmp.json", "w") as f:
+            f.write("{}")
+        try:
+            with self.assertRaises(ValueError):
+                MappedStorage("tmp.json").reload()
+        finally:
+            os.remove("tmp.json")
+
+
+class TestMappedStorage_views(unittest.TestCase):
+    """Unittests for testing the views of MappedStorage objects."""
+
+    @classmethod
+    def setUpClass(cls):
+        TestMappedStorage_methods.setUpClass()
+        cls.place = TestMappedStorage_methods.place
+        cls.view = TestMappedStorage_methods.storage.get(Place, cls.place.id)
+
+    @classmethod
+    def tearDownClass(cls):
+        TestMappedStorage_methods.tearDownClass()
+
+    def test_class(self):
+        self.assertIs(Place, self.view.__class__)
+        self.assertIsInstance(self.view, Place)
+
+    def test_fields(self):
+        self.assertEqual(self.place.id, self.view.id)
+        self.assertEqual("Home", self.view.name)
+        self.assertEqual(frozenset(["a", "b"]), self.view.amenity_ids)
+        self.assertEqual(datetime, type(self.view.created_at))
+        self.assertEqual(self.place.updated_at, self.view.updated_at)
+
+    def test_class_default(self):
+        self.assertEqual(0, self.view.number_rooms)
+        with self.assertRaises(AttributeError):
+            self.view.nope
+
+    def test_to_dict_and_str(self):
+        self.assertEqual(self.place.to_dict(), self.view.to_dict())
+        self.assertEqual(str(self.place), str(self.view))
+
+    def test_read_only(self):
+        with self.assertRaises(io.UnsupportedOperation):
+            self.view.name = "Other"
+
+
+if __name__ == "__main__":
+    unittest.main()
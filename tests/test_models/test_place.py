@@ -12,6 +12,7 @@ import unittest
 from datetime import datetime
 from time import sleep
 from models.place import Place
+from models.review import Review
 
 
 class TestPlace_instantiation(unittest.TestCase):
@@ -94,7 +95,7 @@ class TestPlace_instantiation(unittest.TestCase):
 
     def test_amenity_ids_is_public_class_attribute(self):
         pl = Place()
-        self.assertEqual(list, type(Place.amenity_ids))
+        self.assertEqual(frozenset, type(Place.amenity_ids))
         self.assertIn("amenity_ids", dir(pl))
         self.assertNotIn("amenity_ids", pl.__dict__)
 
@@ -143,26 +144,52 @@ class TestPlace_instantiation(unittest.TestCase):
         with self.assertRaises(TypeError):
             Place(id=None, created_at=None, updated_at=None)
 
+    def test_amenity_ids_stored_as_frozenset(self):
+        pl = Place(amenity_ids=["a", "b", "a"])
+        self.assertEqual(frozenset(["a", "b"]), pl.amenity_ids)
+        pl.amenity_ids = ["c"]
+        self.assertEqual(frozenset(["c"]), pl.amenity_ids)
+        pl.amenity_ids = "d"
+        self.assertEqual(frozenset(["d"]), pl.amenity_ids)
+
+    def test_amenity_ids_default_not_shared(self):
+        pl1 = Place()
+        pl2 = Place()
+        with self.assertRaises(AttributeError):
+            pl1.amenity_ids.add("a")
+        pl1.amenity_ids |= {"a"}
+        self.assertEqual(frozenset(["a"]), pl1.amenity_ids)
+        self.assertEqual(frozenset(), pl2.amenity_ids)
+
+    def test_reviews(self):
+        pl = Place()
+        rv = Review()
+        rv.place_id = pl.id
+        self.assertEqual([rv], pl.reviews)
+        self.assertEqual([], Place().reviews)
+
 
 class TestPlace_save(unittest.TestCase):
     """Unittests for testing save method of the Place class."""
 
     @classmethod
     def setUp(self):
-        try:
-            os.rename("file.json", "tmp")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.bak"):
+            try:
+                os.rename(name, "tmp" + name[9:])
+            except IOError:
+                pass
 
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
-        try:
-            os.rename("tmp", "file.json")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.bak"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+            try:
+                os.rename("tmp" + name[9:], name)
+            except IOError:
+                pass
 
     def test_one_save(self):
         pl = Place()
@@ -235,6 +262,10 @@ class TestPlace_to_dict(unittest.TestCase):
         }
         self.assertDictEqual(pl.to_dict(), tdict)
 
+    def test_to_dict_amenity_ids_sorted_list(self):
+        pl = Place(amenity_ids=["b", "a"])
+        self.assertEqual(["a", "b"], pl.to_dict()["amenity_ids"])
+
     def test_contrast_to_dict_dunder_dict(self):
         pl = Place()
         self.assertNotEqual(pl.to_dict(), pl.__dict__)
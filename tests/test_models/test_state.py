@@ -12,6 +12,7 @@ import unittest
 from datetime import datetime
 from time import sleep
 from models.state import State
+from models.city import City
 
 
 class TestState_instantiation(unittest.TestCase):
@@ -83,26 +84,40 @@ class TestState_instantiation(unittest.TestCase):
         with self.assertRaises(TypeError):
             State(id=None, created_at=None, updated_at=None)
 
+    def test_cities(self):
+        st = State()
+        cities = [City(), City()]
+        for cy in cities:
+            cy.state_id = st.id
+        City().state_id = State().id
+        self.assertEqual(cities, st.cities)
+        cities[0].state_id = ""
+        self.assertEqual(cities[1:], st.cities)
+        models.storage.delete(cities[1])
+        self.assertEqual([], st.cities)
+
 
 class TestState_save(unittest.TestCase):
     """Unittests for testing save method of the State class."""
 
     @classmethod
     def setUp(self):
-        try:
-            os.rename("file.json", "tmp")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.bak"):
+            try:
+                os.rename(name, "tmp" + name[9:])
+            except IOError:
+                pass
 
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
-        try:
-            os.rename("tmp", "file.json")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.bak"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+            try:
+                os.rename("tmp" + name[9:], name)
+            except IOError:
+                pass
 
     def test_one_save(self):
         st = State()
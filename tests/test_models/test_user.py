@@ -12,6 +12,8 @@ import unittest
 from datetime import datetime
 from time import sleep
 from models.user import User
+from models.place import Place
+from models.review import Review
 
 
 class TestUser_instantiation(unittest.TestCase):
@@ -89,26 +91,37 @@ class TestUser_instantiation(unittest.TestCase):
         with self.assertRaises(TypeError):
             User(id=None, created_at=None, updated_at=None)
 
+    def test_places_and_reviews(self):
+        us = User()
+        pl = Place()
+        pl.user_id = us.id
+        rv = Review()
+        rv.user_id = us.id
+        self.assertEqual([pl], us.places)
+        self.assertEqual([rv], us.reviews)
+
 
 class TestUser_save(unittest.TestCase):
     """Unittests for testing save method of the  class."""
 
     @classmethod
     def setUp(self):
-        try:
-            os.rename("file.json", "tmp")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.bak"):
+            try:
+                os.rename(name, "tmp" + name[9:])
+            except IOError:
+                pass
 
     def tearDown(self):
-        try:
-            os.remove("file.json")
-        except IOError:
-            pass
-        try:
-            os.rename("tmp", "file.json")
-        except IOError:
-            pass
+        for name in ("file.json", "file.json.bak"):
+            try:
+                os.remove(name)
+            except IOError:
+                pass
+            try:
+                os.rename("tmp" + name[9:], name)
+            except IOError:
+                pass
 
     def test_one_save(self):
         us = User()